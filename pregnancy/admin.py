@@ -1,8 +1,29 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, PregnancyProfile, VitalsRecord, Appointment, Message, EmergencyAlert, EducationalContent
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from .models import User, PregnancyProfile, VitalsRecord, Appointment, Message, EmergencyAlert, EducationalContent, Notification, RiskFlag
+from .search import filter_matches
+
+ADMIN_COUNT_LIMIT = 10000
+
+class CappedCountPaginator(Paginator):
+    """Counts at most ADMIN_COUNT_LIMIT rows so a changelist never scans a whole table"""
+    
+    @cached_property
+    def count(self):
+        return self.object_list[:ADMIN_COUNT_LIMIT].count()
+
+class LargeTableAdmin(admin.ModelAdmin):
+    # Pages past the capped count are unreachable, which also bounds the OFFSET
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+    # UUIDv7 keys are time-ordered, so newest first walks the primary key index instead of sorting the table
+    ordering = ['-pk']
 
 class CustomUserAdmin(UserAdmin):
+    paginator = CappedCountPaginator
+    show_full_result_count = False
     list_display = ['username', 'email', 'first_name', 'last_name', 'role', 'is_active', 'date_joined']
     list_filter = ['role', 'is_active', 'is_staff', 'date_joined']
     search_fields = ['username', 'email', 'first_name', 'last_name']
@@ -15,39 +36,56 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
 
+class TrimesterListFilter(admin.SimpleListFilter):
+    title = 'trimester'
+    parameter_name = 'trimester'
+    
+    def lookups(self, request, model_admin):
+        return [('first', 'First'), ('second', 'Second'), ('third', 'Third')]
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.in_trimester(self.value())
+        return queryset
+
 class PregnancyProfileAdmin(admin.ModelAdmin):
-    list_display = ['mother', 'last_menstrual_period', 'estimated_due_date', 'current_trimester', 'get_weeks_pregnant']
-    list_filter = ['current_trimester', 'created_at']
+    list_display = ['mother', 'last_menstrual_period', 'estimated_due_date', 'get_trimester', 'get_weeks_pregnant']
+    list_filter = [TrimesterListFilter, 'created_at']
     search_fields = ['mother__username', 'mother__first_name', 'mother__last_name']
     readonly_fields = ['estimated_due_date', 'current_trimester']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_gestation()
+    
+    def get_trimester(self, obj):
+        return obj.trimester
+    get_trimester.short_description = 'Trimester'
+    get_trimester.admin_order_field = '-last_menstrual_period'
+    
     def get_weeks_pregnant(self, obj):
-        return obj.get_weeks_pregnant()
+        return obj.weeks_pregnant
     get_weeks_pregnant.short_description = 'Weeks Pregnant'
+    get_weeks_pregnant.admin_order_field = '-last_menstrual_period'
 
-class VitalsRecordAdmin(admin.ModelAdmin):
+class VitalsRecordAdmin(LargeTableAdmin):
     list_display = ['mother', 'record_date', 'weight_kg', 'blood_pressure_systolic', 'blood_pressure_diastolic']
     list_filter = ['record_date', 'created_at']
     search_fields = ['mother__username', 'mother__first_name', 'mother__last_name']
-    date_hierarchy = 'record_date'
 
-class AppointmentAdmin(admin.ModelAdmin):
+class AppointmentAdmin(LargeTableAdmin):
     list_display = ['mother', 'clinician', 'appointment_type', 'scheduled_date', 'status']
     list_filter = ['appointment_type', 'status', 'scheduled_date']
     search_fields = ['mother__username', 'clinician__username', 'reason']
-    date_hierarchy = 'scheduled_date'
 
-class MessageAdmin(admin.ModelAdmin):
+class MessageAdmin(LargeTableAdmin):
     list_display = ['sender', 'receiver', 'subject', 'is_read', 'is_urgent', 'created_at']
     list_filter = ['is_read', 'is_urgent', 'created_at']
     search_fields = ['sender__username', 'receiver__username', 'subject', 'content']
-    date_hierarchy = 'created_at'
 
-class EmergencyAlertAdmin(admin.ModelAdmin):
-    list_display = ['mother', 'urgency_level', 'is_responded', 'created_at']
+class EmergencyAlertAdmin(LargeTableAdmin):
+    list_display = ['mother', 'urgency_level', 'is_responded', 'claimed_by', 'created_at']
     list_filter = ['urgency_level', 'is_responded', 'created_at']
     search_fields = ['mother__username', 'symptoms']
-    date_hierarchy = 'created_at'
 
 class EducationalContentAdmin(admin.ModelAdmin):
     list_display = ['title', 'content_type', 'trimester_target', 'is_featured', 'is_active', 'created_at']
@@ -55,6 +93,22 @@ class EducationalContentAdmin(admin.ModelAdmin):
     search_fields = ['title', 'summary', 'content']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'created_at'
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans over article bodies
+        if not search_term:
+            return queryset, False
+        return filter_matches(queryset, search_term), False
+
+class NotificationAdmin(LargeTableAdmin):
+    list_display = ['address', 'channel', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['channel', 'status', 'created_at']
+    search_fields = ['address', 'subject', 'dedupe_key']
+
+class RiskFlagAdmin(LargeTableAdmin):
+    list_display = ['mother', 'rule', 'severity', 'occurrences', 'last_seen', 'is_active']
+    list_filter = ['rule', 'severity', 'is_active']
+    search_fields = ['mother__username', 'mother__first_name', 'mother__last_name']
 
 # Register models
 admin.site.register(User, CustomUserAdmin)
@@ -64,3 +118,5 @@ admin.site.register(Appointment, AppointmentAdmin)
 admin.site.register(Message, MessageAdmin)
 admin.site.register(EmergencyAlert, EmergencyAlertAdmin)
 admin.site.register(EducationalContent, EducationalContentAdmin)
+admin.site.register(Notification, NotificationAdmin)
+admin.site.register(RiskFlag, RiskFlagAdmin)
@@ -0,0 +1,447 @@
+# pregnancy/benchmarks.py
+"""Query-budget benchmarks for every named route in pregnancy/urls.py.
+
+seed() fills an empty database with a synthetic population through
+bulk_create, then rebuilds the tables signals would normally maintain.
+run_benchmarks() requests each route as each role that can use it. It
+records median latency, query count and peak Python allocations. Each
+request runs inside a transaction that is rolled back, so every
+measurement starts from the same seeded data. check_results() compares
+them with the QUERY_BUDGETS below and a stored baseline. The
+benchmark_routes command wires this together for CI.
+
+start_server() runs the project under gunicorn for the commands that load
+it over HTTP, such as benchmark_connections and benchmark_alert_stream.
+"""
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from . import urls as pregnancy_urls
+from .models import (
+    User, PregnancyProfile, VitalsRecord, Appointment, Message, EmergencyAlert, EducationalContent,
+)
+from .pagination import encode_cursor
+from .screening import screen_population
+from .search import rebuild_search_index
+from .utils import rebuild_unread_counts
+from .vitals import rebuild_vitals_rollups
+
+# Rows created by seed(scale=1.0)
+FULL_SCALE = {
+    'mothers': 100_000,
+    'clinicians': 2_000,
+    'vitals': 10_000_000,
+    'messages': 5_000_000,
+    'appointments': 1_000_000,
+    'alerts': 50_000,
+    'articles': 5_000,
+}
+
+SEED_BATCH_SIZE = 5000
+REGRESSION_TOLERANCE = 0.20
+# Latency changes smaller than this are noise, whatever the percentage
+REGRESSION_FLOOR_MS = 2.0
+
+# url name: most queries one request may run, for any role. Measured with
+# benchmark_routes against a --scale 0.1 PostgreSQL seed; raise one only in
+# the change that needs the extra queries.
+QUERY_BUDGETS = {
+    'home': 0,
+    'about': 0,
+    'services': 0,
+    'contact': 0,
+    'register': 0,
+    'login': 0,
+    'logout': 4,
+    'password_reset': 0,
+    'password_reset_done': 0,
+    'password_reset_confirm': 0,
+    'password_reset_complete': 0,
+    'dashboard': 8,
+    'profile': 4,
+    'track_progress': 4,
+    'log_vitals': 3,
+    'educational_content': 5,
+    'content_detail': 6,
+    'appointments': 4,
+    'messaging': 7,
+    'emergency_alert': 3,
+    # One query per exports.CHUNK_SIZE rows; the admin's 7-day appointment export is 18 pages
+    'export_records': 21,
+    'api_week_info': 0,
+    'api_mark_message_read': 4,
+    'api_mark_messages_read': 8,
+    'api_alert_updates': 4,
+    'api_claim_alert': 3,
+    'api_vitals_trends': 4,
+    'api_ingest_vitals': 14,
+    'api_vitals_history': 3,
+    'api_appointments': 3,
+    'api_content': 3,
+    'api_search_content': 4,
+    'api_cache_stats': 2,
+    'api_database_stats': 2,
+    'health_check': 1,
+    'create_appointment': 3,
+    'update_appointment': 4,
+    'cancel_appointment': 4,
+    'conversation': 10,
+    'send_message': 3,
+}
+
+# Routes that cannot be measured as a single request
+SKIPPED_ROUTES = {}
+
+def _batches(total, make):
+    """bulk_create ``total`` objects built by make(i), one batch in memory at a time"""
+    for start in range(0, total, SEED_BATCH_SIZE):
+        yield [make(i) for i in range(start, min(start + SEED_BATCH_SIZE, total))]
+
+def _create(model, total, make):
+    for batch in _batches(total, make):
+        model.objects.bulk_create(batch)
+
+def seed(scale=1.0, seed_value=0):
+    """Fill the database with FULL_SCALE * ``scale`` synthetic rows"""
+    rng = random.Random(seed_value)
+    counts = {name: max(1, int(total * scale)) for name, total in FULL_SCALE.items()}
+    password = make_password('benchmark')
+    now = timezone.now()
+    today = timezone.localdate()
+
+    def user(role, i):
+        return User(username=f'bench-{role}-{i}', role=role, password=password, email=f'{role}{i}@example.com')
+
+    with transaction.atomic():
+        User.objects.create_superuser('bench-admin', 'admin@example.com', 'benchmark', role='admin')
+        _create(User, counts['clinicians'], lambda i: user('clinician', i))
+        _create(User, counts['mothers'], lambda i: user('mother', i))
+    clinicians = list(User.objects.filter(role='clinician').values_list('id', flat=True))
+    mothers = list(User.objects.filter(role='mother').values_list('id', flat=True))
+
+    def profile(i):
+        lmp = today - timedelta(days=rng.randrange(0, 280))
+        return PregnancyProfile(
+            mother_id=mothers[i], last_menstrual_period=lmp, estimated_due_date=lmp + timedelta(weeks=40),
+            current_trimester=('first', 'second', 'third')[min((today - lmp).days // 7 // 13, 2)],
+        )
+
+    def vitals(i):
+        return VitalsRecord(
+            mother_id=mothers[i % len(mothers)],
+            record_date=now - timedelta(hours=i // len(mothers) * 24 + rng.randrange(24)),
+            weight_kg=round(rng.gauss(68, 8), 2),
+            blood_pressure_systolic=int(rng.gauss(118, 12)),
+            blood_pressure_diastolic=int(rng.gauss(76, 8)),
+            temperature=round(rng.gauss(36.8, 0.3), 2),
+            fetal_heart_rate=int(rng.gauss(140, 10)),
+        )
+
+    def message(i):
+        mother, clinician = mothers[i % len(mothers)], clinicians[i % len(clinicians)]
+        sender, receiver = (mother, clinician) if i % 2 else (clinician, mother)
+        return Message(
+            sender_id=sender, receiver_id=receiver, subject=f'Message {i}',
+            content='How are you feeling this week?', is_read=rng.random() < 0.8,
+        )
+
+    def appointment(i):
+        return Appointment(
+            mother_id=mothers[i % len(mothers)], clinician_id=clinicians[i % len(clinicians)],
+            scheduled_date=now + timedelta(hours=rng.randrange(-24 * 180, 24 * 90)),
+            location='Clinic', reason='Antenatal checkup',
+            status=rng.choice(['scheduled', 'confirmed', 'completed', 'cancelled']),
+        )
+
+    def alert(i):
+        return EmergencyAlert(
+            mother_id=mothers[rng.randrange(len(mothers))], symptoms='Severe headache', location='Home',
+            urgency_level=rng.choice(['low', 'medium', 'high', 'critical']), is_responded=rng.random() < 0.9,
+        )
+
+    words = 'baby sleep nutrition iron folic exercise labor kicks nausea heartburn breastfeeding scan'.split()
+
+    def article(i):
+        return EducationalContent(
+            title=f'{rng.choice(words).title()} and {rng.choice(words)} guide {i}', slug=f'bench-article-{i}',
+            content_type=rng.choice(['article', 'video', 'tip', 'guide']),
+            trimester_target=rng.choice(['all', 'first', 'second', 'third']),
+            summary=' '.join(rng.choices(words, k=20)), content=' '.join(rng.choices(words, k=800)),
+            is_featured=i % 20 == 0,
+        )
+
+    _create(PregnancyProfile, len(mothers), profile)
+    _create(VitalsRecord, counts['vitals'], vitals)
+    _create(Message, counts['messages'], message)
+    _create(Appointment, counts['appointments'], appointment)
+    _create(EmergencyAlert, counts['alerts'], alert)
+    _create(EducationalContent, counts['articles'], article)
+
+    # bulk_create skips the signals that maintain these
+    rebuild_unread_counts()
+    rebuild_vitals_rollups()
+    screen_population()
+    rebuild_search_index()
+    return counts
+
+def benchmark_context():
+    """Users and object ids the route scenarios need"""
+    appointment = Appointment.objects.select_related('mother', 'clinician').filter(
+        mother__pregnancyprofile__isnull=False, status='scheduled',
+    ).first()
+    if appointment is None:
+        raise ValueError('No seeded data found; run with --seed first')
+    mother, clinician = appointment.mother, appointment.clinician
+    message = Message.objects.filter(receiver=mother).first()
+    alert = EmergencyAlert.objects.filter(is_responded=False).first()
+    return {
+        'mother': mother,
+        'clinician': clinician,
+        'admin': User.objects.filter(role='admin').first(),
+        'appointment_id': appointment.id,
+        'message_id': message.id if message else uuid.uuid4(),
+        'alert_id': alert.id if alert else uuid.uuid4(),
+        'content_slug': EducationalContent.objects.filter(is_active=True).values_list('slug', flat=True).first(),
+        'recent': (timezone.localdate() - timedelta(days=7)).isoformat(),
+        'alert_cursor': encode_cursor(timezone.now() - timedelta(hours=1), uuid.UUID(int=0)),
+    }
+
+def _ingest_payload(ctx):
+    return json.dumps([
+        {'client_id': str(uuid.uuid4()), 'mother': str(ctx['mother'].id), 'weight_kg': 70, 'temperature': 36.9}
+        for _ in range(100)
+    ])
+
+# url name: [(role, method, url kwargs, query string or body, content type)]
+# Callables receive the benchmark context.
+SCENARIOS = {
+    'home': [(None, 'get', {}, {}, None)],
+    'about': [(None, 'get', {}, {}, None)],
+    'services': [(None, 'get', {}, {}, None)],
+    'contact': [(None, 'get', {}, {}, None)],
+    'register': [(None, 'get', {}, {}, None)],
+    'login': [(None, 'get', {}, {}, None)],
+    'logout': [('mother', 'post', {}, {}, None)],
+    'password_reset': [(None, 'get', {}, {}, None)],
+    'password_reset_done': [(None, 'get', {}, {}, None)],
+    'password_reset_confirm': [(None, 'get', {'uidb64': 'MQ', 'token': 'set-password'}, {}, None)],
+    'password_reset_complete': [(None, 'get', {}, {}, None)],
+    'dashboard': [
+        ('mother', 'get', {}, {}, None),
+        ('clinician', 'get', {}, {}, None),
+        ('admin', 'get', {}, {}, None),
+    ],
+    'profile': [('mother', 'get', {}, {}, None), ('clinician', 'get', {}, {}, None)],
+    'track_progress': [('mother', 'get', {}, {}, None)],
+    'log_vitals': [('mother', 'get', {}, {}, None)],
+    'educational_content': [('mother', 'get', {}, {'trimester': 'second'}, None)],
+    'content_detail': [('mother', 'get', lambda ctx: {'slug': ctx['content_slug']}, {}, None)],
+    'appointments': [('mother', 'get', {}, {}, None), ('clinician', 'get', {}, {}, None)],
+    'messaging': [('mother', 'get', {}, {}, None), ('clinician', 'get', {}, {}, None)],
+    'emergency_alert': [('mother', 'get', {}, {}, None)],
+    'export_records': [
+        ('clinician', 'get', {'name': 'vitals'}, lambda ctx: {'from': ctx['recent']}, None),
+        ('admin', 'get', {'name': 'appointments'}, lambda ctx: {'from': ctx['recent']}, None),
+    ],
+    'api_week_info': [('mother', 'get', {'week': 20}, {}, None)],
+    'api_mark_message_read': [('mother', 'get', lambda ctx: {'message_id': ctx['message_id']}, {}, None)],
+    'api_mark_messages_read': [
+        ('mother', 'post', {}, lambda ctx: json.dumps({'partner_id': str(ctx['clinician'].id)}), 'application/json'),
+    ],
+    'api_alert_updates': [('clinician', 'get', {}, lambda ctx: {'cursor': ctx['alert_cursor']}, None)],
+    'api_claim_alert': [('clinician', 'post', lambda ctx: {'alert_id': ctx['alert_id']}, {}, None)],
+    'api_vitals_trends': [
+        ('mother', 'get', {}, {'period': 'week'}, None),
+        ('clinician', 'get', {}, lambda ctx: {'period': 'day', 'mother': str(ctx['mother'].id)}, None),
+    ],
+    'api_ingest_vitals': [('mother', 'post', {}, _ingest_payload, 'application/json')],
+    'api_vitals_history': [('mother', 'get', {}, {}, None)],
+    'api_appointments': [('mother', 'get', {}, {}, None), ('clinician', 'get', {}, {}, None)],
+    'api_content': [('mother', 'get', {}, {'trimester': 'third'}, None)],
+    'api_search_content': [('mother', 'get', {}, {'q': 'baby sle'}, None)],
+    'api_cache_stats': [('admin', 'get', {}, {}, None)],
+    'api_database_stats': [('admin', 'get', {}, {}, None)],
+    'health_check': [(None, 'get', {}, {}, None)],
+    'create_appointment': [('clinician', 'get', {}, {}, None)],
+    'update_appointment': [('clinician', 'get', lambda ctx: {'appointment_id': ctx['appointment_id']}, {}, None)],
+    'cancel_appointment': [('mother', 'post', lambda ctx: {'appointment_id': ctx['appointment_id']}, {}, None)],
+    'conversation': [('mother', 'get', lambda ctx: {'user_id': ctx['clinician'].id}, {}, None)],
+    'send_message': [('mother', 'get', {}, {}, None)],
+}
+
+# Issued only because the benchmark wraps each request in a transaction
+SAVEPOINT_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+def route_names():
+    return [pattern.name for pattern in pregnancy_urls.urlpatterns if pattern.name]
+
+def _resolve(value, ctx):
+    return value(ctx) if callable(value) else value
+
+def _client(ctx, role):
+    client = Client()
+    if role:
+        client.force_login(ctx[role])
+    return client
+
+def _request(client, name, method, kwargs, data, content_type):
+    """Send one request and read a streamed body to the end"""
+    extra = {'content_type': content_type} if content_type else {}
+    response = getattr(client, method)(reverse(name, kwargs=kwargs), data, **extra)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+@contextmanager
+def _rolled_back():
+    """Undo whatever the block writes, such as claimed alerts or ingested vitals"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+def _query_count(captured):
+    # In production a view's atomic() is BEGIN/COMMIT, which Django doesn't log
+    return sum(1 for query in captured.captured_queries if not query['sql'].startswith(SAVEPOINT_STATEMENTS))
+
+def run_benchmarks(repeat=5, only=None):
+    """Measure every scenario; returns a list of result dicts"""
+    ctx = benchmark_context()
+    results = []
+    for name in route_names():
+        if only and name not in only:
+            continue
+        if name in SKIPPED_ROUTES:
+            results.append({'route': name, 'role': None, 'skipped': SKIPPED_ROUTES[name]})
+            continue
+        if name not in SCENARIOS:
+            results.append({'route': name, 'role': None, 'error': 'no benchmark scenario'})
+            continue
+
+        for role, method, kwargs, data, content_type in SCENARIOS[name]:
+            result = {'route': name, 'role': role or 'anonymous'}
+            try:
+                timings, queries, status = [], 0, None
+                for _ in range(repeat):
+                    with _rolled_back():
+                        # A fresh session each time; logging in is not charged to the route
+                        client = _client(ctx, role)
+                        args = (name, method, _resolve(kwargs, ctx), _resolve(data, ctx), content_type)
+                        with CaptureQueriesContext(connection) as captured:
+                            started = time.perf_counter()
+                            response = _request(client, *args)
+                            timings.append((time.perf_counter() - started) * 1000)
+                    queries = max(queries, _query_count(captured))
+                    status = response.status_code
+
+                with _rolled_back():
+                    client = _client(ctx, role)
+                    args = (name, method, _resolve(kwargs, ctx), _resolve(data, ctx), content_type)
+                    tracemalloc.start()
+                    _request(client, *args)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+            except Exception as exc:
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
+                result['error'] = f'{type(exc).__name__}: {exc}'
+            else:
+                result.update(
+                    status=status,
+                    median_ms=round(statistics.median(timings), 2),
+                    queries=queries,
+                    peak_kb=round(peak / 1024, 1),
+                    budget=QUERY_BUDGETS.get(name),
+                )
+            results.append(result)
+    return results
+
+def result_key(result):
+    return f"{result['route']}:{result['role']}"
+
+def check_results(results, baseline=None):
+    """Failure messages for errors, budget overruns and latency regressions"""
+    failures = []
+    baseline = baseline or {}
+    for result in results:
+        key = result_key(result)
+        if 'skipped' in result:
+            continue
+        if 'error' in result:
+            failures.append(f"{key}: {result['error']}")
+            continue
+        if result['status'] >= 500:
+            failures.append(f"{key}: HTTP {result['status']}")
+        budget = result['budget']
+        if budget is None:
+            failures.append(f'{key}: no query budget declared')
+        elif result['queries'] > budget:
+            failures.append(f"{key}: {result['queries']} queries, budget is {budget}")
+        previous = baseline.get(key)
+        if previous:
+            limit = max(previous['median_ms'] * (1 + REGRESSION_TOLERANCE), previous['median_ms'] + REGRESSION_FLOOR_MS)
+            if result['median_ms'] > limit:
+                failures.append(f"{key}: {result['median_ms']} ms, baseline {previous['median_ms']} ms")
+    return failures
+
+def baseline_from(results):
+    return {
+        result_key(result): {key: result[key] for key in ('median_ms', 'queries', 'peak_kb')}
+        for result in results
+        if 'median_ms' in result
+    }
+
+def login_session(user):
+    """Key of a new signed-in session for ``user``, for HTTP clients outside the test client"""
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+def start_server(bind, workers, asgi=False, **env):
+    """gunicorn serving settings.WSGI_APPLICATION, or ASGI_APPLICATION on uvicorn workers.
+
+    ``env`` overrides environment variables.
+    """
+    module, app = (settings.ASGI_APPLICATION if asgi else settings.WSGI_APPLICATION).rsplit('.', 1)
+    command = [
+        sys.executable, '-m', 'gunicorn', f'{module}:{app}', '--workers', str(workers),
+        '--bind', bind, '--log-level', 'warning',
+    ]
+    if asgi:
+        command += ['--worker-class', 'uvicorn.workers.UvicornWorker']
+    return subprocess.Popen(command, env=dict(os.environ, **env))
+
+def wait_until_ready(server, url, timeout=30):
+    """Raise RuntimeError unless ``server`` answers ``url`` within ``timeout`` seconds"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup; is it installed?')
+        try:
+            urllib.request.urlopen(url, timeout=2).close()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not answer {url} within {timeout} seconds')
@@ -0,0 +1,151 @@
+# pregnancy/broker.py
+"""Publish/subscribe fan-out for pushing emergency alerts to connected clinicians.
+
+publish() is called from ordinary sync code once a transaction commits.
+Subscribers are the alert streams served by the ASGI application (see
+pregnancy/streams.py), each reading its own asyncio queue.
+
+Without ALERT_BROKER_URL the broker lives in the process, which is enough
+for runserver and tests. With a redis:// URL, publish() goes through Redis
+pub/sub and every worker process holds one Redis subscription that it fans
+out to its local streams, so thousands of streams share one connection.
+"""
+import asyncio
+import json
+import logging
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+REDIS_RETRY_SECONDS = 1
+
+class Subscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def deliver(self, message):
+        # Drop messages for a consumer that has stopped reading
+        if self.queue.qsize() < SUBSCRIBER_QUEUE_SIZE:
+            self.queue.put_nowait(message)
+
+    def end(self):
+        self.queue.put_nowait(None)
+
+    async def get(self):
+        """Next message, or None once the broker has dropped this subscription"""
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class InProcessBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        """Hand ``message`` to every local subscriber; safe to call from any thread"""
+        by_loop = {}
+        with self.lock:
+            for subscription in self.subscriptions.get(channel, ()):
+                by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if loop is running:
+                _deliver_all(subscriptions, message)
+                continue
+            try:
+                # One wake-up per event loop, not one per subscriber
+                loop.call_soon_threadsafe(_deliver_all, subscriptions, message)
+            except RuntimeError:
+                # Event loop already closed
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+
+    async def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.get(subscription.channel, set()).discard(subscription)
+
+    def drop_subscribers(self, channel, loop):
+        """End every subscription to ``channel`` on ``loop``, so clients reconnect and catch up"""
+        with self.lock:
+            dropped = [s for s in self.subscriptions.get(channel, ()) if s.loop is loop]
+        for subscription in dropped:
+            self.unsubscribe(subscription)
+            subscription.end()
+
+def _deliver_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+class RedisBroker(InProcessBroker):
+    def __init__(self, url):
+        # redis is only needed when a Redis broker is configured
+        import redis
+
+        super().__init__()
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+        self.listeners = {}
+
+    def publish(self, channel, message):
+        self.client.publish(channel, json.dumps(message))
+
+    async def subscribe(self, channel):
+        subscription = await super().subscribe(channel)
+        key = (subscription.loop, channel)
+        with self.lock:
+            listener = self.listeners.get(key)
+            if listener is None or listener.done():
+                self.listeners[key] = subscription.loop.create_task(self.listen(channel))
+        return subscription
+
+    async def listen(self, channel):
+        """Relay ``channel`` from Redis to this event loop's subscribers for as long as it runs"""
+        import redis.asyncio
+        from redis.exceptions import RedisError
+
+        loop = asyncio.get_running_loop()
+        while True:
+            client = redis.asyncio.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(channel)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.deliver(channel, json.loads(message['data']))
+            except (RedisError, OSError):
+                # Messages published meanwhile are lost; reconnecting clients replay them from the database
+                logger.warning('Lost the Redis subscription to %s; retrying', channel, exc_info=True)
+                self.drop_subscribers(channel, loop)
+                await asyncio.sleep(REDIS_RETRY_SECONDS)
+            finally:
+                await client.aclose()
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            url = settings.ALERT_BROKER_URL
+            _broker = RedisBroker(url) if url else InProcessBroker()
+    return _broker
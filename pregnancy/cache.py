@@ -0,0 +1,130 @@
+# pregnancy/cache.py
+"""Cache backends with hit/miss counters, public page caching and content invalidation.
+
+settings.CACHES points at one of the backends below (chosen with the
+CACHE_BACKEND environment variable). They behave exactly like Django's
+built-in backends but count hits and misses per process, which
+cache_stats() reports for monitoring.
+
+Cached pages and content listings include a content version in their keys.
+Saving or deleting any EducationalContent bumps the version, so everything
+that shows articles is invalidated at once without tracking keys.
+"""
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends import filebased, locmem, memcached, redis
+from django.core.cache.utils import make_template_fragment_key
+
+CONTENT_VERSION_KEY = 'content:version'
+PUBLIC_PAGE_KEY = 'page:{view}:{version}:{path}'
+CONTENT_LISTING_KEY = 'content-listing:{version}:{params}'
+
+_missing = object()
+
+# (backend class, location): [hits, misses]; Django makes one backend instance per thread
+_stats = {}
+_stats_lock = threading.Lock()
+
+class CacheStatsMixin:
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self._stats_key = (type(self).__name__, str(location))
+
+    def _count(self, hits, misses):
+        with _stats_lock:
+            counts = _stats.setdefault(self._stats_key, [0, 0])
+            counts[0] += hits
+            counts[1] += misses
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        if value is _missing:
+            self._count(0, 1)
+            return default
+        self._count(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        self._count(len(found), len(keys) - len(found))
+        return found
+
+class LocMemCache(CacheStatsMixin, locmem.LocMemCache):
+    pass
+
+class FileBasedCache(CacheStatsMixin, filebased.FileBasedCache):
+    pass
+
+class PyMemcacheCache(CacheStatsMixin, memcached.PyMemcacheCache):
+    pass
+
+class RedisCache(CacheStatsMixin, redis.RedisCache):
+    pass
+
+def cache_stats():
+    """Hits, misses and hit rate of every configured cache, for this process"""
+    stats = {}
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        if not isinstance(backend, CacheStatsMixin):
+            continue
+        with _stats_lock:
+            hits, misses = _stats.get(backend._stats_key, (0, 0))
+        lookups = hits + misses
+        stats[alias] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else None,
+        }
+    return stats
+
+def content_version():
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        cache.add(CONTENT_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CONTENT_VERSION_KEY, 1)
+    return version
+
+def invalidate_content(content):
+    """Drop every cached page, listing and card that may show ``content``"""
+    try:
+        cache.incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        cache.set(CONTENT_VERSION_KEY, 1, timeout=None)
+    cache.delete(make_template_fragment_key('content_card', [content.pk]))
+
+def cache_public_page(view=None, *, params=()):
+    """Cache a public page for anonymous visitors.
+
+    Signed-in users and requests carrying flash messages always get a fresh
+    render, because the page then shows per-user navigation. Pages that
+    rendered a CSRF token are not stored either, since the token belongs to
+    one visitor. Keys include the content version, so pages listing articles
+    change as soon as an article does, and only the query parameters named
+    in ``params``, so arbitrary query strings cannot fill the cache.
+    """
+    if view is None:
+        return lambda view: cache_public_page(view, params=params)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated or request.COOKIES.get('messages'):
+            return view(request, *args, **kwargs)
+
+        path = request.path
+        query = urlencode(sorted((name, request.GET[name]) for name in params if name in request.GET))
+        if query:
+            path += '?' + query
+        key = PUBLIC_PAGE_KEY.format(view=view.__name__, version=content_version(), path=path)
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.cookies
+                    and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')):
+                cache.set(key, response, settings.PUBLIC_PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
@@ -0,0 +1,12 @@
+# pregnancy/context_processors.py
+from django.conf import settings
+from .utils import get_unread_count
+
+def global_settings(request):
+    """Values shared by every template, such as the navigation unread badge"""
+    context = {
+        'fragment_cache_timeout': settings.CONTENT_FRAGMENT_CACHE_TIMEOUT,
+    }
+    if request.user.is_authenticated:
+        context['unread_message_count'] = get_unread_count(request.user)
+    return context
@@ -0,0 +1,46 @@
+# pregnancy/database.py
+"""Per-process database connection reuse counters.
+
+With CONN_MAX_AGE set, a worker keeps its connection between requests and
+only reconnects when the connection expires or fails its health check.
+Signals count the requests each process serves and the connections it
+opens; connection_stats() compares the two for the staff-only
+api_database_stats endpoint and the benchmark_connections command.
+"""
+import os
+import threading
+from django.conf import settings
+
+_stats = {'requests': 0, 'opened': {}}
+_stats_lock = threading.Lock()
+
+def record_request():
+    with _stats_lock:
+        _stats['requests'] += 1
+
+def record_connection(alias):
+    with _stats_lock:
+        _stats['opened'][alias] = _stats['opened'].get(alias, 0) + 1
+
+def connection_stats():
+    """Requests served and connections opened per database, for this process"""
+    with _stats_lock:
+        requests = _stats['requests']
+        opened = dict(_stats['opened'])
+    databases = {}
+    for alias, config in settings.DATABASES.items():
+        count = opened.get(alias, 0)
+        databases[alias] = {
+            'vendor': config['ENGINE'].rsplit('.', 1)[-1],
+            'conn_max_age': config.get('CONN_MAX_AGE', 0),
+            'health_checks': config.get('CONN_HEALTH_CHECKS', False),
+            'opened': count,
+            # Share of requests that ran on an already open connection
+            'reuse_rate': round(max(0.0, 1 - count / requests), 4) if requests else None,
+        }
+    return {
+        'pid': os.getpid(),
+        'pool': getattr(settings, 'DATABASE_POOL', '') or None,
+        'requests': requests,
+        'databases': databases,
+    }
@@ -0,0 +1,120 @@
+# pregnancy/exports.py
+"""Streaming CSV and NDJSON exports of vitals, appointments and alerts.
+
+Rows are read with values_list() in keyset pages of CHUNK_SIZE, each a
+separate short query continuing after the last (date, id) seen, and are
+encoded one at a time, so memory stays flat however many rows are exported.
+Unlike a server-side cursor this works through PgBouncer transaction
+pooling, where psycopg2 would otherwise load the whole result at once. The
+same generators back the export view and the export_records management
+command.
+"""
+import csv
+from datetime import datetime, time, timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from .models import VitalsRecord, Appointment, EmergencyAlert, PregnancyProfile
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+# Free-text cells starting with these are formulas to Excel and LibreOffice
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# name: (model, date field, columns)
+EXPORTS = {
+    'vitals': (VitalsRecord, 'record_date', [
+        'id', 'mother_id', 'mother__username', 'record_date', 'weight_kg',
+        'blood_pressure_systolic', 'blood_pressure_diastolic', 'temperature',
+        'fetal_heart_rate', 'symptoms', 'notes',
+    ]),
+    'appointments': (Appointment, 'scheduled_date', [
+        'id', 'mother_id', 'mother__username', 'clinician_id', 'clinician__username',
+        'appointment_type', 'scheduled_date', 'duration_minutes', 'location', 'reason',
+        'status', 'notes',
+    ]),
+    'alerts': (EmergencyAlert, 'created_at', [
+        'id', 'mother_id', 'mother__username', 'urgency_level', 'symptoms', 'location',
+        'is_responded', 'responded_by_id', 'claimed_by_id', 'claimed_at', 'response_notes',
+        'created_at',
+    ]),
+}
+
+def export_queryset(name, date_from=None, date_to=None, clinician=None, trimester=None):
+    """values_list() queryset for one export, filtered and in date order.
+
+    ``date_from`` and ``date_to`` are inclusive dates. ``clinician`` limits
+    the export to that clinician's patients; ``trimester`` to mothers
+    currently in that trimester.
+    """
+    model, date_field, columns = EXPORTS[name]
+    queryset = model.objects.all()
+
+    # Whole local days as a half-open range, so the date column index is used
+    if date_from:
+        start = timezone.make_aware(datetime.combine(date_from, time.min))
+        queryset = queryset.filter(**{f'{date_field}__gte': start})
+    if date_to:
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        queryset = queryset.filter(**{f'{date_field}__lt': end})
+
+    if clinician is not None:
+        if model is Appointment:
+            queryset = queryset.filter(clinician=clinician)
+        else:
+            patients = Appointment.objects.filter(clinician=clinician).values('mother')
+            queryset = queryset.filter(mother__in=patients)
+    if trimester:
+        mothers = PregnancyProfile.objects.in_trimester(trimester).values('mother')
+        queryset = queryset.filter(mother__in=mothers)
+
+    return queryset.order_by(date_field, 'id').values_list(*columns)
+
+def iter_rows(name, queryset, chunk_size=CHUNK_SIZE):
+    """Rows of an export_queryset(), one keyset page query per ``chunk_size`` rows"""
+    _, date_field, columns = EXPORTS[name]
+    date_index, id_index = columns.index(date_field), columns.index('id')
+    page = queryset
+    while True:
+        rows = list(page[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+        # date >= last as the index range, then skip rows tied on the date up to the last id
+        page = queryset.filter(**{f'{date_field}__gte': last[date_index]}).exclude(
+            **{date_field: last[date_index], 'id__lte': last[id_index]}
+        )
+
+class _Echo:
+    """File-like object whose write() hands the encoded line back to csv.writer"""
+
+    def write(self, value):
+        return value
+
+def csv_safe(value):
+    """Quote text a spreadsheet would otherwise run as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def iter_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([csv_safe(value) for value in row])
+
+def iter_ndjson(columns, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
+
+def iter_export(name, output_format, chunk_size=CHUNK_SIZE, **filters):
+    """Yield the encoded lines of an export"""
+    columns = EXPORTS[name][2]
+    rows = iter_rows(name, export_queryset(name, **filters), chunk_size)
+    if output_format == 'csv':
+        return iter_csv(columns, rows)
+    return iter_ndjson(columns, rows)
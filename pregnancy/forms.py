@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from .models import User, PregnancyProfile, VitalsRecord, Appointment, Message, EmergencyAlert, EducationalContent
 from datetime import date, timedelta
 
@@ -42,7 +43,7 @@ class UserRegistrationForm(UserCreationForm):
 class UserUpdateForm(forms.ModelForm):
     class Meta:
         model = User
-        fields = ['first_name', 'last_name', 'email', 'phone_number', 'profile_picture']
+        fields = ['first_name', 'last_name', 'email', 'phone_number', 'notification_channel', 'profile_picture']
         
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -79,35 +80,27 @@ class VitalsRecordForm(forms.ModelForm):
             'notes': forms.Textarea(attrs={'rows': 2, 'placeholder': 'Additional notes...'}),
         }
     
+    def _clean_range(self, field):
+        value = self.cleaned_data.get(field)
+        minimum, maximum, message = VitalsRecord.VALID_RANGES[field]
+        if value is not None and (value < minimum or value > maximum):
+            raise ValidationError(message)
+        return value
+    
     def clean_blood_pressure_systolic(self):
-        systolic = self.cleaned_data.get('blood_pressure_systolic')
-        if systolic and (systolic < 50 or systolic > 250):
-            raise ValidationError("Systolic blood pressure must be between 50 and 250.")
-        return systolic
+        return self._clean_range('blood_pressure_systolic')
     
     def clean_blood_pressure_diastolic(self):
-        diastolic = self.cleaned_data.get('blood_pressure_diastolic')
-        if diastolic and (diastolic < 30 or diastolic > 150):
-            raise ValidationError("Diastolic blood pressure must be between 30 and 150.")
-        return diastolic
+        return self._clean_range('blood_pressure_diastolic')
     
     def clean_weight_kg(self):
-        weight = self.cleaned_data.get('weight_kg')
-        if weight and (weight < 30 or weight > 200):
-            raise ValidationError("Weight must be between 30 and 200 kg.")
-        return weight
+        return self._clean_range('weight_kg')
     
     def clean_temperature(self):
-        temp = self.cleaned_data.get('temperature')
-        if temp and (temp < 35 or temp > 42):
-            raise ValidationError("Temperature must be between 35°C and 42°C.")
-        return temp
+        return self._clean_range('temperature')
     
     def clean_fetal_heart_rate(self):
-        heart_rate = self.cleaned_data.get('fetal_heart_rate')
-        if heart_rate and (heart_rate < 60 or heart_rate > 200):
-            raise ValidationError("Fetal heart rate must be between 60 and 200 BPM.")
-        return heart_rate
+        return self._clean_range('fetal_heart_rate')
 
 class AppointmentForm(forms.ModelForm):
     class Meta:
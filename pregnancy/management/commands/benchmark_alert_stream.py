@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from pregnancy.benchmarks import login_session, start_server, wait_until_ready
+from pregnancy.models import User, EmergencyAlert
+from pregnancy.streams import ALERT_STREAM_PATH
+
+def worker_memory_kb(server):
+    """Resident memory of each gunicorn worker, in KB"""
+    with open(f'/proc/{server.pid}/task/{server.pid}/children') as children:
+        pids = children.read().split()
+    memory = []
+    for pid in pids:
+        with open(f'/proc/{pid}/status') as status:
+            memory += [int(line.split()[1]) for line in status if line.startswith('VmRSS:')]
+    return memory
+
+class Command(BaseCommand):
+    help = (
+        'Hold idle clinician alert streams open against gunicorn with uvicorn workers, raise alerts '
+        'and report how long each alert takes to reach every stream'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=5000, help='Open alert streams')
+        parser.add_argument('--alerts', type=int, default=20, help='Alerts to raise once every stream is open')
+        parser.add_argument('--alert-every', type=float, default=1.0, help='Seconds between alerts')
+        parser.add_argument('--connect-batch', type=int, default=200, help='Streams opened at a time')
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--bind', default='127.0.0.1:8767')
+
+    async def open_stream(self, host, port, session_key):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(
+            f'GET {ALERT_STREAM_PATH} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n'
+            f'Cookie: {settings.SESSION_COOKIE_NAME}={session_key}\r\n\r\n'.encode()
+        )
+        status = await reader.readline()
+        if b' 200 ' not in status:
+            raise ConnectionError(status.decode().strip())
+        # Headers, then the first chunk carrying the retry interval and last event id
+        while await reader.readline() not in (b'\r\n', b''):
+            pass
+        while not (await reader.readline()).startswith(b'id: '):
+            pass
+        return reader, writer
+
+    async def read_events(self, reader, deliveries):
+        """Record (alert id, arrival time) for every alert event until the stream closes"""
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            # Chunked transfer framing lines never start with 'data: '
+            if line.startswith(b'data: '):
+                deliveries.append((json.loads(line[6:])['id'], time.time()))
+
+    def raise_alert(self, mother):
+        alert = EmergencyAlert.objects.create(mother=mother, symptoms='Benchmark', location='Benchmark')
+        # publish_alert runs on commit, which has happened by now in autocommit mode
+        return str(alert.id), time.time()
+
+    async def run(self, options, keys, mother):
+        host, port = options['bind'].rsplit(':', 1)
+        streams, deliveries, errors = [], [], []
+        started = time.monotonic()
+        batch = options['connect_batch']
+        for start in range(0, len(keys), batch):
+            opened = await asyncio.gather(
+                *(self.open_stream(host, int(port), key) for key in keys[start:start + batch]),
+                return_exceptions=True,
+            )
+            for result in opened:
+                if isinstance(result, Exception):
+                    errors.append(repr(result))
+                else:
+                    streams.append(result)
+        connect_seconds = time.monotonic() - started
+        readers = [asyncio.ensure_future(self.read_events(reader, deliveries)) for reader, _ in streams]
+
+        created = {}
+        raise_alert = sync_to_async(self.raise_alert, thread_sensitive=False)
+        for _ in range(options['alerts']):
+            await asyncio.sleep(options['alert_every'])
+            alert_id, raised_at = await raise_alert(mother)
+            created[alert_id] = raised_at
+        # Let the last alert reach every stream
+        deadline = time.monotonic() + 10
+        while len(deliveries) < len(created) * len(streams) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        for _, writer in streams:
+            writer.close()
+        for reader in readers:
+            reader.cancel()
+        return streams, deliveries, created, errors, connect_seconds
+
+    def handle(self, *args, **options):
+        if not settings.ALERT_BROKER_URL:
+            raise CommandError(
+                'Set ALERT_BROKER_URL to a redis:// URL; alerts are raised in this process and must '
+                'reach the server through the broker'
+            )
+        clinician, _ = User.objects.get_or_create(username='bench-alert-clinician', defaults={'role': 'clinician'})
+        mother, _ = User.objects.get_or_create(username='bench-alert-mother', defaults={'role': 'mother'})
+        keys = [login_session(clinician) for _ in range(options['clients'])]
+        vendor = settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]
+        self.stdout.write(
+            f"{options['clients']:,} alert streams, {options['workers']} uvicorn worker(s), "
+            f"{options['alerts']} alerts every {options['alert_every']:g} s, {vendor}"
+        )
+
+        server = start_server(options['bind'], options['workers'], asgi=True)
+        try:
+            try:
+                wait_until_ready(server, f"http://{options['bind']}{reverse('health_check')}")
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            idle_memory = sum(worker_memory_kb(server))
+            streams, deliveries, created, errors, connect_seconds = asyncio.run(self.run(options, keys, mother))
+            loaded_memory = sum(worker_memory_kb(server))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            EmergencyAlert.objects.filter(mother=mother).delete()
+            Session.objects.filter(session_key__in=keys).delete()
+
+        if not streams:
+            raise CommandError(f'No stream opened; first error: {errors[:1]}')
+        delays = {}
+        for alert_id, seen in deliveries:
+            if alert_id in created:
+                delays.setdefault(alert_id, []).append((seen - created[alert_id]) * 1000)
+        every_delivery = np.array([delay for alert_delays in delays.values() for delay in alert_delays])
+        # Time until the alert had reached the last stream
+        fan_out = np.array([max(alert_delays) for alert_delays in delays.values()])
+
+        self.stdout.write(
+            f'{len(streams):,} streams opened in {connect_seconds:.1f} s, {len(errors):,} errors; '
+            f'worker memory {idle_memory / 1024:,.0f} MB idle, {loaded_memory / 1024:,.0f} MB with the streams '
+            f'({(loaded_memory - idle_memory) / len(streams):.1f} KB per stream)'
+        )
+        self.stdout.write(f"{'':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for label, values in [('delivery to one stream', every_delivery), ('fan-out to all streams', fan_out)]:
+            if len(values):
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                self.stdout.write(f'{label:<26}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{values.max():>10.1f}')
+        expected = len(created) * len(streams)
+        self.stdout.write(f'{len(created)} alerts raised, {len(every_delivery):,} of {expected:,} deliveries seen')
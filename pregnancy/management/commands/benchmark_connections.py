@@ -0,0 +1,112 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from pregnancy.benchmarks import login_session, start_server, wait_until_ready
+from pregnancy.models import User
+
+class Command(BaseCommand):
+    help = (
+        'Load the staff database stats endpoint through gunicorn with and without persistent database '
+        'connections and compare per-request latency and connection reuse'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=2000, help='Timed requests per run')
+        parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+        parser.add_argument('--bind', default='127.0.0.1:8765')
+        parser.add_argument(
+            '--max-age', type=int, action='append', dest='max_ages',
+            help='CONN_MAX_AGE to run with (repeatable); defaults to 0 and DB_CONN_MAX_AGE',
+        )
+        parser.add_argument(
+            '--path', help='Path to load; defaults to the database stats endpoint, the only one that reports reuse',
+        )
+
+    def fetch(self, url):
+        """(latency in ms, JSON body or None)"""
+        request = urllib.request.Request(url, headers={'Cookie': f'{settings.SESSION_COOKIE_NAME}={self.session_key}'})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                body = response.read()
+        except urllib.error.URLError as exc:
+            raise CommandError(f'Request to {url} failed: {exc}')
+        elapsed = (time.perf_counter() - started) * 1000
+        try:
+            return elapsed, json.loads(body)
+        except ValueError:
+            return elapsed, None
+
+    def run(self, options, max_age, url):
+        server = start_server(options['bind'], options['workers'], DB_CONN_MAX_AGE=str(max_age))
+        try:
+            try:
+                wait_until_ready(server, f"http://{options['bind']}{reverse('health_check')}")
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                # Let every worker boot and connect before timing
+                list(pool.map(self.fetch, [url] * options['workers'] * options['concurrency']))
+                started = time.perf_counter()
+                results = list(pool.map(self.fetch, [url] * options['requests']))
+                elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        latencies = np.array([latency for latency, _ in results])
+        # Latest counters reported by each worker process
+        workers = {}
+        for _, body in results:
+            if body and 'database' in body:
+                workers[body['database']['pid']] = body['database']
+        requests = sum(stats['requests'] for stats in workers.values())
+        opened = sum(stats['databases']['default']['opened'] for stats in workers.values())
+        return {
+            'max_age': max_age,
+            'p50': np.percentile(latencies, 50),
+            'p95': np.percentile(latencies, 95),
+            'mean': latencies.mean(),
+            'throughput': len(results) / elapsed,
+            'workers_seen': len(workers),
+            'requests': requests,
+            'opened': opened,
+            'reuse_rate': max(0.0, 1 - opened / requests) if requests else None,
+        }
+
+    def handle(self, *args, **options):
+        max_ages = options['max_ages'] or [0, settings.DB_CONN_MAX_AGE or 600]
+        url = f"http://{options['bind']}{options['path'] or reverse('api_database_stats')}"
+        staff, _ = User.objects.get_or_create(
+            username='bench-connections-staff', defaults={'role': 'admin', 'is_staff': True},
+        )
+        self.session_key = login_session(staff)
+        vendor = settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]
+        pool = getattr(settings, 'DATABASE_POOL', '') or 'none'
+        self.stdout.write(f"{options['workers']} workers, {options['concurrency']} clients, {vendor}, pool: {pool}")
+
+        try:
+            rows = [self.run(options, max_age, url) for max_age in max_ages]
+        finally:
+            Session.objects.filter(session_key=self.session_key).delete()
+        self.stdout.write(
+            f"{'CONN_MAX_AGE':>13}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'req/s':>9}"
+            f"{'workers':>9}{'requests':>10}{'connects':>10}{'reuse':>8}"
+        )
+        for row in rows:
+            reuse = f"{row['reuse_rate'] * 100:.1f}%" if row['reuse_rate'] is not None else '-'
+            self.stdout.write(
+                f"{row['max_age']:>13}{row['p50']:>9.2f}{row['p95']:>9.2f}{row['mean']:>9.2f}{row['throughput']:>9.0f}"
+                f"{row['workers_seen']:>9}{row['requests']:>10}{row['opened']:>10}{reuse:>8}"
+            )
+        if len(rows) > 1:
+            saved = rows[0]['mean'] - rows[-1]['mean']
+            self.stdout.write(f"Persistent connections save {saved:.2f} ms per request on average")
@@ -0,0 +1,92 @@
+import os
+import socket
+import struct
+import tracemalloc
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from pregnancy.models import EducationalContent
+
+# Offset of tcpi_bytes_received in Linux's struct tcp_info (kernel 4.1+)
+TCP_INFO_BYTES_RECEIVED = 128
+TCP_INFO_SIZE = 136
+
+class Command(BaseCommand):
+    help = 'Compare full rows with the card projection for the content listings (seed data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=500)
+        parser.add_argument('--body-kb', type=int, default=50)
+
+    def listings(self, queryset):
+        """The card queries one request to each listing view runs"""
+        active = queryset.filter(is_active=True)
+        return {
+            'home': active.filter(is_featured=True)[:6],
+            'mother_dashboard': active.filter(trimester_target__in=['second', 'all'])[:3],
+            'educational_content': active.order_by('-created_at', '-id')[:21],
+            'content_detail related': active.filter(trimester_target='second')[:3],
+        }
+
+    def bytes_received(self):
+        """Bytes received on the database socket so far, or None when it is not a Linux TCP connection"""
+        if connection.vendor != 'postgresql' or not hasattr(socket, 'TCP_INFO'):
+            return None
+        sock = socket.socket(fileno=os.dup(connection.connection.fileno()))
+        try:
+            info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, TCP_INFO_SIZE)
+        except OSError:
+            # A Unix domain socket
+            return None
+        finally:
+            sock.close()
+        return struct.unpack_from('Q', info, TCP_INFO_BYTES_RECEIVED)[0]
+
+    def measure(self, queryset):
+        """(bytes in the result values, bytes received from the server or None, peak Python memory in bytes)"""
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            before = self.bytes_received()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            after = self.bytes_received()
+            returned = sum(len(str(value).encode()) for row in rows for value in row if value is not None)
+        received = after - before if before is not None else None
+
+        tracemalloc.start()
+        list(queryset._chain())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return returned, received, peak
+
+    def handle(self, *args, **options):
+        body = ('Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 1000)[:options['body_kb'] * 1024]
+        with transaction.atomic():
+            EducationalContent.objects.bulk_create([
+                EducationalContent(
+                    title=f'Benchmark article {i}', slug=f'benchmark-article-{i}', content_type='article',
+                    trimester_target=('first', 'second', 'third', 'all')[i % 4],
+                    summary='A short summary shown on the card.', content=body, is_featured=i % 5 == 0,
+                )
+                for i in range(options['articles'])
+            ], batch_size=100)
+
+            full = self.listings(EducationalContent.objects.all())
+            cards = self.listings(EducationalContent.objects.cards())
+            self.stdout.write(
+                f"{connection.vendor}, {options['articles']} articles with {options['body_kb']} KB bodies; "
+                f"received is TCP bytes from the server (PostgreSQL on Linux only)"
+            )
+            self.stdout.write(
+                f"{'view':<24}{'full values':>13}{'card values':>13}{'full received':>15}{'card received':>15}"
+                f"{'full peak':>12}{'card peak':>12}"
+            )
+            for name in full:
+                full_bytes, full_received, full_peak = self.measure(full[name])
+                card_bytes, card_received, card_peak = self.measure(cards[name])
+                received = [f'{value:,}' if value is not None else '-' for value in (full_received, card_received)]
+                self.stdout.write(
+                    f'{name:<24}{full_bytes:>13,}{card_bytes:>13,}{received[0]:>15}{received[1]:>15}'
+                    f'{full_peak:>12,}{card_peak:>12,}'
+                )
+            # Leave no benchmark rows behind
+            transaction.set_rollback(True)
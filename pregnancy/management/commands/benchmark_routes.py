@@ -0,0 +1,66 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from pregnancy.benchmarks import FULL_SCALE, baseline_from, check_results, run_benchmarks, seed
+from pregnancy.models import User
+
+class Command(BaseCommand):
+    help = 'Time every route in pregnancy/urls.py and fail on query budget overruns or latency regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Fill the database with synthetic data first')
+        parser.add_argument(
+            '--scale', type=float, default=0.01,
+            help=f"Share of the full dataset to seed; 1.0 is {FULL_SCALE['mothers']:,} mothers "
+                 f"and {FULL_SCALE['vitals']:,} vitals records",
+        )
+        parser.add_argument('--force', action='store_true', help='Seed even though the database has users')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per scenario; the median is reported')
+        parser.add_argument('--route', action='append', help='Only benchmark this url name (repeatable)')
+        parser.add_argument('--baseline', help='JSON file of earlier results to compare latency with')
+        parser.add_argument('--save-baseline', help='Write these results to a JSON baseline file')
+        parser.add_argument('--output', help='Write the full results as JSON')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            if User.objects.exists() and not options['force']:
+                raise CommandError('The database already has users; use --force to seed it anyway')
+            counts = seed(options['scale'])
+            self.stdout.write('Seeded ' + ', '.join(f'{count:,} {name}' for name, count in counts.items()))
+
+        baseline = None
+        if options['baseline']:
+            if not os.path.exists(options['baseline']):
+                raise CommandError(f"No baseline file at {options['baseline']}")
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            try:
+                results = run_benchmarks(repeat=options['repeat'], only=options['route'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        self.stdout.write(f"{'route':<28}{'role':<11}{'status':>7}{'median ms':>11}{'queries':>9}{'budget':>8}{'peak KB':>10}")
+        for result in results:
+            if 'median_ms' not in result:
+                note = result.get('skipped') or result.get('error')
+                self.stdout.write(f"{result['route']:<28}{str(result['role'] or '-'):<11}  {note}")
+                continue
+            self.stdout.write(
+                f"{result['route']:<28}{result['role']:<11}{result['status']:>7}{result['median_ms']:>11.1f}"
+                f"{result['queries']:>9}{str(result['budget']):>8}{result['peak_kb']:>10,.0f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as output:
+                json.dump(baseline_from(results), output, indent=2)
+
+        failures = check_results(results, baseline)
+        if failures:
+            raise CommandError(f'{len(failures)} benchmark failure(s):\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All routes within their query budgets'))
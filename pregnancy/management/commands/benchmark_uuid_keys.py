@@ -0,0 +1,70 @@
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from pregnancy.models import uuid7
+
+GENERATORS = {'v4': uuid.uuid4, 'v7': uuid7}
+
+class Command(BaseCommand):
+    help = 'Compare insert throughput into a UUID primary key with random (v4) and time-ordered (v7) keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--report-every', type=int, default=1_000_000, help='Rows between progress lines')
+
+    def create_table(self, cursor, table):
+        key_type = 'uuid' if connection.vendor == 'postgresql' else 'char(32)'
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        # Shaped like pregnancy_vitalsrecord, without the foreign key
+        cursor.execute(
+            f'CREATE TABLE {table} (id {key_type} PRIMARY KEY, mother_id {key_type} NOT NULL, '
+            f'record_date timestamp NOT NULL, weight_kg numeric(5, 2), blood_pressure_systolic integer)'
+        )
+
+    def key(self, value):
+        return value if connection.vendor == 'postgresql' else value.hex
+
+    def index_size(self, cursor, table):
+        if connection.vendor != 'postgresql':
+            return None
+        cursor.execute('SELECT pg_relation_size(%s)', [f'{table}_pkey'])
+        return cursor.fetchone()[0]
+
+    def run(self, name, options):
+        table = f'uuid_benchmark_{name}'
+        generate = GENERATORS[name]
+        mother_id = self.key(uuid.uuid4())
+        now = timezone.now()
+        insert = f'INSERT INTO {table} (id, mother_id, record_date, weight_kg, blood_pressure_systolic) VALUES '
+        with connection.cursor() as cursor:
+            self.create_table(cursor, table)
+            try:
+                inserted, started, window_started, window_rows = 0, time.perf_counter(), time.perf_counter(), 0
+                while inserted < options['rows']:
+                    size = min(options['batch_size'], options['rows'] - inserted)
+                    # One multi-row INSERT per batch; each commits on its own
+                    params = []
+                    for _ in range(size):
+                        params += [self.key(generate()), mother_id, now, 68.5, 118]
+                    cursor.execute(insert + ', '.join(['(%s, %s, %s, %s, %s)'] * size), params)
+                    inserted += size
+                    window_rows += size
+                    if window_rows >= options['report_every'] or inserted == options['rows']:
+                        elapsed = time.perf_counter() - window_started
+                        self.stdout.write(f'{name}: {inserted:>12,} rows, {window_rows / elapsed:>10,.0f} rows/s')
+                        window_started, window_rows = time.perf_counter(), 0
+                total = time.perf_counter() - started
+                return {'name': name, 'seconds': total, 'rate': inserted / total, 'index_bytes': self.index_size(cursor, table)}
+            finally:
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{connection.vendor}, {options['rows']:,} rows per key type")
+        results = [self.run(name, options) for name in GENERATORS]
+        self.stdout.write(f"{'keys':<6}{'seconds':>10}{'rows/s':>12}{'pk index MB':>14}")
+        for result in results:
+            size = f"{result['index_bytes'] / 2 ** 20:.1f}" if result['index_bytes'] is not None else '-'
+            self.stdout.write(f"{result['name']:<6}{result['seconds']:>10.1f}{result['rate']:>12,.0f}{size:>14}")
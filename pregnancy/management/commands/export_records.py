@@ -0,0 +1,54 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from pregnancy.exports import CHUNK_SIZE, EXPORTS, FORMATS, iter_export
+from pregnancy.models import User
+
+def iso_date(value):
+    # parse_date() returns None for a bad format; argparse reports the ValueError
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+class Command(BaseCommand):
+    help = 'Stream vitals, appointments or emergency alerts to a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write; defaults to stdout')
+        parser.add_argument('--from', dest='date_from', type=iso_date, help='First date, YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', type=iso_date, help='Last date, YYYY-MM-DD')
+        parser.add_argument('--clinician', help='Username of the clinician whose patients to export')
+        parser.add_argument('--trimester', choices=['first', 'second', 'third'])
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        clinician = None
+        if options['clinician']:
+            try:
+                clinician = User.objects.get(username=options['clinician'], role='clinician')
+            except User.DoesNotExist:
+                raise CommandError(f"No clinician named {options['clinician']}")
+
+        lines = iter_export(
+            options['name'], options['format'],
+            chunk_size=options['chunk_size'],
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+            clinician=clinician,
+            trimester=options['trimester'],
+        )
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            rows = 0
+            for line in lines:
+                output.write(line)
+                rows += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if options['format'] == 'csv':
+            rows -= 1
+        self.stderr.write(self.style.SUCCESS(f"Exported {rows} {options['name']} rows."))
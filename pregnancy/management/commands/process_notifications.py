@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from pregnancy.notifications import process_batch
+
+class Command(BaseCommand):
+    help = 'Deliver queued SMS and email notifications from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the outbox once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = process_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}.')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from pregnancy.utils import rebuild_unread_counts
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user and per-conversation unread message counters'
+
+    def handle(self, *args, **options):
+        conversations = rebuild_unread_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt unread counters for {conversations} conversations.'
+        ))
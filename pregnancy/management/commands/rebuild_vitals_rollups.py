@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from pregnancy.vitals import rebuild_vitals_rollups
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-day and per-week vitals trend rollups from raw records'
+
+    def handle(self, *args, **options):
+        created = rebuild_vitals_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} vitals rollups.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from pregnancy.utils import rollover_trimesters
+
+class Command(BaseCommand):
+    help = 'Update stored trimesters for profiles that crossed a trimester boundary'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Check every profile instead of only those that crossed a boundary since the last run')
+
+    def handle(self, *args, **options):
+        run = rollover_trimesters(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full' if run.is_full else 'Incremental'} rollover for {run.run_date}: "
+            f"{run.moved_to_first} to first, {run.moved_to_second} to second, "
+            f"{run.moved_to_third} to third trimester in {run.elapsed_seconds:.2f}s."
+        ))
@@ -0,0 +1,17 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from pregnancy.notifications import sweep_appointment_reminders
+
+class Command(BaseCommand):
+    help = 'Queue reminders for upcoming appointments that have not had one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24,
+                            help='Remind appointments starting within this many hours')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        reminded = sweep_appointment_reminders(
+            timedelta(hours=options['hours']), chunk_size=options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Queued reminders for {reminded} appointments.'))
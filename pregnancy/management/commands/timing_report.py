@@ -0,0 +1,54 @@
+import os
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from pregnancy.middleware import read_samples, rotated_path
+
+class Command(BaseCommand):
+    help = 'Summarise recorded request timings per URL name, slowest first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.REQUEST_TIMING_FILE)
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument('--sort', choices=['p95', 'p99', 'total', 'queries'], default='p95')
+        parser.add_argument('--clear', action='store_true', help='Empty the timing file and its backup after reporting')
+
+    def handle(self, *args, **options):
+        if not any(os.path.exists(path) for path in (options['file'], rotated_path(options['file']))):
+            raise CommandError(f"No timings recorded in {options['file']}; set REQUEST_TIMING=1 to record them")
+
+        by_url = {}
+        for sample in read_samples(options['file']):
+            by_url.setdefault(sample['url_name'], []).append(sample)
+
+        rows = []
+        for url_name, samples in by_url.items():
+            total = np.array([s['total_ms'] for s in samples])
+            p50, p95, p99 = np.percentile(total, [50, 95, 99])
+            rows.append({
+                'url_name': url_name,
+                'requests': len(samples),
+                'p50': p50,
+                'p95': p95,
+                'p99': p99,
+                'total': total.sum(),
+                'db_share': sum(s['db_ms'] for s in samples) / max(total.sum(), 1e-9),
+                'queries': np.mean([s['queries'] for s in samples]),
+                'n_plus_one': sum(1 for s in samples if s['duplicate_queries']),
+            })
+        rows.sort(key=lambda row: row[options['sort']], reverse=True)
+
+        self.stdout.write(
+            f"{'url name':<32}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'db %':>7}{'queries':>9}{'N+1':>6}"
+        )
+        for row in rows[:options['top']]:
+            self.stdout.write(
+                f"{row['url_name'][:31]:<32}{row['requests']:>9}{row['p50']:>9.1f}{row['p95']:>9.1f}"
+                f"{row['p99']:>9.1f}{row['db_share'] * 100:>7.0f}{row['queries']:>9.1f}{row['n_plus_one']:>6}"
+            )
+
+        if options['clear']:
+            open(options['file'], 'w').close()
+            if os.path.exists(rotated_path(options['file'])):
+                os.remove(rotated_path(options['file']))
@@ -0,0 +1,176 @@
+# pregnancy/middleware.py
+"""Opt-in per-request timing and query instrumentation.
+
+RequestTimingMiddleware times each request and every SQL query it runs
+(through a connection execute wrapper, so it works with DEBUG off). It flags
+repeated identical queries as likely N+1 patterns and adds a Server-Timing
+header that browser dev tools display. Streamed responses are timed until
+their last chunk is sent. Samples are buffered in memory and appended to
+REQUEST_TIMING_FILE as JSON lines, shared by every worker; once the file
+passes REQUEST_TIMING_MAX_BYTES it is rotated to a single ``.1`` backup.
+The timing_report command aggregates both into p50/p95/p99 per URL name.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+try:
+    import fcntl
+except ImportError:
+    # Windows development servers run a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FLUSH_EVERY_SAMPLES = 200
+FLUSH_EVERY_SECONDS = 10
+DUPLICATE_QUERY_THRESHOLD = 5
+
+class QueryRecorder:
+    """Execute wrapper that times queries and counts identical SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        """Statements run at least DUPLICATE_QUERY_THRESHOLD times in one request"""
+        return {sql: count for sql, count in self.statements.items() if count >= DUPLICATE_QUERY_THRESHOLD}
+
+class TimingStore:
+    """Buffers samples and appends them to the shared timing file"""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.flushed_at = time.monotonic()
+
+    def add(self, sample):
+        with self.lock:
+            self.buffer.append(sample)
+            due = (
+                len(self.buffer) >= FLUSH_EVERY_SAMPLES
+                or time.monotonic() - self.flushed_at >= FLUSH_EVERY_SECONDS
+            )
+            if not due:
+                return
+            samples, self.buffer = self.buffer, []
+            self.flushed_at = time.monotonic()
+        self.write(samples)
+
+    def write(self, samples):
+        lines = ''.join(json.dumps(sample) + '\n' for sample in samples)
+        try:
+            # One append per flush keeps lines from different workers whole
+            with open(self.path, 'a') as timing_file:
+                if fcntl:
+                    fcntl.flock(timing_file, fcntl.LOCK_EX)
+                timing_file.write(lines)
+                timing_file.flush()
+                if timing_file.tell() >= self.max_bytes and self.is_current(timing_file):
+                    os.replace(self.path, rotated_path(self.path))
+        except OSError:
+            logger.exception('Could not write request timings to %s', self.path)
+
+    def is_current(self, timing_file):
+        """False when another worker rotated the file while this one waited for the lock"""
+        try:
+            return os.stat(self.path).st_ino == os.fstat(timing_file.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def flush(self):
+        with self.lock:
+            samples, self.buffer = self.buffer, []
+        if samples:
+            self.write(samples)
+
+def rotated_path(path):
+    return f'{path}.1'
+
+def read_samples(path):
+    """Samples from a timing file and its rotated backup, skipping lines cut short by a crash"""
+    for name in (rotated_path(path), path):
+        if not os.path.exists(name):
+            continue
+        with open(name) as timing_file:
+            for line in timing_file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.store = TimingStore(settings.REQUEST_TIMING_FILE, settings.REQUEST_TIMING_MAX_BYTES)
+        atexit.register(self.store.flush)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connections['default'].execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        # Headers go out before a streamed body is generated, so they can only time the view
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.seconds * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", app;dur={total_ms - db_ms:.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.stream(response.streaming_content, request, response, recorder, started)
+        else:
+            self.record(request, response, recorder, started)
+        return response
+
+    def stream(self, content, request, response, recorder, started):
+        """Yield the streamed body with its queries recorded, then record the whole request"""
+        try:
+            with connections['default'].execute_wrapper(recorder):
+                yield from content
+        finally:
+            self.record(request, response, recorder, started)
+
+    def record(self, request, response, recorder, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.seconds * 1000
+        match = request.resolver_match
+        url_name = match.view_name if match else 'unresolved'
+        duplicates = recorder.duplicates()
+        if duplicates:
+            logger.warning(
+                'Possible N+1 in %s: %s', url_name,
+                '; '.join(f'{count}x {sql[:120]}' for sql, count in duplicates.items()),
+            )
+        self.store.add({
+            'url_name': url_name,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'db_ms': round(db_ms, 2),
+            'queries': recorder.count,
+            'duplicate_queries': sum(duplicates.values()),
+        })
@@ -0,0 +1,351 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:32
+
+from django.conf import settings
+import django.contrib.auth.models
+import django.contrib.auth.validators
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import pregnancy.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='email address')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('role', models.CharField(choices=[('mother', 'Expectant Mother'), ('clinician', 'Healthcare Provider'), ('admin', 'System Administrator')], default='mother', max_length=20)),
+                ('phone_number', models.CharField(blank=True, max_length=15)),
+                ('notification_channel', models.CharField(choices=[('sms', 'SMS'), ('email', 'Email')], default='sms', help_text='Where notifications are sent; the other channel is used if this one has no contact details', max_length=10)),
+                ('emergency_contact_name', models.CharField(blank=True, max_length=100)),
+                ('emergency_contact_phone', models.CharField(blank=True, max_length=15)),
+                ('date_of_birth', models.DateField(blank=True, null=True)),
+                ('profile_picture', models.ImageField(blank=True, null=True, upload_to='profile_pics/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrimesterRollover',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('run_date', models.DateField()),
+                ('is_full', models.BooleanField(default=False)),
+                ('moved_to_first', models.PositiveIntegerField(default=0)),
+                ('moved_to_second', models.PositiveIntegerField(default=0)),
+                ('moved_to_third', models.PositiveIntegerField(default=0)),
+                ('elapsed_seconds', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-run_date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UnreadMessageCount',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_message_count', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RiskFlag',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('rule', models.CharField(choices=[('hypertension', 'Repeated high blood pressure'), ('severe_hypertension', 'Severe high blood pressure'), ('rapid_weight_gain', 'Rapid weight gain'), ('fever', 'Fever'), ('abnormal_fetal_heart_rate', 'Abnormal fetal heart rate')], max_length=30)),
+                ('severity', models.PositiveSmallIntegerField(choices=[(1, 'Warning'), (2, 'Urgent')])),
+                ('occurrences', models.PositiveIntegerField(default=1)),
+                ('last_seen', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mother', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risk_flags', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-severity', '-last_seen'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PregnancyProfile',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('last_menstrual_period', models.DateField()),
+                ('estimated_due_date', models.DateField()),
+                ('current_trimester', models.CharField(choices=[('first', 'First Trimester (1-12 weeks)'), ('second', 'Second Trimester (13-26 weeks)'), ('third', 'Third Trimester (27-40 weeks)')], default='first', max_length=20)),
+                ('blood_type', models.CharField(blank=True, max_length=5)),
+                ('known_allergies', models.TextField(blank=True)),
+                ('pre_existing_conditions', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mother', models.OneToOneField(limit_choices_to={'role': 'mother'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS')], max_length=10)),
+                ('address', models.CharField(max_length=254)),
+                ('subject', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField()),
+                ('dedupe_key', models.CharField(max_length=200, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('recipient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Message',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('subject', models.CharField(max_length=200)),
+                ('content', models.TextField()),
+                ('is_read', models.BooleanField(default=False)),
+                ('is_urgent', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('parent_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='pregnancy.message')),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='received_messages', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sent_messages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EmergencyAlert',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('urgency_level', models.CharField(choices=[('low', 'Low Urgency'), ('medium', 'Medium Urgency'), ('high', 'High Urgency'), ('critical', 'Critical Emergency')], default='medium', max_length=20)),
+                ('symptoms', models.TextField()),
+                ('location', models.CharField(max_length=200)),
+                ('is_responded', models.BooleanField(default=False)),
+                ('response_notes', models.TextField(blank=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('claimed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_alerts', to=settings.AUTH_USER_MODEL)),
+                ('mother', models.ForeignKey(limit_choices_to={'role': 'mother'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('responded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='responded_alerts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EducationalContent',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField(unique=True)),
+                ('content_type', models.CharField(choices=[('article', 'Article'), ('video', 'Video'), ('infographic', 'Infographic'), ('tip', 'Daily Tip'), ('guide', 'Guide')], max_length=20)),
+                ('trimester_target', models.CharField(choices=[('all', 'All Trimesters'), ('first', 'First Trimester'), ('second', 'Second Trimester'), ('third', 'Third Trimester'), ('postpartum', 'Postpartum')], default='all', max_length=20)),
+                ('summary', models.TextField()),
+                ('content', models.TextField()),
+                ('featured_image', models.ImageField(blank=True, null=True, upload_to='content_images/')),
+                ('video_url', models.URLField(blank=True)),
+                ('read_time_minutes', models.IntegerField(default=5)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Educational Content',
+                'verbose_name_plural': 'Educational Content',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConversationUnreadCount',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Appointment',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('appointment_type', models.CharField(choices=[('antenatal', 'Antenatal Checkup'), ('ultrasound', 'Ultrasound Scan'), ('blood_test', 'Blood Test'), ('consultation', 'Doctor Consultation'), ('emergency', 'Emergency Visit'), ('other', 'Other')], default='antenatal', max_length=20)),
+                ('scheduled_date', models.DateTimeField()),
+                ('duration_minutes', models.IntegerField(default=30)),
+                ('location', models.CharField(max_length=200)),
+                ('reason', models.TextField()),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('confirmed', 'Confirmed'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('no_show', 'No Show')], default='scheduled', max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('reminder_sent', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('clinician', models.ForeignKey(limit_choices_to={'role': 'clinician'}, on_delete=django.db.models.deletion.CASCADE, related_name='clinician_appointments', to=settings.AUTH_USER_MODEL)),
+                ('mother', models.ForeignKey(limit_choices_to={'role': 'mother'}, on_delete=django.db.models.deletion.CASCADE, related_name='mother_appointments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['scheduled_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VitalsRollup',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('stats', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mother', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vitals_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'unique_together': {('mother', 'period', 'period_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VitalsRecord',
+            fields=[
+                ('id', models.UUIDField(default=pregnancy.models.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('record_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('weight_kg', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('blood_pressure_systolic', models.IntegerField(blank=True, null=True)),
+                ('blood_pressure_diastolic', models.IntegerField(blank=True, null=True)),
+                ('temperature', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True)),
+                ('fetal_heart_rate', models.IntegerField(blank=True, null=True)),
+                ('symptoms', models.TextField(blank=True)),
+                ('notes', models.TextField(blank=True)),
+                ('client_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('mother', models.ForeignKey(limit_choices_to={'role': 'mother'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Vitals Record',
+                'verbose_name_plural': 'Vitals Records',
+                'ordering': ['-record_date'],
+                'indexes': [models.Index(fields=['mother', '-record_date', '-id'], name='vitals_mother_date_idx'), models.Index(fields=['record_date', 'id'], name='vitals_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vitalsrecord',
+            constraint=models.UniqueConstraint(fields=('mother', 'client_id'), name='vitals_unique_client_id'),
+        ),
+        migrations.AddIndex(
+            model_name='riskflag',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-severity', '-last_seen'], name='riskflag_active_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='riskflag',
+            unique_together={('mother', 'rule')},
+        ),
+        migrations.AddIndex(
+            model_name='pregnancyprofile',
+            index=models.Index(fields=['last_menstrual_period'], name='profile_lmp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='notification_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['receiver', 'is_read'], name='message_receiver_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['receiver', 'sender', '-created_at'], name='message_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', '-created_at'], name='message_sender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emergencyalert',
+            index=models.Index(condition=models.Q(('is_responded', False)), fields=['-created_at'], name='alert_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emergencyalert',
+            index=models.Index(models.Case(models.When(then=models.Value(0), urgency_level='critical'), models.When(then=models.Value(1), urgency_level='high'), models.When(then=models.Value(2), urgency_level='medium'), default=models.Value(3), output_field=models.IntegerField()), models.F('created_at'), condition=models.Q(('claimed_by__isnull', True), ('is_responded', False)), name='alert_triage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emergencyalert',
+            index=models.Index(fields=['updated_at', 'id'], name='alert_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emergencyalert',
+            index=models.Index(fields=['created_at', 'id'], name='alert_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='educationalcontent',
+            index=models.Index(fields=['is_active', 'trimester_target', 'content_type'], name='content_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='educationalcontent',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['-created_at'], name='content_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='educationalcontent',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='content_recent_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversationunreadcount',
+            unique_together={('receiver', 'sender')},
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['clinician', 'status', 'scheduled_date'], name='appt_clinician_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['mother', 'status', 'scheduled_date'], name='appt_mother_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['clinician', 'scheduled_date', 'id'], name='appt_clinician_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['mother', 'scheduled_date', 'id'], name='appt_mother_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['scheduled_date', 'id'], name='appt_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('reminder_sent', False), ('status__in', ['scheduled', 'confirmed'])), fields=['scheduled_date'], name='appt_reminder_due_idx'),
+        ),
+    ]
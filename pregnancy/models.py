@@ -1,11 +1,46 @@
 # pregnancy/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-<<<<<<< HEAD
 from datetime import timedelta
+import secrets
+import threading
+import time
 import uuid
 
+_uuid7_lock = threading.Lock()
+_uuid7_state = {'timestamp_ms': 0, 'sequence': 0}
+
+def uuid7():
+    """Time-ordered UUID (RFC 9562 version 7) for primary keys.
+
+    The leading 48 bits are a Unix millisecond timestamp, so new rows land at
+    the right-hand edge of the primary-key B-tree instead of at random pages.
+    A 12-bit sequence keeps keys generated in the same millisecond ordered.
+    """
+    with _uuid7_lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+        if timestamp_ms <= _uuid7_state['timestamp_ms']:
+            timestamp_ms = _uuid7_state['timestamp_ms']
+            sequence = _uuid7_state['sequence'] + 1
+            if sequence > 0xFFF:
+                timestamp_ms += 1
+                sequence = 0
+        else:
+            sequence = secrets.randbits(11)
+        _uuid7_state.update(timestamp_ms=timestamp_ms, sequence=sequence)
+    
+    value = (
+        (timestamp_ms & 0xFFFFFFFFFFFF) << 80
+        | 0x7 << 76
+        | sequence << 64
+        | 0b10 << 62
+        | secrets.randbits(62)
+    )
+    return uuid.UUID(int=value)
+
 class User(AbstractUser):
     ROLE_CHOICES = [
         ('mother', 'Expectant Mother'),
@@ -13,9 +48,18 @@ class User(AbstractUser):
         ('admin', 'System Administrator'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    NOTIFICATION_CHANNELS = [
+        ('sms', 'SMS'),
+        ('email', 'Email'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='mother')
     phone_number = models.CharField(max_length=15, blank=True)
+    notification_channel = models.CharField(
+        max_length=10, choices=NOTIFICATION_CHANNELS, default='sms',
+        help_text='Where notifications are sent; the other channel is used if this one has no contact details',
+    )
     emergency_contact_name = models.CharField(max_length=100, blank=True)
     emergency_contact_phone = models.CharField(max_length=15, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
@@ -29,6 +73,74 @@ class User(AbstractUser):
     class Meta:
         ordering = ['-created_at']
 
+# First gestational week of each trimester after the first
+SECOND_TRIMESTER_WEEK = 13
+THIRD_TRIMESTER_WEEK = 27
+
+def trimester_for_week(week):
+    if week < SECOND_TRIMESTER_WEEK:
+        return 'first'
+    elif week < THIRD_TRIMESTER_WEEK:
+        return 'second'
+    return 'third'
+
+class DaysSince(models.Func):
+    """Whole days from a date column to ``today``, computed by the database"""
+    output_field = models.IntegerField()
+    
+    def __init__(self, expression, today, **extra):
+        super().__init__(models.Value(today, output_field=models.DateField()), expression, **extra)
+    
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='DATEDIFF(%(expressions)s)', **extra_context)
+    
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(%(expressions)s)', arg_joiner=' - ', **extra_context)
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+class PregnancyProfileQuerySet(models.QuerySet):
+    def with_gestation(self, today=None):
+        """Annotate days_pregnant, weeks_pregnant and trimester as of ``today``"""
+        today = today or timezone.localdate()
+        return self.annotate(
+            days_pregnant=DaysSince('last_menstrual_period', today),
+            weeks_pregnant=models.ExpressionWrapper(
+                DaysSince('last_menstrual_period', today) / 7, output_field=models.IntegerField()
+            ),
+            trimester=models.Case(
+                models.When(
+                    last_menstrual_period__gt=today - timedelta(weeks=SECOND_TRIMESTER_WEEK),
+                    then=models.Value('first'),
+                ),
+                models.When(
+                    last_menstrual_period__gt=today - timedelta(weeks=THIRD_TRIMESTER_WEEK),
+                    then=models.Value('second'),
+                ),
+                default=models.Value('third'),
+                output_field=models.CharField(),
+            ),
+        )
+    
+    def in_trimester(self, trimester, today=None):
+        """Cohort filter as an indexed range on last_menstrual_period"""
+        today = today or timezone.localdate()
+        second_start = today - timedelta(weeks=SECOND_TRIMESTER_WEEK)
+        third_start = today - timedelta(weeks=THIRD_TRIMESTER_WEEK)
+        if trimester == 'first':
+            return self.filter(last_menstrual_period__gt=second_start)
+        elif trimester == 'second':
+            return self.filter(last_menstrual_period__gt=third_start, last_menstrual_period__lte=second_start)
+        elif trimester == 'third':
+            return self.filter(last_menstrual_period__lte=third_start)
+        raise ValueError(f"Unknown trimester: {trimester}")
+
 class PregnancyProfile(models.Model):
     TRIMESTER_CHOICES = [
         ('first', 'First Trimester (1-12 weeks)'),
@@ -36,7 +148,7 @@ class PregnancyProfile(models.Model):
         ('third', 'Third Trimester (27-40 weeks)'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     mother = models.OneToOneField(User, on_delete=models.CASCADE, limit_choices_to={'role': 'mother'})
     last_menstrual_period = models.DateField()
     estimated_due_date = models.DateField()
@@ -47,20 +159,22 @@ class PregnancyProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PregnancyProfileQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_menstrual_period'], name='profile_lmp_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
         # Calculate due date if not provided (40 weeks from LMP)
         if not self.estimated_due_date and self.last_menstrual_period:
             self.estimated_due_date = self.last_menstrual_period + timedelta(weeks=40)
         
-        # Update current trimester based on weeks pregnant
+        # Kept for compatibility only; use get_current_trimester() or
+        # PregnancyProfile.objects.with_gestation() for an up-to-date value
         if self.last_menstrual_period:
-            weeks_pregnant = (timezone.now().date() - self.last_menstrual_period).days // 7
-            if weeks_pregnant < 13:
-                self.current_trimester = 'first'
-            elif weeks_pregnant < 27:
-                self.current_trimester = 'second'
-            else:
-                self.current_trimester = 'third'
+            self.current_trimester = self.get_current_trimester()
         
         super().save(*args, **kwargs)
     
@@ -70,6 +184,9 @@ class PregnancyProfile(models.Model):
             return days_pregnant // 7
         return 0
     
+    def get_current_trimester(self):
+        return trimester_for_week(self.get_weeks_pregnant())
+    
     def get_days_until_due(self):
         if self.estimated_due_date:
             days_until = (self.estimated_due_date - timezone.now().date()).days
@@ -79,8 +196,24 @@ class PregnancyProfile(models.Model):
     def __str__(self):
         return f"Pregnancy Profile - {self.mother.get_full_name()}"
 
+class TrimesterRollover(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    run_date = models.DateField()
+    is_full = models.BooleanField(default=False)
+    moved_to_first = models.PositiveIntegerField(default=0)
+    moved_to_second = models.PositiveIntegerField(default=0)
+    moved_to_third = models.PositiveIntegerField(default=0)
+    elapsed_seconds = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-run_date', '-created_at']
+    
+    def __str__(self):
+        return f"Trimester rollover - {self.run_date}"
+
 class VitalsRecord(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     mother = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'mother'})
     record_date = models.DateTimeField(default=timezone.now)
     weight_kg = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
@@ -90,16 +223,96 @@ class VitalsRecord(models.Model):
     fetal_heart_rate = models.IntegerField(null=True, blank=True)
     symptoms = models.TextField(blank=True)
     notes = models.TextField(blank=True)
+    # Set by devices and offline clients so a retried upload is not stored twice
+    client_id = models.UUIDField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-record_date']
         verbose_name = 'Vitals Record'
         verbose_name_plural = 'Vitals Records'
+        indexes = [
+            models.Index(fields=['mother', '-record_date', '-id'], name='vitals_mother_date_idx'),
+            # Exports page through every mother's records in (record_date, id) order
+            models.Index(fields=['record_date', 'id'], name='vitals_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['mother', 'client_id'], name='vitals_unique_client_id'),
+        ]
+    
+    METRICS = [
+        'weight_kg', 'blood_pressure_systolic', 'blood_pressure_diastolic',
+        'temperature', 'fetal_heart_rate',
+    ]
+    
+    # field: (minimum, maximum, error message); shared by the form and bulk ingestion
+    VALID_RANGES = {
+        'blood_pressure_systolic': (50, 250, "Systolic blood pressure must be between 50 and 250."),
+        'blood_pressure_diastolic': (30, 150, "Diastolic blood pressure must be between 30 and 150."),
+        'weight_kg': (30, 200, "Weight must be between 30 and 200 kg."),
+        'temperature': (35, 42, "Temperature must be between 35°C and 42°C."),
+        'fetal_heart_rate': (60, 200, "Fetal heart rate must be between 60 and 200 BPM."),
+    }
     
     def __str__(self):
         return f"Vitals - {self.mother.username} - {self.record_date.strftime('%Y-%m-%d')}"
 
+class VitalsRollup(models.Model):
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    mother = models.ForeignKey(User, on_delete=models.CASCADE, related_name='vitals_rollups')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    record_count = models.PositiveIntegerField(default=0)
+    # {metric: {'min': ..., 'max': ..., 'mean': ..., 'sum': ..., 'count': ...}}
+    stats = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['period_start']
+        unique_together = ['mother', 'period', 'period_start']
+    
+    def __str__(self):
+        return f"Vitals {self.period} - {self.mother.username} - {self.period_start}"
+
+class RiskFlag(models.Model):
+    RULE_CHOICES = [
+        ('hypertension', 'Repeated high blood pressure'),
+        ('severe_hypertension', 'Severe high blood pressure'),
+        ('rapid_weight_gain', 'Rapid weight gain'),
+        ('fever', 'Fever'),
+        ('abnormal_fetal_heart_rate', 'Abnormal fetal heart rate'),
+    ]
+    
+    SEVERITY_CHOICES = [
+        (1, 'Warning'),
+        (2, 'Urgent'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    mother = models.ForeignKey(User, on_delete=models.CASCADE, related_name='risk_flags')
+    rule = models.CharField(max_length=30, choices=RULE_CHOICES)
+    severity = models.PositiveSmallIntegerField(choices=SEVERITY_CHOICES)
+    occurrences = models.PositiveIntegerField(default=1)
+    last_seen = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-severity', '-last_seen']
+        unique_together = ['mother', 'rule']
+        indexes = [
+            models.Index(fields=['-severity', '-last_seen'], condition=models.Q(is_active=True), name='riskflag_active_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_rule_display()} - {self.mother.username}"
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ('scheduled', 'Scheduled'),
@@ -118,7 +331,7 @@ class Appointment(models.Model):
         ('other', 'Other'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     mother = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mother_appointments', limit_choices_to={'role': 'mother'})
     clinician = models.ForeignKey(User, on_delete=models.CASCADE, related_name='clinician_appointments', limit_choices_to={'role': 'clinician'})
     appointment_type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='antenatal')
@@ -134,10 +347,49 @@ class Appointment(models.Model):
     
     class Meta:
         ordering = ['scheduled_date']
+        indexes = [
+            models.Index(fields=['clinician', 'status', 'scheduled_date'], name='appt_clinician_status_idx'),
+            models.Index(fields=['mother', 'status', 'scheduled_date'], name='appt_mother_status_idx'),
+            models.Index(fields=['clinician', 'scheduled_date', 'id'], name='appt_clinician_date_idx'),
+            models.Index(fields=['mother', 'scheduled_date', 'id'], name='appt_mother_date_idx'),
+            models.Index(fields=['scheduled_date', 'id'], name='appt_date_idx'),
+            models.Index(
+                fields=['scheduled_date'],
+                condition=models.Q(reminder_sent=False, status__in=['scheduled', 'confirmed']),
+                name='appt_reminder_due_idx',
+            ),
+        ]
+    
+    def reminder_notifications(self):
+        local_time = timezone.localtime(self.scheduled_date).strftime('%d %b %Y at %H:%M')
+        return Notification.objects.build_for_user(
+            self.mother,
+            dedupe_key=f'appointment-reminder:{self.id}',
+            subject='Appointment reminder',
+            body=f"Reminder: {self.get_appointment_type_display()} on {local_time} at {self.location}.",
+        )
+    
+    def send_reminder(self):
+        """Queue SMS/email reminders; the notification worker delivers them"""
+        with transaction.atomic():
+            Notification.objects.enqueue(self.reminder_notifications())
+            Appointment.objects.filter(pk=self.pk).update(reminder_sent=True)
+        self.reminder_sent = True
     
     def __str__(self):
         return f"{self.get_appointment_type_display()} - {self.mother.username} - {self.scheduled_date.strftime('%Y-%m-%d %H:%M')}"
 
+class EducationalContentQuerySet(models.QuerySet):
+    # Everything a content card shows; article bodies can be tens of KB each
+    CARD_FIELDS = [
+        'id', 'title', 'slug', 'summary', 'featured_image', 'content_type', 'trimester_target',
+        'read_time_minutes', 'is_featured', 'created_at',
+    ]
+    
+    def cards(self):
+        """Projection for listings; use the full row only on the detail page"""
+        return self.only(*self.CARD_FIELDS)
+
 class EducationalContent(models.Model):
     CONTENT_TYPE_CHOICES = [
         ('article', 'Article'),
@@ -145,100 +397,6 @@ class EducationalContent(models.Model):
         ('infographic', 'Infographic'),
         ('tip', 'Daily Tip'),
         ('guide', 'Guide'),
-=======
-
-class User(AbstractUser):
-    ROLE_CHOICES = [
-        ('mother', 'Mother'),
-        ('clinician', 'Clinician'),
-        ('admin', 'Administrator'),
-    ]
-    
-    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='mother')
-    phone = models.CharField(max_length=15, blank=True)
-    emergency_contact = models.CharField(max_length=100, blank=True)
-    
-    def __str__(self):
-        return f"{self.username} ({self.role})"
-
-class PregnancyRecord(models.Model):
-    TRIMESTER_CHOICES = [
-        ('first', 'First Trimester'),
-        ('second', 'Second Trimester'),
-        ('third', 'Third Trimester'),
-    ]
-    
-    mother = models.OneToOneField(User, on_delete=models.CASCADE, limit_choices_to={'role': 'mother'})
-    pregnancy_start_date = models.DateField()
-    due_date = models.DateField()
-    current_trimester = models.CharField(max_length=20, choices=TRIMESTER_CHOICES, default='first')
-    status = models.CharField(max_length=20, default='active')
-    
-    def update_progress(self):
-        weeks_pregnant = (timezone.now().date() - self.pregnancy_start_date).days // 7
-        if weeks_pregnant < 13:
-            self.current_trimester = 'first'
-        elif weeks_pregnant < 27:
-            self.current_trimester = 'second'
-        else:
-            self.current_trimester = 'third'
-        self.save()
-    
-    def __str__(self):
-        return f"Pregnancy record for {self.mother.username}"
-
-class VitalsLog(models.Model):
-    mother = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'mother'})
-    date_recorded = models.DateTimeField(auto_now_add=True)
-    weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
-    blood_pressure_systolic = models.IntegerField(null=True, blank=True)
-    blood_pressure_diastolic = models.IntegerField(null=True, blank=True)
-    symptoms = models.TextField(blank=True)
-    notes = models.TextField(blank=True)
-    
-    class Meta:
-        ordering = ['-date_recorded']
-
-class Appointment(models.Model):
-    STATUS_CHOICES = [
-        ('scheduled', 'Scheduled'),
-        ('completed', 'Completed'),
-        ('cancelled', 'Cancelled'),
-    ]
-    
-    mother = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mother_appointments', limit_choices_to={'role': 'mother'})
-    clinician = models.ForeignKey(User, on_delete=models.CASCADE, related_name='clinician_appointments', limit_choices_to={'role': 'clinician'})
-    date_time = models.DateTimeField()
-    location = models.CharField(max_length=200)
-    reason = models.TextField()
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
-    
-    def send_reminder(self):
-        # Implementation for SMS/email reminders
-        pass
-    
-    def __str__(self):
-        return f"Appointment for {self.mother.username} with {self.clinician.username}"
-
-class Message(models.Model):
-    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
-    receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages')
-    timestamp = models.DateTimeField(auto_now_add=True)
-    content = models.TextField()
-    is_read = models.BooleanField(default=False)
-    
-    class Meta:
-        ordering = ['-timestamp']
-    
-    def __str__(self):
-        return f"Message from {self.sender.username} to {self.receiver.username}"
-
-class EducationalContent(models.Model):
-    CONTENT_TYPES = [
-        ('article', 'Article'),
-        ('video', 'Video'),
-        ('tip', 'Tip'),
->>>>>>> 3412d5bb19548ae5633638dd73829ab08f680517
     ]
     
     TRIMESTER_TARGET = [
@@ -246,11 +404,10 @@ class EducationalContent(models.Model):
         ('first', 'First Trimester'),
         ('second', 'Second Trimester'),
         ('third', 'Third Trimester'),
-<<<<<<< HEAD
         ('postpartum', 'Postpartum'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     content_type = models.CharField(max_length=20, choices=CONTENT_TYPE_CHOICES)
@@ -263,19 +420,53 @@ class EducationalContent(models.Model):
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    # Weighted title/summary/content tsvector on PostgreSQL; maintained by pregnancy.search
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = EducationalContentQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Educational Content'
         verbose_name_plural = 'Educational Content'
+        indexes = [
+            models.Index(fields=['is_active', 'trimester_target', 'content_type'], name='content_listing_idx'),
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True, is_featured=True), name='content_featured_idx'),
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_active=True), name='content_recent_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
+class MessageQuerySet(models.QuerySet):
+    def involving(self, user):
+        return self.filter(models.Q(sender=user) | models.Q(receiver=user))
+    
+    def conversations(self, user):
+        """One row per conversation partner, newest conversation first"""
+        partner = models.Case(
+            models.When(sender=user, then=models.F('receiver')),
+            default=models.F('sender'),
+            output_field=models.UUIDField(),
+        )
+        latest = Message.objects.filter(
+            models.Q(sender=user, receiver=models.OuterRef('partner')) |
+            models.Q(sender=models.OuterRef('partner'), receiver=user)
+        ).order_by('-created_at').values('id')[:1]
+        unread = ConversationUnreadCount.objects.filter(
+            sender=models.OuterRef('partner'), receiver=user
+        ).values('unread_count')[:1]
+        
+        return self.involving(user).annotate(partner=partner).values('partner').annotate(
+            last_message_at=models.Max('created_at'),
+            last_message_id=models.Subquery(latest, output_field=models.UUIDField()),
+            unread_count=Coalesce(models.Subquery(unread), 0),
+        ).order_by('-last_message_at')
+
 class Message(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages')
     subject = models.CharField(max_length=200)
@@ -285,12 +476,73 @@ class Message(models.Model):
     parent_message = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = MessageQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['receiver', 'is_read'], name='message_receiver_read_idx'),
+            models.Index(fields=['receiver', 'sender', '-created_at'], name='message_thread_idx'),
+            models.Index(fields=['sender', '-created_at'], name='message_sender_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Keep the unread counters (updated by signals) in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Message: {self.subject} - {self.sender.username} to {self.receiver.username}"
 
+class UnreadMessageCount(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_message_count')
+    unread_count = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.unread_count} unread"
+
+class ConversationUnreadCount(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    unread_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['receiver', 'sender']
+    
+    def __str__(self):
+        return f"{self.sender.username} to {self.receiver.username} - {self.unread_count} unread"
+
+# Triage order: lower rank is seen first
+ALERT_URGENCY_RANK = models.Case(
+    models.When(urgency_level='critical', then=models.Value(0)),
+    models.When(urgency_level='high', then=models.Value(1)),
+    models.When(urgency_level='medium', then=models.Value(2)),
+    default=models.Value(3),
+    output_field=models.IntegerField(),
+)
+
+class EmergencyAlertQuerySet(models.QuerySet):
+    def open(self):
+        return self.filter(is_responded=False, claimed_by__isnull=True)
+    
+    def triage(self):
+        """Open alerts, most severe first and oldest first within a level"""
+        return self.open().annotate(urgency_rank=ALERT_URGENCY_RANK).order_by('urgency_rank', 'created_at')
+    
+    def for_clinician(self, clinician):
+        """Alerts raised by mothers who have appointments with this clinician"""
+        patients = Appointment.objects.filter(clinician=clinician).values('mother')
+        return self.filter(mother__in=patients)
+    
+    def claim(self, alert_id, clinician):
+        """Atomically assign an open alert; False if someone else got it first"""
+        return bool(self.open().filter(pk=alert_id).update(
+            claimed_by=clinician,
+            claimed_at=timezone.now(),
+            updated_at=timezone.now(),
+        ))
+
 class EmergencyAlert(models.Model):
     URGENCY_LEVELS = [
         ('low', 'Low Urgency'),
@@ -299,7 +551,7 @@ class EmergencyAlert(models.Model):
         ('critical', 'Critical Emergency'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     mother = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'mother'})
     urgency_level = models.CharField(max_length=20, choices=URGENCY_LEVELS, default='medium')
     symptoms = models.TextField()
@@ -307,25 +559,88 @@ class EmergencyAlert(models.Model):
     is_responded = models.BooleanField(default=False)
     responded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='responded_alerts')
     response_notes = models.TextField(blank=True)
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_alerts')
+    claimed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = EmergencyAlertQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=models.Q(is_responded=False), name='alert_open_idx'),
+            models.Index(
+                ALERT_URGENCY_RANK, 'created_at',
+                condition=models.Q(is_responded=False, claimed_by__isnull=True),
+                name='alert_triage_idx',
+            ),
+            # Clinician dashboards poll for changes in (updated_at, id) order
+            models.Index(fields=['updated_at', 'id'], name='alert_updated_idx'),
+            models.Index(fields=['created_at', 'id'], name='alert_created_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Notifications queued by signals commit together with the alert
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Emergency Alert - {self.mother.username} - {self.get_urgency_level_display()}"
-=======
+
+class NotificationQuerySet(models.QuerySet):
+    def due(self):
+        return self.filter(status='pending', next_attempt_at__lte=timezone.now())
+    
+    def build_for_user(self, user, dedupe_key, subject, body):
+        """An unsaved notification on the user's preferred channel, falling back to the other one"""
+        addresses = {'email': user.email, 'sms': user.phone_number}
+        channels = sorted(addresses, key=lambda channel: channel != user.notification_channel)
+        for channel in channels:
+            if addresses[channel]:
+                return [self.model(
+                    channel=channel, recipient=user, address=addresses[channel],
+                    subject=subject, body=body, dedupe_key=f'{dedupe_key}:{channel}',
+                )]
+        return []
+    
+    def enqueue(self, notifications):
+        """Insert into the outbox in the caller's transaction, skipping duplicate keys"""
+        return self.bulk_create(notifications, ignore_conflicts=True)
+
+class Notification(models.Model):
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
     ]
     
-    title = models.CharField(max_length=200)
-    content_type = models.CharField(max_length=20, choices=CONTENT_TYPES)
-    trimester_target = models.CharField(max_length=20, choices=TRIMESTER_TARGET, default='all')
-    content = models.TextField()
-    image = models.ImageField(upload_to='education_images/', blank=True, null=True)
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications')
+    address = models.CharField(max_length=254)
+    subject = models.CharField(max_length=200, blank=True)
+    body = models.TextField()
+    dedupe_key = models.CharField(max_length=200, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    is_active = models.BooleanField(default=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    objects = NotificationQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='pending'), name='notification_due_idx'),
+        ]
     
     def __str__(self):
-        return self.title
->>>>>>> 3412d5bb19548ae5633638dd73829ab08f680517
+        return f"{self.get_channel_display()} to {self.address} - {self.get_status_display()}"
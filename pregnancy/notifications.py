@@ -0,0 +1,159 @@
+# pregnancy/notifications.py
+"""Delivery side of the notification outbox.
+
+Views and signals only insert Notification rows inside their own
+transaction. The process_notifications worker claims due rows in batches,
+hands each channel's batch to its backend, and reschedules failures with
+exponential backoff, so request latency never depends on the provider.
+
+A backend's send_batch() returns a dict mapping each notification it could
+not deliver to the error; raising means none of the batch was delivered.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core import mail
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Appointment, Notification
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+CLAIM_LEASE_SECONDS = 5 * 60
+
+class EmailBackend:
+    """Sends a batch of emails over a single connection of the configured EMAIL_BACKEND"""
+
+    def send_batch(self, notifications):
+        failures = {}
+        with mail.get_connection() as connection:
+            for notification in notifications:
+                message = mail.EmailMessage(
+                    notification.subject, notification.body, settings.DEFAULT_FROM_EMAIL, [notification.address],
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as exc:
+                    failures[notification] = exc
+        return failures
+
+class ConsoleSMSBackend:
+    """Logs SMS messages instead of sending them, for development"""
+
+    def send_batch(self, notifications):
+        for notification in notifications:
+            logger.info('SMS to %s: %s', notification.address, notification.body)
+        return {}
+
+class MemoryBackend:
+    """Fake sink for tests; delivered notifications collect in ``MemoryBackend.outbox``.
+
+    Notifications addressed to an address in ``MemoryBackend.failing`` fail.
+    """
+
+    outbox = []
+    failing = set()
+
+    def send_batch(self, notifications):
+        failures = {}
+        for notification in notifications:
+            if notification.address in self.failing:
+                failures[notification] = ConnectionError(f'{notification.address} is unreachable')
+            else:
+                self.outbox.append(notification)
+        return failures
+
+def get_backend(channel):
+    return import_string(settings.NOTIFICATION_BACKENDS[channel])()
+
+def backoff_delay(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+def claim_batch(batch_size):
+    """Lease due notifications so concurrent workers never pick the same rows"""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            Notification.objects.due()
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        for notification in batch:
+            notification.attempts += 1
+            # If the worker dies mid-send the row becomes due again after the lease
+            notification.next_attempt_at = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+        Notification.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+def process_batch(batch_size=100):
+    """Deliver one batch of due notifications; returns (sent, failed) counts"""
+    batch = claim_batch(batch_size)
+    by_channel = {}
+    for notification in batch:
+        by_channel.setdefault(notification.channel, []).append(notification)
+
+    sent, failed = [], []
+    for channel, notifications in by_channel.items():
+        try:
+            failures = get_backend(channel).send_batch(notifications)
+        except Exception as exc:
+            # Nothing in the batch went out, e.g. the provider was unreachable
+            logger.exception('Sending %d %s notifications failed', len(notifications), channel)
+            failures = dict.fromkeys(notifications, exc)
+        for notification in notifications:
+            if notification in failures:
+                notification.last_error = str(failures[notification])
+                failed.append(notification)
+            else:
+                sent.append(notification)
+        if failures and len(failures) < len(notifications):
+            logger.warning('%d of %d %s notifications failed', len(failures), len(notifications), channel)
+
+    now = timezone.now()
+    if sent:
+        Notification.objects.filter(pk__in=[n.pk for n in sent]).update(
+            status='sent', sent_at=now, last_error=''
+        )
+    for notification in failed:
+        if notification.attempts >= MAX_ATTEMPTS:
+            notification.status = 'failed'
+        notification.next_attempt_at = now + backoff_delay(notification.attempts)
+    Notification.objects.bulk_update(failed, ['status', 'next_attempt_at', 'last_error'])
+
+    return len(sent), len(failed)
+
+def sweep_appointment_reminders(window, chunk_size=1000):
+    """Queue reminders for appointments starting within ``window``.
+
+    Chunks are claimed with SKIP LOCKED, so several sweepers can run at once
+    without sending the same reminder twice. Returns the number of
+    appointments reminded.
+    """
+    total = 0
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            chunk = list(
+                Appointment.objects.filter(
+                    reminder_sent=False,
+                    status__in=['scheduled', 'confirmed'],
+                    scheduled_date__gte=now,
+                    scheduled_date__lt=now + window,
+                )
+                .select_related('mother')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('scheduled_date')[:chunk_size]
+            )
+            if not chunk:
+                return total
+
+            notifications = []
+            for appointment in chunk:
+                notifications += appointment.reminder_notifications()
+            Notification.objects.enqueue(notifications)
+            Appointment.objects.filter(pk__in=[a.pk for a in chunk]).update(reminder_sent=True)
+        total += len(chunk)
@@ -0,0 +1,102 @@
+# pregnancy/pagination.py
+"""Keyset (cursor) pagination for long, append-mostly listings.
+
+A page is fetched with a range condition on (key, id) that continues from the
+last row of the previous page instead of an OFFSET, so page 1000 is one
+index range scan just like page 1 and rows inserted meanwhile never shift
+items between pages. Cursors are opaque URL-safe strings.
+"""
+import base64
+import json
+import uuid
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(value, pk, backwards=False):
+    payload = json.dumps([value.isoformat(), str(pk), backwards])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """(key value, pk, backwards) from a cursor made by encode_cursor()"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk, backwards = json.loads(payload)
+        value = parse_datetime(value)
+        pk = uuid.UUID(pk)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    if value is None:
+        raise InvalidCursor(cursor)
+    return value, pk, bool(backwards)
+
+def _field(row, name):
+    # Pages can be built from model instances or values() dicts
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+def parse_per_page(value, default=DEFAULT_PER_PAGE):
+    try:
+        return max(1, min(int(value), MAX_PER_PAGE))
+    except (TypeError, ValueError):
+        return default
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+def keyset_page(queryset, key, cursor=None, per_page=DEFAULT_PER_PAGE, descending=False):
+    """One page of ``queryset`` ordered by (``key``, id).
+
+    ``queryset`` may be a values() queryset as long as it includes ``key``
+    and ``id``. Raises InvalidCursor for a malformed cursor.
+    """
+    value, pk, backwards = decode_cursor(cursor) if cursor else (None, None, False)
+
+    # Walking back reads the rows before the cursor in reverse and flips them
+    forward = descending == backwards
+    range_lookup, tied_lookup = ('gte', 'lte') if forward else ('lte', 'gte')
+    prefix = '' if forward else '-'
+    page = queryset.order_by(f'{prefix}{key}', f'{prefix}pk')
+    if cursor:
+        # key >= value as the index range, then skip rows tied on the key up to the cursor
+        page = page.filter(**{f'{key}__{range_lookup}': value}).exclude(
+            **{key: value, f'pk__{tied_lookup}': pk}
+        )
+
+    rows = list(page[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        if backwards:
+            # Everything before the client's page has gone, so that page is now the first one
+            return keyset_page(queryset, key, per_page=per_page, descending=descending)
+        return KeysetPage(rows, None, None)
+
+    first, last = rows[0], rows[-1]
+    more_after = has_more if not backwards else True
+    more_before = has_more if backwards else bool(cursor)
+    return KeysetPage(
+        rows,
+        encode_cursor(_field(last, key), _field(last, 'id')) if more_after else None,
+        encode_cursor(_field(first, key), _field(first, 'id'), backwards=True) if more_before else None,
+    )
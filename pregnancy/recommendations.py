@@ -0,0 +1,271 @@
+# pregnancy/recommendations.py
+"""In-memory content recommendations from TF-IDF similarity.
+
+Every active EducationalContent is turned into an L2-normalised TF-IDF
+vector over its title, summary and body (title terms count most). At build
+time each article gets its most similar neighbours, and each gestational
+week gets the articles closest to that week's development notes, so a
+request only re-ranks a short precomputed list by the reader's week.
+
+Each worker process holds its own index. Saves and deletes in the process
+update it in place through signals. Every REFRESH_SECONDS the index checks a
+cheap signature of the table and, if another process changed it, builds a
+new index while requests keep using the old one, then swaps it in.
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter
+import numpy as np
+from django.db.models import Count, Max
+from .models import EducationalContent, trimester_for_week
+from .week_content import FIRST_WEEK, LAST_WEEK, WEEK_CONTENT
+
+CANDIDATES = 20
+MAX_TERMS = 64
+REFRESH_SECONDS = 300
+
+# Term counts are multiplied by the weight of the field they appear in
+FIELD_WEIGHTS = {'title': 3, 'summary': 2, 'content': 1}
+
+STOP_WORDS = frozenset('''
+    about after also and are been before being but can could does during each for from had has have
+    her here his how into its may more most not of one only other our out over she should some such
+    than that the their them then there these they this those through too very was were what when
+    where which while who will with would you your
+'''.split())
+
+# Share of an article's score kept when it targets another trimester than the reader's
+TRIMESTER_WEIGHTS = {'same': 1.0, 'all': 0.8, 'other': 0.4}
+
+def tokenize(text):
+    return [word for word in re.findall(r'[a-z]{3,}', text.lower()) if word not in STOP_WORDS]
+
+def term_counts(fields):
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for word in tokenize(fields.get(field) or ''):
+            counts[word] += weight
+    return counts
+
+def week_text(week):
+    info = WEEK_CONTENT[week]
+    parts = list(info['developments']) + [info['baby_size']]
+    parts += [f"{m['title']} {m['description']}" for m in info['milestones']]
+    return ' '.join(parts)
+
+def trimester_weight(trimester_target, week):
+    if week is None:
+        return 1.0
+    if trimester_target == 'all':
+        return TRIMESTER_WEIGHTS['all']
+    if trimester_target == 'postpartum':
+        return TRIMESTER_WEIGHTS['same'] if week >= LAST_WEEK - 2 else TRIMESTER_WEIGHTS['other']
+    return TRIMESTER_WEIGHTS['same' if trimester_target == trimester_for_week(week) else 'other']
+
+class ContentIndex:
+    def __init__(self, articles=()):
+        """Build from (id, trimester_target, title, summary, content) tuples"""
+        self.ids = []
+        self.targets = []
+        self.counts = []
+        for content_id, trimester_target, title, summary, content in articles:
+            self.ids.append(content_id)
+            self.targets.append(trimester_target)
+            self.counts.append(term_counts({'title': title, 'summary': summary, 'content': content}))
+        self.position = {content_id: i for i, content_id in enumerate(self.ids)}
+        # Slots of removed articles, reused before the arrays grow
+        self.free_slots = []
+
+        self.document_frequency = Counter()
+        for counts in self.counts:
+            self.document_frequency.update(counts.keys())
+        self.vectors = [self.vectorize(counts) for counts in self.counts]
+        self.build_postings()
+
+        self.related = {content_id: self.top(self.vectors[i], exclude=i) for i, content_id in enumerate(self.ids)}
+        self.week_vectors = {
+            week: self.vectorize(term_counts({'content': week_text(week)}), limit=None)
+            for week in range(FIRST_WEEK, LAST_WEEK + 1)
+        }
+        self.for_week = {week: self.top(vector) for week, vector in self.week_vectors.items()}
+
+    def idf(self, term):
+        return math.log((1 + len(self.ids)) / (1 + self.document_frequency[term])) + 1
+
+    def vectorize(self, counts, limit=MAX_TERMS):
+        """{term: weight}, L2 normalised and cut to the ``limit`` strongest terms"""
+        weights = {term: (1 + math.log(count)) * self.idf(term) for term, count in counts.items()}
+        if limit is not None and len(weights) > limit:
+            weights = dict(sorted(weights.items(), key=lambda item: item[1], reverse=True)[:limit])
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {term: weight / norm for term, weight in weights.items()}
+
+    def build_postings(self):
+        """Inverted index of term -> (document positions, weights) arrays"""
+        postings = {}
+        for i, vector in enumerate(self.vectors):
+            for term, weight in vector.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(i)
+                postings[term][1].append(weight)
+        self.postings = {
+            term: (np.array(positions, dtype=np.int64), np.array(weights))
+            for term, (positions, weights) in postings.items()
+        }
+
+    def similarities(self, vector):
+        """Cosine similarity of ``vector`` with every indexed article"""
+        scores = np.zeros(len(self.ids))
+        for term, weight in vector.items():
+            if term in self.postings:
+                positions, weights = self.postings[term]
+                scores[positions] += weight * weights
+        return scores
+
+    def top(self, vector, exclude=None, limit=CANDIDATES):
+        """Best (id, score) pairs for ``vector``, best first"""
+        scores = self.similarities(vector)
+        if exclude is not None:
+            scores[exclude] = 0
+        best = np.flatnonzero(scores > 0)
+        if len(best) > limit:
+            best = best[np.argpartition(scores[best], -limit)[-limit:]]
+        best = best[np.argsort(scores[best])[::-1]]
+        return tuple((self.ids[i], float(scores[i])) for i in best)
+
+    def rank(self, candidates, week, limit, exclude=()):
+        scored = [
+            (content_id, score * trimester_weight(self.targets[self.position[content_id]], week))
+            for content_id, score in candidates
+            if content_id in self.position and content_id not in exclude
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return [content_id for content_id, _ in scored[:limit]]
+
+    def related_to(self, content_id, week=None, limit=3):
+        return self.rank(self.related.get(content_id, ()), week, limit)
+
+    def for_reader(self, week, limit=3, exclude=()):
+        week = min(max(week, FIRST_WEEK), LAST_WEEK)
+        return self.rank(self.for_week[week], week, limit, exclude)
+
+    def update(self, content_id, trimester_target, fields):
+        """Index a new or changed article against the current vocabulary"""
+        # A changed article frees its own slot last, so it gets the same one back
+        self.remove(content_id)
+        counts = term_counts(fields)
+        self.document_frequency.update(counts.keys())
+        vector = self.vectorize(counts)
+
+        if self.free_slots:
+            i = self.free_slots.pop()
+            self.ids[i], self.targets[i], self.counts[i], self.vectors[i] = content_id, trimester_target, counts, vector
+        else:
+            i = len(self.ids)
+            self.ids.append(content_id)
+            self.targets.append(trimester_target)
+            self.counts.append(counts)
+            self.vectors.append(vector)
+        self.position[content_id] = i
+        for term, weight in vector.items():
+            positions, weights = self.postings.get(term, (np.empty(0, dtype=np.int64), np.empty(0)))
+            self.postings[term] = (np.append(positions, i), np.append(weights, weight))
+
+        self.related[content_id] = self.top(vector, exclude=i)
+        # Let the new article into other lists where it beats the weakest entry
+        for other_id, score in self.related[content_id]:
+            self.related[other_id] = self.merge(self.related[other_id], content_id, score)
+        for week, week_vector in self.week_vectors.items():
+            score = sum(weight * vector.get(term, 0) for term, weight in week_vector.items())
+            if score > 0:
+                self.for_week[week] = self.merge(self.for_week[week], content_id, score)
+
+    def merge(self, candidates, content_id, score):
+        merged = [item for item in candidates if item[0] != content_id] + [(content_id, score)]
+        merged.sort(key=lambda item: item[1], reverse=True)
+        return tuple(merged[:CANDIDATES])
+
+    def remove(self, content_id):
+        """Drop an article; its slot scores zero until update() reuses it"""
+        i = self.position.pop(content_id, None)
+        if i is None:
+            return
+        self.document_frequency.subtract(self.counts[i].keys())
+        for term in self.vectors[i]:
+            positions, weights = self.postings[term]
+            keep = positions != i
+            self.postings[term] = (positions[keep], weights[keep])
+        self.counts[i], self.vectors[i] = Counter(), {}
+        self.free_slots.append(i)
+        self.related.pop(content_id, None)
+        for other_id, candidates in self.related.items():
+            self.related[other_id] = tuple(item for item in candidates if item[0] != content_id)
+        for week, candidates in self.for_week.items():
+            self.for_week[week] = tuple(item for item in candidates if item[0] != content_id)
+
+def _signature():
+    return tuple(EducationalContent.objects.filter(is_active=True).aggregate(
+        count=Count('id'), updated=Max('updated_at'),
+    ).values())
+
+def _load():
+    articles = EducationalContent.objects.filter(is_active=True).values_list(
+        'id', 'trimester_target', 'title', 'summary', 'content',
+    )
+    return ContentIndex(articles.iterator(chunk_size=500))
+
+_index = None
+_index_state = {'signature': None, 'checked_at': 0.0}
+_index_lock = threading.Lock()
+
+def get_content_index():
+    """This process's index, rebuilt when the table changed elsewhere"""
+    global _index
+    now = time.monotonic()
+    with _index_lock:
+        index = _index
+        if index is not None and now - _index_state['checked_at'] <= REFRESH_SECONDS:
+            return index
+        # Other threads keep serving the current index while this one checks
+        _index_state['checked_at'] = now
+
+    signature = _signature()
+    if index is not None and signature == _index_state['signature']:
+        return index
+    # Built without the lock, so a slow rebuild never blocks requests or saves
+    fresh = _load()
+    with _index_lock:
+        _index = fresh
+        _index_state['signature'] = signature
+        return fresh
+
+def refresh_content(content, deleted=False):
+    """Bring this process's index up to date after a save or delete"""
+    if _index is None:
+        return
+    # This process's own change is already in the index, so it must not trigger a rebuild
+    signature = _signature()
+    with _index_lock:
+        if _index is None:
+            return
+        if content.is_active and not deleted:
+            _index.update(content.pk, content.trimester_target, {
+                'title': content.title, 'summary': content.summary, 'content': content.content,
+            })
+        else:
+            _index.remove(content.pk)
+        _index_state['signature'] = signature
+
+def _cards(ids):
+    articles = EducationalContent.objects.cards().filter(is_active=True).in_bulk(ids)
+    return [articles[content_id] for content_id in ids if content_id in articles]
+
+def related_content(content, week=None, limit=3):
+    """Articles most similar to ``content``, favouring the reader's trimester"""
+    return _cards(get_content_index().related_to(content.pk, week, limit))
+
+def recommended_content(week, limit=3):
+    """Articles that best match what happens in gestational ``week``"""
+    return _cards(get_content_index().for_reader(week, limit))
@@ -0,0 +1,209 @@
+# pregnancy/screening.py
+"""Clinical risk screening over vitals history.
+
+Vitals from the last SCREENING_WINDOW_DAYS are read as columns (one NumPy
+array per field, sorted by mother and record date) and every rule is
+evaluated for all mothers at once with array operations. The same engine
+screens one mother after she logs vitals and the whole population in batch;
+results are stored as RiskFlag rows, and flags whose readings have aged out
+of the window are cleared.
+"""
+import math
+import numpy as np
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.utils import timezone
+from .models import VitalsRecord, RiskFlag
+
+HYPERTENSION_SYSTOLIC = 140
+HYPERTENSION_DIASTOLIC = 90
+HYPERTENSION_MIN_READINGS = 2
+SEVERE_SYSTOLIC = 160
+SEVERE_DIASTOLIC = 110
+RAPID_WEIGHT_GAIN_KG = 2.0
+RAPID_WEIGHT_GAIN_DAYS = 7
+FEVER_CELSIUS = 38.0
+FETAL_HEART_RATE_RANGE = (110, 160)
+
+# rule: (severity, minimum number of offending readings)
+RULES = {
+    'hypertension': (1, HYPERTENSION_MIN_READINGS),
+    'severe_hypertension': (2, 1),
+    'rapid_weight_gain': (2, 1),
+    'fever': (1, 1),
+    'abnormal_fetal_heart_rate': (2, 1),
+}
+
+COLUMNS = [
+    'mother_id', 'record_date', 'weight_kg', 'blood_pressure_systolic',
+    'blood_pressure_diastolic', 'temperature', 'fetal_heart_rate',
+]
+
+SCREENING_WINDOW_DAYS = 28
+CHUNK_SIZE = 50000
+
+def recent_vitals(queryset):
+    return queryset.filter(record_date__gte=timezone.now() - timedelta(days=SCREENING_WINDOW_DAYS))
+
+def _decimals(values):
+    # NumPy converts Decimal objects one by one too, and more slowly than float()
+    return np.array([math.nan if value is None else float(value) for value in values], dtype=float)
+
+def to_columns(rows):
+    """Convert (mother_id, record_date, *vitals) rows into a dict of arrays"""
+    mother_ids, record_dates, weight, systolic, diastolic, temperature, fetal_heart_rate = zip(*rows)
+    count = len(mother_ids)
+    return {
+        # fromiter skips the shape discovery np.array() runs on every object
+        'mother_id': np.fromiter(mother_ids, dtype=object, count=count),
+        'timestamp': np.fromiter(map(datetime.timestamp, record_dates), dtype=float, count=count),
+        'weight_kg': _decimals(weight),
+        # Integer columns convert in C, with None becoming NaN
+        'systolic': np.array(systolic, dtype=float),
+        'diastolic': np.array(diastolic, dtype=float),
+        'temperature': _decimals(temperature),
+        'fetal_heart_rate': np.array(fetal_heart_rate, dtype=float),
+    }
+
+def window_min(values, starts, ends):
+    """min(values[start:end]) for each (start, end) pair; windows must be non-empty.
+
+    Uses a sparse table: level k holds the minimum of each run of 2**k values,
+    so any window is the minimum of two overlapping runs.
+    """
+    lengths = ends - starts
+    if not len(lengths):
+        return np.empty(0)
+    table = [values]
+    while 2 ** len(table) <= lengths.max():
+        previous, width = table[-1], 2 ** (len(table) - 1)
+        table.append(np.minimum(previous[:-width], previous[width:]))
+    levels = np.floor(np.log2(lengths)).astype(int)
+    padded = np.full((len(table), len(values)), np.inf)
+    for level, row in enumerate(table):
+        padded[level, :len(row)] = row
+    return np.minimum(padded[levels, starts], padded[levels, ends - 2 ** levels])
+
+def rapid_weight_gain(codes, timestamps, weight):
+    """Weighings RAPID_WEIGHT_GAIN_KG or more above the mother's lowest weight in the previous week"""
+    offending = np.zeros(len(codes), dtype=bool)
+    weighed = np.flatnonzero(~np.isnan(weight))
+    if not len(weighed):
+        return offending
+    seconds = RAPID_WEIGHT_GAIN_DAYS * 86400
+    times = timestamps[weighed] - timestamps[weighed].min()
+    # One sorted key per reading; mothers are spaced so no window reaches into the previous one
+    key = codes[weighed] * (times.max() + seconds + 1) + times
+    starts = np.searchsorted(key, key - seconds, side='left')
+    positions = np.arange(len(weighed))
+    has_earlier = starts < positions
+    lowest = window_min(weight[weighed], starts[has_earlier], positions[has_earlier])
+    gained = weight[weighed][has_earlier] - lowest >= RAPID_WEIGHT_GAIN_KG
+    offending[weighed[has_earlier][gained]] = True
+    return offending
+
+def evaluate(columns):
+    """Evaluate every rule for every mother in ``columns``.
+
+    Rows must be sorted by mother, then record date. Returns
+    {(mother_id, rule): (occurrences, last_seen_timestamp)}.
+    """
+    mother_ids = columns['mother_id']
+    new_mother = np.empty(len(mother_ids), dtype=bool)
+    new_mother[0] = True
+    new_mother[1:] = mother_ids[1:] != mother_ids[:-1]
+    codes = np.cumsum(new_mother) - 1
+    mothers = mother_ids[new_mother]
+    timestamps = columns['timestamp']
+
+    # NaN comparisons are False, so missing readings never trigger a rule
+    with np.errstate(invalid='ignore'):
+        offending = {
+            'hypertension': (columns['systolic'] >= HYPERTENSION_SYSTOLIC)
+                            | (columns['diastolic'] >= HYPERTENSION_DIASTOLIC),
+            'severe_hypertension': (columns['systolic'] >= SEVERE_SYSTOLIC)
+                                   | (columns['diastolic'] >= SEVERE_DIASTOLIC),
+            'fever': columns['temperature'] >= FEVER_CELSIUS,
+            'abnormal_fetal_heart_rate': (columns['fetal_heart_rate'] < FETAL_HEART_RATE_RANGE[0])
+                                         | (columns['fetal_heart_rate'] > FETAL_HEART_RATE_RANGE[1]),
+        }
+
+    offending['rapid_weight_gain'] = rapid_weight_gain(codes, timestamps, columns['weight_kg'])
+
+    results = {}
+    for rule, mask in offending.items():
+        min_readings = RULES[rule][1]
+        occurrences = np.bincount(codes[mask], minlength=len(mothers))
+        last_seen = np.zeros(len(mothers))
+        np.maximum.at(last_seen, codes[mask], timestamps[mask])
+        for code in np.flatnonzero(occurrences >= min_readings):
+            results[(mothers[code], rule)] = (int(occurrences[code]), float(last_seen[code]))
+    return results
+
+def iter_column_blocks(queryset, chunk_size=CHUNK_SIZE):
+    """Yield column blocks that never split one mother's history"""
+    if chunk_size < 2:
+        # A block boundary is found by comparing the last two rows
+        raise ValueError('chunk_size must be at least 2')
+    rows = queryset.order_by('mother_id', 'record_date').values_list(*COLUMNS)
+    pending = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        pending.append(row)
+        if len(pending) >= chunk_size and pending[-1][0] != pending[-2][0]:
+            yield to_columns(pending[:-1])
+            pending = pending[-1:]
+    if pending:
+        yield to_columns(pending)
+
+@transaction.atomic
+def save_flags(results, mother_ids=None):
+    """Upsert RiskFlags from ``results`` and clear flags that no longer apply"""
+    existing = RiskFlag.objects.all()
+    if mother_ids is not None:
+        existing = existing.filter(mother_id__in=mother_ids)
+    existing = {(flag.mother_id, flag.rule): flag for flag in existing.only('id', 'mother_id', 'rule', 'is_active')}
+
+    to_create, to_update = [], []
+    for (mother_id, rule), (occurrences, last_seen) in results.items():
+        fields = {
+            'severity': RULES[rule][0],
+            'occurrences': occurrences,
+            'last_seen': datetime.fromtimestamp(last_seen, tz=dt_timezone.utc),
+            'is_active': True,
+        }
+        flag = existing.pop((mother_id, rule), None)
+        if flag is None:
+            to_create.append(RiskFlag(mother_id=mother_id, rule=rule, **fields))
+        else:
+            for name, value in fields.items():
+                setattr(flag, name, value)
+            to_update.append(flag)
+
+    RiskFlag.objects.bulk_create(to_create, batch_size=1000)
+    RiskFlag.objects.bulk_update(to_update, ['severity', 'occurrences', 'last_seen', 'is_active'], batch_size=1000)
+    cleared = [flag.id for flag in existing.values() if flag.is_active]
+    RiskFlag.objects.filter(id__in=cleared).update(is_active=False)
+    return len(to_create) + len(to_update), len(cleared)
+
+def screen_mother(mother_id):
+    """Re-screen one mother's recent vitals"""
+    recent = recent_vitals(VitalsRecord.objects.filter(mother_id=mother_id))
+    rows = list(recent.order_by('record_date').values_list(*COLUMNS))
+    results = evaluate(to_columns(rows)) if rows else {}
+    return save_flags(results, mother_ids=[mother_id])
+
+def screen_mothers(mother_ids, chunk_size=CHUNK_SIZE):
+    """Re-screen several mothers in one pass, as screen_population() does for everyone"""
+    mother_ids = list(mother_ids)
+    results = {}
+    recent = recent_vitals(VitalsRecord.objects.filter(mother_id__in=mother_ids))
+    for columns in iter_column_blocks(recent, chunk_size):
+        results.update(evaluate(columns))
+    return save_flags(results, mother_ids=mother_ids)
+
+def screen_population(chunk_size=CHUNK_SIZE):
+    """Screen every mother in column blocks; returns (active flags, cleared flags)"""
+    results = {}
+    for columns in iter_column_blocks(recent_vitals(VitalsRecord.objects.all()), chunk_size):
+        results.update(evaluate(columns))
+    return save_flags(results)
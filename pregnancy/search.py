@@ -0,0 +1,233 @@
+# pregnancy/search.py
+"""Ranked full-text search over EducationalContent.
+
+On PostgreSQL each article keeps a weighted tsvector (title > summary >
+content) in EducationalContent.search_vector, backed by a GIN index and
+filled in by a trigger as part of the article's own INSERT or UPDATE. On
+SQLite the same text is mirrored into an FTS5 table ranked with bm25(),
+refreshed from signals whenever an article is saved or deleted.
+Every search term is treated as a prefix, so results appear while the
+reader is still typing.
+"""
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Count, F, Q
+from django.db.models.expressions import RawSQL
+from .models import EducationalContent
+
+SEARCH_CONFIG = 'english'
+SEARCH_LIMIT = 20
+MAX_TERMS = 8
+FTS_TABLE = 'pregnancy_content_fts'
+GIN_INDEX = 'content_search_idx'
+VECTOR_TRIGGER = 'content_search_vector_trigger'
+
+# FTS5 columns; the unindexed ones let searches filter and facet without a join
+FTS_COLUMNS = ['content_id', 'trimester_target', 'content_type', 'is_active', 'title', 'summary', 'content']
+# bm25() weight of each column above
+FTS_WEIGHTS = (0.0, 0.0, 0.0, 0.0, 10.0, 5.0, 1.0)
+
+SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('summary', weight='B', config=SEARCH_CONFIG)
+    + SearchVector('content', weight='C', config=SEARCH_CONFIG)
+)
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+def _fts_columns(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute(f'SELECT * FROM {FTS_TABLE} LIMIT 0')
+    return [column[0] for column in cursor.description]
+
+def ensure_search_index(using=DEFAULT_DB_ALIAS):
+    """Create the GIN index and trigger or the FTS5 table; none can be declared in Meta for both databases.
+
+    Returns True when existing articles need rebuild_search_index() to
+    appear in searches.
+    """
+    connection = connections[using]
+    table = EducationalContent._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON {table} USING GIN (search_vector)')
+            # Same weights as SEARCH_VECTOR, so saving an article needs no second UPDATE
+            cursor.execute(
+                f'CREATE OR REPLACE FUNCTION {VECTOR_TRIGGER}() RETURNS trigger AS $$ BEGIN '
+                f"NEW.search_vector := setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(NEW.title, '')), 'A') "
+                f"|| setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(NEW.summary, '')), 'B') "
+                f"|| setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(NEW.content, '')), 'C'); "
+                f'RETURN NEW; END $$ LANGUAGE plpgsql'
+            )
+            cursor.execute(f'DROP TRIGGER IF EXISTS {VECTOR_TRIGGER} ON {table}')
+            cursor.execute(
+                f'CREATE TRIGGER {VECTOR_TRIGGER} BEFORE INSERT OR UPDATE OF title, summary, content '
+                f'ON {table} FOR EACH ROW EXECUTE FUNCTION {VECTOR_TRIGGER}()'
+            )
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {table} WHERE search_vector IS NULL)')
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            columns = _fts_columns(cursor)
+            if columns == FTS_COLUMNS:
+                return False
+            # Created by an older release with different columns
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                f'content_id UNINDEXED, trimester_target UNINDEXED, content_type UNINDEXED, is_active UNINDEXED, '
+                f"title, summary, content, tokenize='porter unicode61')"
+            )
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {table})')
+            return bool(cursor.fetchone()[0])
+    return False
+
+def index_content(content):
+    """Refresh one article's entry in the search index; PostgreSQL's trigger already has"""
+    if connection.vendor == 'sqlite':
+        content_id = EducationalContent._meta.pk.get_db_prep_value(content.pk, connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE content_id = %s', [content_id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} ({", ".join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s, %s)',
+                [
+                    content_id, content.trimester_target, content.content_type, content.is_active,
+                    content.title, content.summary, content.content,
+                ],
+            )
+
+def remove_content(content):
+    if connection.vendor == 'sqlite':
+        content_id = EducationalContent._meta.pk.get_db_prep_value(content.pk, connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE content_id = %s', [content_id])
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """Re-index every article; returns the number indexed"""
+    ensure_search_index(using)
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return EducationalContent.objects.using(using).update(search_vector=SEARCH_VECTOR)
+    if connection.vendor == 'sqlite':
+        table = EducationalContent._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            columns = ', '.join(FTS_COLUMNS)
+            cursor.execute(f'INSERT INTO {FTS_TABLE} ({columns}) SELECT {columns.replace("content_id", "id")} FROM {table}')
+            return cursor.rowcount
+    return 0
+
+def _tsquery(terms):
+    return SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG)
+
+def _fts_match(terms):
+    # Quoted so user input can never become an FTS5 operator
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def _search_postgresql(terms, trimester, content_type, limit, active_only):
+    query = _tsquery(terms)
+    matches = EducationalContent.objects.cards().filter(search_vector=query)
+    if active_only:
+        matches = matches.filter(is_active=True)
+    if content_type:
+        matches = matches.filter(content_type=content_type)
+    facets = dict(
+        matches.order_by().values('trimester_target').annotate(count=Count('id'))
+        .values_list('trimester_target', 'count')
+    )
+    if trimester:
+        matches = matches.filter(trimester_target__in=[trimester, 'all'])
+    results = matches.annotate(rank=SearchRank(F('search_vector'), query)).order_by('-rank', '-created_at')
+    return list(results[:limit]), facets
+
+def _search_sqlite(terms, trimester, content_type, limit, active_only):
+    where = f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    params = [_fts_match(terms)]
+    if active_only:
+        where += ' AND is_active'
+    if content_type:
+        where += ' AND content_type = %s'
+        params.append(content_type)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT trimester_target, COUNT(*) {where} GROUP BY trimester_target', params)
+        facets = dict(cursor.fetchall())
+
+        if trimester:
+            where += ' AND trimester_target IN (%s, %s)'
+            params += [trimester, 'all']
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        cursor.execute(
+            f'SELECT content_id, -bm25({FTS_TABLE}, {weights}) AS rank {where} ORDER BY rank DESC LIMIT %s',
+            params + [limit],
+        )
+        ranked = cursor.fetchall()
+
+    pk_field = EducationalContent._meta.pk
+    ranks = {pk_field.to_python(content_id): rank for content_id, rank in ranked}
+    # Bulk updates and deletes skip the signals that keep the index in step,
+    # so drop rows that have gone or been deactivated since they were indexed
+    articles = EducationalContent.objects.cards()
+    if active_only:
+        articles = articles.filter(is_active=True)
+    articles = articles.in_bulk(list(ranks))
+    results = []
+    for content_id, rank in ranks.items():
+        article = articles.get(content_id)
+        if article is None:
+            continue
+        article.rank = rank
+        results.append(article)
+    return results, facets
+
+def _search_fallback(terms, trimester, content_type, limit, active_only):
+    matches = EducationalContent.objects.cards()
+    if active_only:
+        matches = matches.filter(is_active=True)
+    if content_type:
+        matches = matches.filter(content_type=content_type)
+    for term in terms:
+        matches = matches.filter(Q(title__icontains=term) | Q(summary__icontains=term) | Q(content__icontains=term))
+    facets = dict(
+        matches.order_by().values('trimester_target').annotate(count=Count('id'))
+        .values_list('trimester_target', 'count')
+    )
+    if trimester:
+        matches = matches.filter(trimester_target__in=[trimester, 'all'])
+    return list(matches[:limit]), facets
+
+def search_content(query, trimester=None, content_type=None, limit=SEARCH_LIMIT, active_only=True):
+    """Best matching articles and match counts per trimester_target.
+
+    Returns (articles, facets); articles are card projections, each with a
+    ``rank`` attribute where the database can rank. ``content_type``
+    narrows both the results and the facets. ``trimester`` narrows the
+    results to that trimester and 'all', but facets always cover every
+    trimester. Inactive articles are only included when ``active_only`` is
+    False.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], {}
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(terms, trimester, content_type, limit, active_only)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(terms, trimester, content_type, limit, active_only)
+    return _search_fallback(terms, trimester, content_type, limit, active_only)
+
+def filter_matches(queryset, query):
+    """Every article in ``queryset`` matching ``query``, unranked and unlimited"""
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return queryset.filter(search_vector=_tsquery(terms))
+    if connection.vendor == 'sqlite':
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT content_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_fts_match(terms)])
+        )
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(summary__icontains=term) | Q(content__icontains=term))
+    return queryset
@@ -0,0 +1,134 @@
+# pregnancy/signals.py
+from functools import partial
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_init, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from .models import User, VitalsRecord, Appointment, Message, EmergencyAlert, EducationalContent, Notification
+from .utils import adjust_unread_counts, invalidate_clinician_dashboard, invalidate_pending_alerts, publish_alert
+from .screening import screen_mother
+from .search import ensure_search_index, index_content, rebuild_search_index, remove_content
+from .recommendations import refresh_content
+from .cache import invalidate_content
+from .database import record_connection, record_request
+from .vitals import add_to_vitals_rollups, refresh_vitals_rollups
+
+@receiver(post_init, sender=Message)
+def remember_message_read_state(sender, instance, **kwargs):
+    # Read state as loaded from the database, before any in-memory changes
+    instance._counted_unread = not instance.is_read
+
+@receiver(post_save, sender=Message)
+def update_unread_counts_on_save(sender, instance, created, **kwargs):
+    is_unread = not instance.is_read
+    was_unread = False if created else instance._counted_unread
+    if is_unread != was_unread:
+        delta = 1 if is_unread else -1
+        adjust_unread_counts(instance.sender_id, instance.receiver_id, delta)
+    instance._counted_unread = is_unread
+
+@receiver(post_save, sender=Message)
+def notify_message_receiver(sender, instance, created, **kwargs):
+    if created:
+        Notification.objects.enqueue(Notification.objects.build_for_user(
+            instance.receiver,
+            dedupe_key=f'message:{instance.id}',
+            subject=f'New message from {instance.sender.get_full_name() or instance.sender.username}',
+            body=instance.subject,
+        ))
+
+@receiver(post_delete, sender=Message)
+def update_unread_counts_on_delete(sender, instance, **kwargs):
+    if instance._counted_unread:
+        adjust_unread_counts(instance.sender_id, instance.receiver_id, -1)
+
+@receiver(post_init, sender=Appointment)
+def remember_appointment_clinician(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred clinician_id isn't fetched per row
+    instance._loaded_clinician_id = instance.__dict__.get('clinician_id')
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_clinician_dashboard_on_appointment(sender, instance, using, **kwargs):
+    # A reassigned appointment leaves the previous clinician's dashboard too
+    clinician_ids = {instance.clinician_id, instance._loaded_clinician_id} - {None}
+    instance._loaded_clinician_id = instance.clinician_id
+    # Drop the cache once the change is visible, or a dashboard read in
+    # between would cache the old rows again
+    for clinician_id in clinician_ids:
+        transaction.on_commit(partial(invalidate_clinician_dashboard, clinician_id), using=using)
+
+@receiver(post_save, sender=EmergencyAlert)
+@receiver(post_delete, sender=EmergencyAlert)
+def invalidate_pending_alerts_on_alert(sender, instance, using, **kwargs):
+    transaction.on_commit(invalidate_pending_alerts, using=using)
+
+@receiver(post_save, sender=EmergencyAlert)
+def publish_alert_on_save(sender, instance, using, **kwargs):
+    transaction.on_commit(partial(publish_alert, instance), using=using)
+
+@receiver(post_save, sender=EmergencyAlert)
+def notify_clinicians_of_alert(sender, instance, created, **kwargs):
+    if not created:
+        return
+    clinicians = User.objects.filter(role='clinician', is_active=True)
+    own_clinicians = clinicians.filter(clinician_appointments__mother=instance.mother_id).distinct()
+    # A mother without a clinician yet is on every clinician's alert queue, so page them all
+    clinicians = own_clinicians if own_clinicians.exists() else clinicians
+    mother = instance.mother.get_full_name() or instance.mother.username
+    notifications = []
+    for clinician in clinicians:
+        notifications += Notification.objects.build_for_user(
+            clinician,
+            dedupe_key=f'alert:{instance.id}:{clinician.id}',
+            subject=f'{instance.get_urgency_level_display()}: {mother}',
+            body=f'{instance.symptoms}\nLocation: {instance.location}',
+        )
+    Notification.objects.enqueue(notifications)
+
+@receiver(post_init, sender=VitalsRecord)
+def remember_vitals_record_date(sender, instance, **kwargs):
+    instance._loaded_record_date = instance.record_date
+
+@receiver(post_save, sender=VitalsRecord)
+@receiver(post_delete, sender=VitalsRecord)
+def screen_mother_on_vitals_change(sender, instance, **kwargs):
+    screen_mother(instance.mother_id)
+
+@receiver(post_save, sender=VitalsRecord)
+@receiver(post_delete, sender=VitalsRecord)
+def refresh_vitals_rollups_on_change(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        add_to_vitals_rollups([instance])
+    else:
+        refresh_vitals_rollups(instance.mother_id, instance.record_date)
+        moved_from = instance._loaded_record_date
+        if moved_from and moved_from != instance.record_date:
+            refresh_vitals_rollups(instance.mother_id, moved_from)
+    instance._loaded_record_date = instance.record_date
+
+@receiver(post_save, sender=EducationalContent)
+def index_content_on_save(sender, instance, **kwargs):
+    index_content(instance)
+    refresh_content(instance)
+    invalidate_content(instance)
+
+@receiver(post_delete, sender=EducationalContent)
+def remove_content_from_index(sender, instance, **kwargs):
+    remove_content(instance)
+    refresh_content(instance, deleted=True)
+    invalidate_content(instance)
+
+@receiver(post_migrate)
+def create_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    if sender.name == 'pregnancy' and ensure_search_index(using):
+        rebuild_search_index(using)
+
+@receiver(request_started)
+def count_request(sender, **kwargs):
+    record_request()
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    record_connection(connection.alias)
@@ -0,0 +1,136 @@
+# pregnancy/streams.py
+"""Server-Sent Events stream of new and updated emergency alerts.
+
+alert_stream is a plain ASGI application that pregnancy_tracker/asgi.py
+mounts at ALERT_STREAM_PATH beside Django. It only touches the database
+while a clinician connects: it reads the session and, if the browser sends
+Last-Event-ID after a reconnect, replays what changed since. Afterwards a
+stream is an idle coroutine waiting on its broker subscription, which is
+what lets one worker hold thousands of them.
+
+Every event id is an alert updates cursor (see get_alert_updates), so
+EventSource resumes from the last alert it saw on its own. A client that
+was away for more than ALERT_STREAM_REPLAY_LIMIT changes gets a reload
+event instead, since its dashboard is out of date anyway.
+"""
+import asyncio
+import json
+import weakref
+from importlib import import_module
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http import HttpRequest, parse_cookie
+from .broker import get_broker
+from .pagination import InvalidCursor
+from .utils import ALERT_CHANNEL, alert_cursor, get_alert_updates, latest_alert_cursor, serialize_alert
+
+ALERT_STREAM_PATH = '/emergency-alert/stream/'
+ALERT_STREAM_KEEPALIVE_SECONDS = 15
+ALERT_STREAM_RETRY_MS = 3000
+ALERT_STREAM_REPLAY_LIMIT = 500
+
+# Delivered locally to every stream each keepalive interval
+KEEPALIVE = {}
+_keepalives = weakref.WeakKeyDictionary()
+
+def _header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return ''
+
+def _clinician(scope):
+    """The signed-in clinician for the request's session cookie, or None"""
+    close_old_connections()
+    try:
+        request = HttpRequest()
+        session_key = parse_cookie(_header(scope, b'cookie')).get(settings.SESSION_COOKIE_NAME)
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+        user = get_user(request)
+        return user if user.is_authenticated and user.role == 'clinician' else None
+    finally:
+        close_old_connections()
+
+def _missed_events(cursor):
+    """Events for alerts changed since ``cursor``, or just a fresh cursor for a new stream"""
+    close_old_connections()
+    try:
+        if cursor:
+            try:
+                events, more = [], True
+                while more and len(events) < ALERT_STREAM_REPLAY_LIMIT:
+                    alerts, cursor, more = get_alert_updates(cursor)
+                    events += [alert_event(alert_cursor(alert), json.dumps(serialize_alert(alert))) for alert in alerts]
+                if more:
+                    events.append('event: reload\ndata: {}\n\n')
+                return events
+            except InvalidCursor:
+                pass
+        # Only sets EventSource's last event id, so a reconnect resumes from here
+        return [f'id: {latest_alert_cursor()}\n\n']
+    finally:
+        close_old_connections()
+
+def alert_event(cursor, data):
+    return f'event: alert\nid: {cursor}\ndata: {data}\n\n'
+
+async def _end_on_disconnect(receive, subscription):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscription.end()
+
+async def _send_keepalives():
+    while True:
+        await asyncio.sleep(ALERT_STREAM_KEEPALIVE_SECONDS)
+        get_broker().deliver(ALERT_CHANNEL, KEEPALIVE)
+
+def _ensure_keepalives():
+    # One timer per event loop rather than one per stream
+    loop = asyncio.get_running_loop()
+    task = _keepalives.get(loop)
+    if task is None or task.done():
+        _keepalives[loop] = loop.create_task(_send_keepalives())
+
+async def alert_stream(scope, receive, send):
+    clinician = await sync_to_async(_clinician)(scope)
+    if clinician is None:
+        await send({'type': 'http.response.start', 'status': 403, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'Only signed-in clinicians receive alerts.'})
+        return
+
+    # Subscribe before reading the backlog so nothing falls between the two
+    subscription = await get_broker().subscribe(ALERT_CHANNEL)
+    disconnect = asyncio.ensure_future(_end_on_disconnect(receive, subscription))
+    _ensure_keepalives()
+    try:
+        missed = await sync_to_async(_missed_events)(_header(scope, b'last-event-id'))
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': ''.join([f'retry: {ALERT_STREAM_RETRY_MS}\n\n', *missed]).encode(),
+            'more_body': True,
+        })
+        while True:
+            message = await subscription.get()
+            if message is None:
+                # The client left, or the broker lost its feed and EventSource should reconnect
+                break
+            if message is KEEPALIVE:
+                chunk = ': keepalive\n\n'
+            else:
+                chunk = alert_event(message['cursor'], message['data'])
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnect.cancel()
+        subscription.close()
@@ -0,0 +1,831 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from unittest import skipUnless
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .models import (
+    User, PregnancyProfile, VitalsRecord, VitalsRollup, Appointment, Message, EmergencyAlert, EducationalContent,
+    Notification, RiskFlag,
+)
+from .forms import VitalsRecordForm
+from .broker import get_broker
+from .cache import cache_public_page
+from .exports import csv_safe, iter_export
+from .middleware import RequestTimingMiddleware, read_samples
+from .notifications import MemoryBackend, process_batch
+from .pagination import encode_cursor, keyset_page
+from . import recommendations
+from .recommendations import ContentIndex
+from .screening import SCREENING_WINDOW_DAYS, iter_column_blocks
+from .search import filter_matches, search_content
+from .streams import ALERT_STREAM_PATH, alert_stream
+from .utils import ALERT_CHANNEL, get_clinician_appointments, latest_alert_cursor
+from .vitals import ingest_vitals, rebuild_vitals_rollups
+
+class DashboardQueryCountTests(TestCase):
+    """Dashboards and the inbox run a fixed number of queries however much data a user has"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother', password='pass')
+        cls.clinician = User.objects.create_user('clinician', role='clinician', password='pass')
+        PregnancyProfile.objects.create(
+            mother=cls.mother,
+            last_menstrual_period=date.today() - timedelta(weeks=20),
+            estimated_due_date=date.today() + timedelta(weeks=20),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def add_activity(self, count):
+        """``count`` more messages each way and appointments with new clinicians"""
+        for i in range(count):
+            clinician = User.objects.create_user(f'clinician-{User.objects.count()}', role='clinician')
+            Message.objects.create(sender=clinician, receiver=self.mother, subject=f'Hello {i}', content='How are you?')
+            Message.objects.create(sender=self.mother, receiver=self.clinician, subject=f'Re {i}', content='Fine')
+            for clinician_id in (clinician.id, self.clinician.id):
+                Appointment.objects.create(
+                    mother=self.mother, clinician_id=clinician_id, location='Clinic', reason='Checkup',
+                    scheduled_date=timezone.now() + timedelta(hours=i + 1),
+                )
+
+    def fetch(self, url):
+        """GET ``url`` and use its context the way a template would"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for value in response.context.flatten().values():
+            if isinstance(value, (QuerySet, list)):
+                # str() follows the relations each row's __str__ shows
+                [str(item) for item in value]
+        return response
+
+    def query_count(self, user, url):
+        self.client.force_login(user)
+        self.fetch(url)  # builds per-process indexes such as the recommendations
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.fetch(url)
+        return len(queries)
+
+    def assert_flat(self, user, url):
+        self.add_activity(2)
+        baseline = self.query_count(user, url)
+        self.add_activity(25)
+        cache.clear()
+        with self.assertNumQueries(baseline):
+            self.fetch(url)
+
+    def test_mother_dashboard(self):
+        self.assert_flat(self.mother, reverse('dashboard'))
+
+    def test_clinician_dashboard(self):
+        self.assert_flat(self.clinician, reverse('dashboard'))
+
+    def test_messaging_inbox(self):
+        self.assert_flat(self.mother, reverse('messaging'))
+
+@skipUnless(connection.vendor == 'sqlite', 'Checks SQLite EXPLAIN QUERY PLAN output')
+class IndexUsageTests(TestCase):
+    """The hot listing queries are answered from their Meta.indexes, not table scans"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.clinician = User.objects.create_user('clinician', role='clinician')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan)
+
+    def test_recent_vitals(self):
+        self.assertUsesIndex(VitalsRecord.objects.filter(mother=self.mother)[:5], 'vitals_mother_date_idx')
+
+    def test_unread_messages(self):
+        self.assertUsesIndex(
+            Message.objects.filter(receiver=self.mother, is_read=False).order_by(), 'message_receiver_read_idx'
+        )
+
+    def test_conversation_thread(self):
+        thread = Message.objects.filter(receiver=self.mother, sender=self.clinician).order_by('-created_at')
+        self.assertUsesIndex(thread, 'message_thread_idx')
+
+    def test_appointment_listings(self):
+        self.assertUsesIndex(
+            Appointment.objects.filter(mother=self.mother).order_by('scheduled_date', 'id'), 'appt_mother_date_idx'
+        )
+        upcoming = Appointment.objects.filter(
+            clinician=self.clinician, status__in=['scheduled', 'confirmed'], scheduled_date__gte=timezone.now(),
+        )
+        self.assertUsesIndex(upcoming, 'appt_clinician_date_idx')
+
+    def test_open_alerts(self):
+        self.assertUsesIndex(EmergencyAlert.objects.filter(is_responded=False), 'alert_open_idx')
+
+    def test_content_listings(self):
+        active = EducationalContent.objects.filter(is_active=True)
+        self.assertUsesIndex(active.filter(is_featured=True), 'content_featured_idx')
+        self.assertUsesIndex(active.order_by('-created_at', '-id'), 'content_recent_idx')
+
+class ClinicianDashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def appointment_count(self, clinician):
+        data = get_clinician_appointments(clinician)
+        return len(data['todays_appointments']) + len(data['upcoming_appointments'])
+
+    def test_reassigned_appointment_leaves_previous_clinician_dashboard(self):
+        mother = User.objects.create_user('mother', role='mother')
+        first = User.objects.create_user('first', role='clinician')
+        second = User.objects.create_user('second', role='clinician')
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                mother=mother, clinician=first, location='Clinic', reason='Checkup',
+                scheduled_date=timezone.now() + timedelta(hours=1),
+            )
+        self.assertEqual(self.appointment_count(first), 1)
+
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        appointment.clinician = second
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.save()
+        self.assertEqual(self.appointment_count(first), 0)
+        self.assertEqual(self.appointment_count(second), 1)
+
+    def test_cache_is_kept_until_the_change_commits(self):
+        mother = User.objects.create_user('mother', role='mother')
+        clinician = User.objects.create_user('clinician', role='clinician')
+        self.assertEqual(self.appointment_count(clinician), 0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Appointment.objects.create(
+                mother=mother, clinician=clinician, location='Clinic', reason='Checkup',
+                scheduled_date=timezone.now() + timedelta(hours=1),
+            )
+            self.assertEqual(self.appointment_count(clinician), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.appointment_count(clinician), 1)
+
+    def test_today_starts_at_local_midnight(self):
+        mother = User.objects.create_user('mother', role='mother')
+        clinician = User.objects.create_user('clinician', role='clinician')
+        now = datetime.fromisoformat('2026-03-10T06:00:00+00:00')
+        # 00:30 in Nairobi is still the previous day in UTC
+        Appointment.objects.create(
+            mother=mother, clinician=clinician, location='Clinic', reason='Checkup',
+            scheduled_date=datetime.fromisoformat('2026-03-10T00:30:00+03:00'),
+        )
+        with patch('django.utils.timezone.now', return_value=now):
+            data = get_clinician_appointments(clinician)
+        self.assertEqual(len(data['todays_appointments']), 1)
+
+class MarkMessagesReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.clinician = User.objects.create_user('clinician', role='clinician')
+        cls.message = Message.objects.create(sender=cls.clinician, receiver=cls.mother, subject='Hi', content='Hello')
+
+    def mark(self, body):
+        self.client.force_login(self.mother)
+        return self.client.post(reverse('api_mark_messages_read'), json.dumps(body), content_type='application/json')
+
+    def test_marks_listed_messages(self):
+        response = self.mark({'message_ids': [str(self.message.id)]})
+        self.assertEqual(response.json()['unread_count'], 0)
+
+    def test_malformed_bodies_are_rejected(self):
+        for body in ([], 'x', {'message_ids': str(self.message.id)}):
+            with self.subTest(body=body):
+                self.assertEqual(self.mark(body).status_code, 400)
+
+class ClaimAlertTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.clinician = User.objects.create_user('clinician', role='clinician')
+        cls.other = User.objects.create_user('other', role='clinician')
+        cls.alert = EmergencyAlert.objects.create(mother=cls.mother, symptoms='Bleeding', location='Home')
+
+    def claim(self, user, alert_id):
+        self.client.force_login(user)
+        return self.client.post(reverse('api_claim_alert', args=[alert_id]))
+
+    def test_first_claim_wins(self):
+        self.assertEqual(self.claim(self.clinician, self.alert.id).status_code, 200)
+        self.assertEqual(self.claim(self.other, self.alert.id).status_code, 409)
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.claimed_by, self.clinician)
+
+    def test_unknown_alert(self):
+        self.assertEqual(self.claim(self.clinician, self.mother.id).status_code, 404)
+
+    def test_only_clinicians_claim(self):
+        self.assertEqual(self.claim(self.mother, self.alert.id).status_code, 403)
+
+class AppointmentFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.clinician = User.objects.create_user('clinician', role='clinician')
+
+    def form_data(self, scheduled_date):
+        return {
+            'clinician': self.clinician.id, 'appointment_type': 'antenatal', 'duration_minutes': 30,
+            'location': 'Clinic', 'reason': 'Checkup',
+            'scheduled_date': timezone.localtime(scheduled_date).strftime('%Y-%m-%dT%H:%M'),
+        }
+
+    def test_create_appointment(self):
+        self.client.force_login(self.mother)
+        response = self.client.post(reverse('create_appointment'), self.form_data(timezone.now() + timedelta(days=1)))
+        self.assertRedirects(response, reverse('appointments'), fetch_redirect_response=False)
+        self.assertEqual(Appointment.objects.get().mother, self.mother)
+
+    def test_create_appointment_in_the_past_is_rejected(self):
+        self.client.force_login(self.mother)
+        response = self.client.post(reverse('create_appointment'), self.form_data(timezone.now() - timedelta(days=1)))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('scheduled_date', response.context['form'].errors)
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_update_appointment(self):
+        appointment = Appointment.objects.create(
+            mother=self.mother, clinician=self.clinician, location='Clinic', reason='Checkup',
+            scheduled_date=timezone.now() + timedelta(days=1),
+        )
+        self.client.force_login(self.mother)
+        data = dict(self.form_data(timezone.now() + timedelta(days=2)), location='Ward 4')
+        response = self.client.post(reverse('update_appointment', args=[appointment.id]), data)
+        self.assertRedirects(response, reverse('appointments'), fetch_redirect_response=False)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.location, 'Ward 4')
+
+class AlertUpdatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.clinician = User.objects.create_user('clinician', role='clinician')
+
+    def poll(self, cursor=None):
+        self.client.force_login(self.clinician)
+        response = self.client.get(reverse('api_alert_updates'), {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_first_poll_starts_after_existing_alerts(self):
+        alert = EmergencyAlert.objects.create(mother=self.mother, symptoms='Bleeding', location='Home')
+        EmergencyAlert.objects.filter(pk=alert.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        body = self.poll()
+        self.assertEqual(body['alerts'], [])
+        self.assertEqual(self.poll(body['cursor'])['alerts'], [])
+
+    def test_new_and_claimed_alerts_are_delivered(self):
+        cursor = self.poll()['cursor']
+        alert = EmergencyAlert.objects.create(mother=self.mother, symptoms='Bleeding', location='Home')
+        body = self.poll(cursor)
+        self.assertEqual([item['id'] for item in body['alerts']], [str(alert.id)])
+
+        self.client.post(reverse('api_claim_alert', args=[alert.id]))
+        body = self.poll(body['cursor'])
+        self.assertEqual([item['claimed_by'] for item in body['alerts']], [str(self.clinician.id)])
+
+    def test_alert_committed_after_a_later_stamped_one_is_delivered(self):
+        cursor = self.poll()['cursor']
+        later = EmergencyAlert.objects.create(mother=self.mother, symptoms='Bleeding', location='Home')
+        body = self.poll(cursor)
+        self.assertEqual([item['id'] for item in body['alerts']], [str(later.id)])
+        # updated_at is stamped before commit, so a slow transaction can show up behind the cursor
+        earlier = EmergencyAlert.objects.create(mother=self.mother, symptoms='Fever', location='Home')
+        EmergencyAlert.objects.filter(pk=earlier.pk).update(updated_at=later.updated_at - timedelta(seconds=1))
+        body = self.poll(body['cursor'])
+        self.assertIn(str(earlier.id), [item['id'] for item in body['alerts']])
+
+    def test_backlog_is_paged(self):
+        cursor = self.poll()['cursor']
+        for i in range(3):
+            EmergencyAlert.objects.create(mother=self.mother, symptoms=f'Symptom {i}', location='Home')
+        with patch('pregnancy.views.ALERT_UPDATES_LIMIT', 2):
+            first = self.poll(cursor)
+        self.assertTrue(first['more'])
+        self.assertEqual(first['poll_after_ms'], 0)
+        second = self.poll(first['cursor'])
+        self.assertEqual(len({item['id'] for item in first['alerts'] + second['alerts']}), 3)
+        self.assertFalse(second['more'])
+
+    def test_rejects_mothers_and_bad_cursors(self):
+        self.client.force_login(self.mother)
+        self.assertEqual(self.client.get(reverse('api_alert_updates')).status_code, 403)
+        self.client.force_login(self.clinician)
+        self.assertEqual(self.client.get(reverse('api_alert_updates'), {'cursor': 'nope'}).status_code, 400)
+
+class AlertStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.clinician = User.objects.create_user('clinician', role='clinician')
+
+    def raise_alert(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return EmergencyAlert.objects.create(mother=self.mother, symptoms='Bleeding', location='Home')
+
+    def session_cookie(self, user):
+        self.client.force_login(user)
+        return f'{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+    async def connect(self, user, last_event_id=None):
+        """(task, sent messages, client events) for a stream opened as ``user``"""
+        headers = [(b'cookie', (await sync_to_async(self.session_cookie)(user)).encode())]
+        if last_event_id:
+            headers.append((b'last-event-id', last_event_id.encode()))
+        sent, events = asyncio.Queue(), asyncio.Queue()
+        scope = {'type': 'http', 'path': ALERT_STREAM_PATH, 'headers': headers}
+        task = asyncio.ensure_future(alert_stream(scope, events.get, sent.put))
+        return task, sent, events
+
+    async def body(self, sent):
+        return (await asyncio.wait_for(sent.get(), 5))['body'].decode()
+
+    async def test_new_alerts_are_pushed_to_clinicians(self):
+        task, sent, events = await self.connect(self.clinician)
+        self.assertEqual((await asyncio.wait_for(sent.get(), 5))['status'], 200)
+        self.assertIn('id: ', await self.body(sent))
+
+        alert = await sync_to_async(self.raise_alert)()
+        self.assertIn(f'"id": "{alert.id}"', await self.body(sent))
+
+        await events.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 5)
+        self.assertFalse(get_broker().subscriptions[ALERT_CHANNEL])
+
+    async def test_reconnect_replays_missed_alerts(self):
+        cursor = await sync_to_async(latest_alert_cursor)()
+        alert = await sync_to_async(self.raise_alert)()
+        task, sent, events = await self.connect(self.clinician, last_event_id=cursor)
+        await sent.get()
+        self.assertIn(f'"id": "{alert.id}"', await self.body(sent))
+        await events.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 5)
+
+    async def test_only_clinicians_connect(self):
+        task, sent, events = await self.connect(self.mother)
+        self.assertEqual((await asyncio.wait_for(sent.get(), 5))['status'], 403)
+        await asyncio.wait_for(task, 5)
+
+@override_settings(NOTIFICATION_BACKENDS={
+    'email': 'pregnancy.notifications.MemoryBackend',
+    'sms': 'pregnancy.notifications.MemoryBackend',
+})
+class NotificationDeliveryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.clinician = User.objects.create_user(
+            'clinician', role='clinician', email='clinician@example.com', phone_number='0700000001',
+        )
+        cls.other = User.objects.create_user('other', role='clinician', email='other@example.com')
+        Appointment.objects.create(
+            mother=cls.mother, clinician=cls.clinician, location='Clinic', reason='Checkup',
+            scheduled_date=timezone.now() + timedelta(days=1),
+        )
+
+    def setUp(self):
+        MemoryBackend.outbox.clear()
+        MemoryBackend.failing.clear()
+
+    def test_alert_notifies_own_clinicians_on_their_preferred_channel(self):
+        alert = EmergencyAlert.objects.create(mother=self.mother, symptoms='Bleeding', location='Home')
+        notifications = Notification.objects.filter(dedupe_key__startswith=f'alert:{alert.id}')
+        self.assertEqual([(n.recipient, n.channel) for n in notifications], [(self.clinician, 'sms')])
+
+    def test_mother_without_clinicians_notifies_every_clinician(self):
+        mother = User.objects.create_user('new-mother', role='mother')
+        User.objects.create_user('retired', role='clinician', email='retired@example.com', is_active=False)
+        alert = EmergencyAlert.objects.create(mother=mother, symptoms='Bleeding', location='Home')
+        notifications = Notification.objects.filter(dedupe_key__startswith=f'alert:{alert.id}')
+        self.assertEqual(
+            sorted((n.recipient.username, n.channel) for n in notifications),
+            [('clinician', 'sms'), ('other', 'email')],
+        )
+
+    def test_failures_in_a_batch_leave_the_delivered_notifications_sent(self):
+        Notification.objects.all().delete()
+        Notification.objects.enqueue([
+            Notification(channel='email', address=address, body='Hello', dedupe_key=address)
+            for address in ('a@example.com', 'b@example.com', 'c@example.com')
+        ])
+        MemoryBackend.failing.add('b@example.com')
+        with self.assertLogs('pregnancy.notifications', 'WARNING'):
+            self.assertEqual(process_batch(), (2, 1))
+        statuses = dict(Notification.objects.values_list('address', 'status'))
+        self.assertEqual(statuses, {'a@example.com': 'sent', 'b@example.com': 'pending', 'c@example.com': 'sent'})
+        self.assertEqual(Notification.objects.get(address='b@example.com').attempts, 1)
+
+class WeekInfoCachingTests(TestCase):
+    def test_public_response_does_not_vary_on_the_session(self):
+        response = self.client.get(reverse('api_week_info', args=[20]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        self.assertFalse(response.cookies)
+
+    def test_logged_in_response_is_the_same_public_copy(self):
+        self.client.force_login(User.objects.create_user('mother', role='mother'))
+        response = self.client.get(reverse('api_week_info', args=[20]))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+
+class VitalsRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+
+    def rollups(self):
+        return {
+            (rollup.period, rollup.period_start): (rollup.record_count, rollup.stats)
+            for rollup in VitalsRollup.objects.filter(mother=self.mother)
+        }
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        now = timezone.now()
+        for days, weight, systolic in [(0, 70.1, 120), (0, 70.4, None), (1, 69.8, 135), (9, 68.0, 110)]:
+            VitalsRecord.objects.create(
+                mother=self.mother, record_date=now - timedelta(days=days),
+                weight_kg=weight, blood_pressure_systolic=systolic,
+            )
+        incremental = self.rollups()
+        rebuild_vitals_rollups()
+        self.assertEqual(incremental, self.rollups())
+
+    def test_edits_and_deletes_recompute_the_bucket(self):
+        record = VitalsRecord.objects.create(mother=self.mother, record_date=timezone.now(), weight_kg=70)
+        VitalsRecord.objects.create(mother=self.mother, record_date=timezone.now(), weight_kg=75)
+        record.delete()
+        stats = VitalsRollup.objects.get(mother=self.mother, period='day').stats
+        self.assertEqual(stats['weight_kg']['min'], 75)
+        self.assertEqual(stats['weight_kg']['count'], 1)
+
+    def test_invalid_dates_are_rejected(self):
+        self.client.force_login(self.mother)
+        for value in ('2024-02-30', 'last week'):
+            response = self.client.get(reverse('api_vitals_trends'), {'from': value})
+            self.assertEqual(response.status_code, 400)
+
+class ScreeningTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+
+    def log(self, days_ago, **vitals):
+        VitalsRecord.objects.create(mother=self.mother, record_date=timezone.now() - timedelta(days=days_ago), **vitals)
+
+    def active_rules(self):
+        return set(RiskFlag.objects.filter(mother=self.mother, is_active=True).values_list('rule', flat=True))
+
+    def test_weight_gain_is_measured_across_the_week(self):
+        # No two consecutive weighings differ by 2 kg, but the week does
+        self.log(6, weight_kg=70)
+        self.log(3, weight_kg=71)
+        self.log(0, weight_kg=72.1)
+        self.assertIn('rapid_weight_gain', self.active_rules())
+
+    def test_gradual_weight_gain_is_not_flagged(self):
+        self.log(10, weight_kg=70)
+        self.log(0, weight_kg=72.5)
+        self.assertNotIn('rapid_weight_gain', self.active_rules())
+
+    def test_readings_outside_the_window_are_ignored(self):
+        self.log(SCREENING_WINDOW_DAYS + 1, temperature=39.5)
+        self.assertNotIn('fever', self.active_rules())
+        self.log(1, temperature=39.5)
+        self.assertIn('fever', self.active_rules())
+
+    def test_chunk_size_must_allow_a_boundary_check(self):
+        with self.assertRaises(ValueError):
+            list(iter_column_blocks(VitalsRecord.objects.all(), chunk_size=1))
+
+class VitalsIngestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.other_mother = User.objects.create_user('other-mother', role='mother')
+        cls.clinician = User.objects.create_user('clinician', role='clinician')
+        Appointment.objects.create(
+            mother=cls.mother, clinician=cls.clinician, location='Clinic', reason='Checkup',
+            scheduled_date=timezone.now() + timedelta(days=1),
+        )
+
+    def ingest(self, user, *rows):
+        self.client.force_login(user)
+        return self.client.post(reverse('api_ingest_vitals'), json.dumps(list(rows)), content_type='application/json')
+
+    def row(self, mother, **vitals):
+        return {'client_id': str(uuid.uuid4()), 'mother': str(mother.id), **vitals}
+
+    def test_clinicians_submit_for_their_patients_only(self):
+        response = self.ingest(self.clinician, self.row(self.mother, weight_kg=70))
+        self.assertEqual(response.json()['created'], 1)
+
+        response = self.ingest(
+            self.clinician, self.row(self.mother, weight_kg=70), self.row(self.other_mother, weight_kg=70),
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(VitalsRecord.objects.count(), 1)
+
+    def test_mothers_cannot_submit_for_others(self):
+        self.assertEqual(self.ingest(self.mother, self.row(self.other_mother, weight_kg=70)).status_code, 403)
+
+    def test_batch_rollups_match_a_rebuild_in_a_fixed_number_of_queries(self):
+        now = timezone.now()
+        VitalsRecord.objects.create(mother=self.mother, record_date=now, weight_kg=71)
+        rows = [
+            self.row(mother, weight_kg=60 + days, blood_pressure_systolic=150,
+                     record_date=(now - timedelta(days=days)).isoformat())
+            for mother in (self.mother, self.other_mother) for days in range(0, 40, 2)
+        ]
+        admin = User.objects.create_user('admin', role='admin')
+        with CaptureQueriesContext(connection) as queries:
+            summary = ingest_vitals(rows, admin)
+        self.assertEqual(summary['created'], 40)
+        self.assertLess(len(queries), len(rows))
+        ingested = {(r.mother_id, r.period, r.period_start): (r.record_count, r.stats) for r in VitalsRollup.objects.all()}
+        rebuild_vitals_rollups()
+        rebuilt = {(r.mother_id, r.period, r.period_start): (r.record_count, r.stats) for r in VitalsRollup.objects.all()}
+        self.assertEqual(ingested, rebuilt)
+        self.assertEqual(
+            set(RiskFlag.objects.filter(rule='hypertension').values_list('mother_id', flat=True)),
+            {self.mother.id, self.other_mother.id},
+        )
+
+    def test_rows_stored_concurrently_count_as_duplicates(self):
+        row = self.row(self.mother, weight_kg=70)
+        bulk_create = VitalsRecord.objects.bulk_create
+
+        def store_first(records, **kwargs):
+            # Another retry of the same submission wins the race
+            VitalsRecord.objects.create(mother=self.mother, client_id=uuid.UUID(row['client_id']), weight_kg=70)
+            return bulk_create(records, **kwargs)
+
+        with patch.object(VitalsRecord.objects, 'bulk_create', side_effect=store_first):
+            summary = ingest_vitals([row, self.row(self.mother, weight_kg=71)], self.mother)
+        self.assertEqual((summary['created'], summary['duplicates']), (1, 1))
+        self.assertEqual(VitalsRollup.objects.get(period='day').record_count, 2)
+
+    def test_nan_is_not_a_missing_value(self):
+        body = self.ingest(self.mother, self.row(self.mother, weight_kg='nan', temperature=36.8)).json()
+        self.assertEqual(body['created'], 0)
+        self.assertEqual(body['errors'][0]['errors'], {'weight_kg': 'Enter a number.'})
+
+    def test_zero_is_out_of_range_for_the_api_and_the_form(self):
+        body = self.ingest(self.mother, self.row(self.mother, weight_kg=0)).json()
+        self.assertIn('weight_kg', body['errors'][0]['errors'])
+        form = VitalsRecordForm(data={'weight_kg': '0'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('weight_kg', form.errors)
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.clinician = User.objects.create_user('clinician', role='clinician')
+        Appointment.objects.create(
+            mother=cls.mother, clinician=cls.clinician, location='@Clinic', duration_minutes=30,
+            reason='=HYPERLINK("http://example.com","Checkup")', notes='\t=1+2', scheduled_date=timezone.now(),
+        )
+
+    def export(self, name, **params):
+        self.client.force_login(self.clinician)
+        return self.client.get(reverse('export_records', args=[name]), params)
+
+    def test_formula_cells_are_quoted(self):
+        body = b''.join(self.export('appointments').streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(rows[0]['reason'], '\'=HYPERLINK("http://example.com","Checkup")')
+        self.assertEqual(rows[0]['location'], "'@Clinic")
+        self.assertEqual(rows[0]['notes'], "'\t=1+2")
+        self.assertEqual(csv_safe('\r=1+2'), "'\r=1+2")
+        self.assertEqual(rows[0]['duration_minutes'], '30')
+
+    def test_invalid_dates_are_rejected(self):
+        self.assertEqual(self.export('vitals', **{'from': '2024-02-30'}).status_code, 400)
+
+    def test_pages_continue_across_rows_with_the_same_date(self):
+        recorded = timezone.now()
+        records = [VitalsRecord(mother=self.mother, record_date=recorded, weight_kg=60) for _ in range(5)]
+        VitalsRecord.objects.bulk_create(records)
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(csv.reader(iter_export('vitals', 'csv', chunk_size=2)))[1:]
+        self.assertEqual(sorted(row[0] for row in rows), sorted(str(record.id) for record in records))
+        self.assertEqual(len(queries), 3)
+
+class HealthCheckTests(TestCase):
+    def test_health_check_reports_status_only(self):
+        self.assertEqual(self.client.get(reverse('health_check')).json(), {'status': 'success'})
+
+    def test_database_stats_are_for_staff(self):
+        self.client.force_login(User.objects.create_user('mother', role='mother'))
+        self.assertEqual(self.client.get(reverse('api_database_stats')).status_code, 302)
+        self.client.force_login(User.objects.create_user('admin', role='admin'))
+        self.assertIn('databases', self.client.get(reverse('api_database_stats')).json()['database'])
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        start = timezone.now()
+        cls.records = [
+            VitalsRecord.objects.create(mother=cls.mother, record_date=start + timedelta(days=day), weight_kg=60)
+            for day in range(5)
+        ]
+
+    def test_pages_walk_forwards_and_back(self):
+        queryset = VitalsRecord.objects.all()
+        first = keyset_page(queryset, 'record_date', per_page=2)
+        second = keyset_page(queryset, 'record_date', cursor=first.next_cursor, per_page=2)
+        self.assertEqual(list(second), self.records[2:4])
+        back = keyset_page(queryset, 'record_date', cursor=second.previous_cursor, per_page=2)
+        self.assertEqual(list(back), self.records[:2])
+        self.assertFalse(back.has_previous())
+
+    def test_empty_backwards_page_returns_to_the_first_page(self):
+        # The client was on the first page and everything before it has been deleted
+        first = self.records[0]
+        cursor = encode_cursor(first.record_date, first.id, backwards=True)
+        page = keyset_page(VitalsRecord.objects.all(), 'record_date', cursor=cursor, per_page=2)
+        self.assertEqual(list(page), self.records[:2])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+class ContentSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            EducationalContent.objects.create(
+                title=f'Sleep article {number}', slug=f'sleep-article-{number}', content_type='article',
+                trimester_target='first', summary='Sleep', content='Sleep on your side.',
+            )
+        EducationalContent.objects.create(
+            title='Sleep video', slug='sleep-video', content_type='video',
+            trimester_target='third', summary='Sleep', content='Sleep positions.',
+        )
+
+    def test_content_type_is_applied_before_the_limit(self):
+        results, facets = search_content('sleep', content_type='video', limit=2)
+        self.assertEqual([article.slug for article in results], ['sleep-video'])
+        self.assertEqual(facets, {'third': 1})
+
+    def test_admin_matches_are_not_capped(self):
+        matches = filter_matches(EducationalContent.objects.all(), 'sleep')
+        self.assertEqual(matches.count(), 4)
+        self.assertEqual(filter_matches(EducationalContent.objects.filter(content_type='video'), 'side').count(), 0)
+
+    def test_bulk_changes_without_signals_are_skipped(self):
+        EducationalContent.objects.filter(slug='sleep-article-0').update(is_active=False)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {EducationalContent._meta.db_table} WHERE slug = %s', ['sleep-article-1'])
+        results, facets = search_content('sleep')
+        self.assertEqual(sorted(article.slug for article in results), ['sleep-article-2', 'sleep-video'])
+
+class ContentIndexTests(TestCase):
+    def article(self, slug, text, **fields):
+        return EducationalContent.objects.create(
+            title=text, slug=slug, content_type='article', summary=text, content=text, **fields
+        )
+
+    def test_updates_reuse_the_article_slot(self):
+        index = ContentIndex([
+            (1, 'all', 'iron folate', 'iron', 'iron folate'),
+            (2, 'all', 'iron spinach', 'iron', 'iron spinach'),
+        ])
+        index.update(1, 'all', {'title': 'iron lentils', 'summary': 'iron', 'content': 'iron lentils'})
+        self.assertEqual(index.ids, [1, 2])
+        index.remove(2)
+        index.update(3, 'all', {'title': 'iron beans', 'summary': 'iron', 'content': 'iron beans'})
+        self.assertEqual(index.ids, [1, 3])
+        self.assertEqual(index.related_to(3), [1])
+
+    def test_saves_keep_the_index_current_without_a_rebuild(self):
+        first = self.article('iron', 'iron folate spinach')
+        recommendations._index = None
+        self.addCleanup(setattr, recommendations, '_index', None)
+        index = recommendations.get_content_index()
+        second = self.article('iron-more', 'iron folate lentils')
+        self.assertEqual(recommendations._index_state['signature'], recommendations._signature())
+
+        recommendations._index_state['checked_at'] = 0
+        self.assertIs(recommendations.get_content_index(), index)
+        self.assertEqual(index.related_to(first.pk), [second.pk])
+
+class PublicPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.renders = 0
+
+    def view(self, request):
+        self.renders += 1
+        return HttpResponse('page')
+
+    def get(self, view, path):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        return view(request)
+
+    def test_only_whitelisted_parameters_vary_the_key(self):
+        view = cache_public_page(self.view, params=('page',))
+        self.get(view, '/about/?utm_source=a')
+        self.get(view, '/about/?utm_source=b')
+        self.assertEqual(self.renders, 1)
+        self.get(view, '/about/?page=2')
+        self.assertEqual(self.renders, 2)
+
+    def test_pages_with_a_csrf_token_are_not_stored(self):
+        def view(request):
+            self.renders += 1
+            get_token(request)
+            return HttpResponse('form')
+
+        view = cache_public_page(view)
+        self.get(view, '/contact/')
+        self.get(view, '/contact/')
+        self.assertEqual(self.renders, 2)
+
+class ContentListingCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mother = User.objects.create_user('mother', role='mother')
+        cls.article = EducationalContent.objects.create(
+            title='Iron in pregnancy', slug='iron', content_type='article', summary='Iron', content='Iron',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.mother)
+
+    def test_unknown_parameters_share_the_cached_page(self):
+        with patch('pregnancy.views.keyset_page', wraps=keyset_page) as page:
+            self.client.get(reverse('educational_content'), {'utm_source': 'a'})
+            self.client.get(reverse('educational_content'), {'utm_source': 'b'})
+        self.assertEqual(page.call_count, 1)
+
+    def test_cached_cards_change_when_the_article_does(self):
+        self.assertContains(self.client.get(reverse('educational_content')), 'Iron in pregnancy')
+        self.article.title = 'Iron and folate'
+        self.article.save()
+        self.assertContains(self.client.get(reverse('educational_content')), 'Iron and folate')
+
+    def test_progress_page_shows_the_week_info_block(self):
+        PregnancyProfile.objects.create(mother=self.mother, last_menstrual_period=date.today() - timedelta(weeks=20))
+        response = self.client.get(reverse('track_progress'))
+        self.assertContains(response, 'Your baby is about the size of a <strong>banana</strong>')
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'timings.jsonl')
+
+    def middleware(self, view, max_bytes=10 ** 6):
+        with override_settings(
+            REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_FILE=self.path, REQUEST_TIMING_MAX_BYTES=max_bytes,
+        ):
+            return RequestTimingMiddleware(view)
+
+    def test_streamed_queries_are_recorded(self):
+        def rows():
+            for user in User.objects.all():
+                yield user.username
+            yield str(User.objects.count())
+
+        middleware = self.middleware(lambda request: StreamingHttpResponse(rows()))
+        response = middleware(RequestFactory().get('/'))
+        b''.join(response.streaming_content)
+        middleware.store.flush()
+        [sample] = read_samples(self.path)
+        self.assertEqual(sample['queries'], 2)
+
+    def test_timing_file_is_rotated(self):
+        middleware = self.middleware(lambda request: HttpResponse(), max_bytes=1)
+        for _ in range(2):
+            middleware(RequestFactory().get('/'))
+            middleware.store.flush()
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(len(list(read_samples(self.path))), 1)
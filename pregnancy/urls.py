@@ -38,10 +38,23 @@ urlpatterns = [
     path('appointments/', views.appointments, name='appointments'),
     path('messaging/', views.messaging, name='messaging'),
     path('emergency-alert/', views.emergency_alert, name='emergency_alert'),
+    path('exports/<slug:name>/', views.export_records, name='export_records'),
     
     # API endpoints
     path('api/week-info/<int:week>/', views.api_week_info, name='api_week_info'),
     path('api/mark-message-read/<uuid:message_id>/', views.api_mark_message_read, name='api_mark_message_read'),
+    path('api/mark-messages-read/', views.api_mark_messages_read, name='api_mark_messages_read'),
+    path('api/alerts/updates/', views.api_alert_updates, name='api_alert_updates'),
+    path('api/alerts/<uuid:alert_id>/claim/', views.api_claim_alert, name='api_claim_alert'),
+    path('api/vitals/trends/', views.api_vitals_trends, name='api_vitals_trends'),
+    path('api/vitals/ingest/', views.api_ingest_vitals, name='api_ingest_vitals'),
+    path('api/vitals/history/', views.api_vitals_history, name='api_vitals_history'),
+    path('api/appointments/', views.api_appointments, name='api_appointments'),
+    path('api/content/', views.api_content, name='api_content'),
+    path('api/content/search/', views.api_search_content, name='api_search_content'),
+    path('api/cache-stats/', views.api_cache_stats, name='api_cache_stats'),
+    path('api/database-stats/', views.api_database_stats, name='api_database_stats'),
+    path('healthz/', views.health_check, name='health_check'),
     
     # Appointment management
     path('appointments/create/', views.create_appointment, name='create_appointment'),
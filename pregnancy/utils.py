@@ -0,0 +1,295 @@
+# pregnancy/utils.py
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .models import (
+    User, PregnancyProfile, TrimesterRollover, Appointment, Message, EmergencyAlert, RiskFlag,
+    UnreadMessageCount, ConversationUnreadCount, SECOND_TRIMESTER_WEEK, THIRD_TRIMESTER_WEEK,
+)
+from .broker import get_broker
+from .pagination import decode_cursor, encode_cursor, keyset_page
+from .week_content import FIRST_WEEK, LAST_WEEK, WEEK_CONTENT
+
+logger = logging.getLogger(__name__)
+
+CONVERSATIONS_PER_PAGE = 20
+ALERT_CHANNEL = 'emergency_alerts'
+ALERT_UPDATES_LIMIT = 50
+# updated_at is stamped before the transaction commits, so changes this
+# recent are sent again in case they became visible after later ones
+ALERT_UPDATES_OVERLAP = timedelta(seconds=30)
+
+def calculate_pregnancy_progress(week):
+    """Week-by-week content for the progress tracker, clamped to the supported range"""
+    return WEEK_CONTENT[min(max(week, FIRST_WEEK), LAST_WEEK)]
+
+def get_conversation_page(user, page_number, per_page=CONVERSATIONS_PER_PAGE):
+    """Paginated inbox with one entry per conversation partner.
+
+    Runs a fixed number of queries (count, page, partners, last messages)
+    no matter how many messages or partners the user has.
+    """
+    paginator = Paginator(Message.objects.conversations(user), per_page)
+    page = paginator.get_page(page_number)
+    rows = list(page.object_list)
+
+    partners = User.objects.in_bulk([row['partner'] for row in rows])
+    last_messages = Message.objects.select_related('sender', 'receiver').in_bulk(
+        [row['last_message_id'] for row in rows]
+    )
+
+    page.object_list = [
+        {
+            'user': partners[row['partner']],
+            'last_message': last_messages[row['last_message_id']],
+            'unread_count': row['unread_count'],
+        }
+        for row in rows
+    ]
+    return page
+
+def adjust_unread_counts(sender_id, receiver_id, delta):
+    """Shift the receiver's unread totals by ``delta`` (per user and per sender)"""
+    total = Greatest(F('unread_count') + delta, 0)
+    if delta > 0:
+        UnreadMessageCount.objects.get_or_create(user_id=receiver_id)
+        ConversationUnreadCount.objects.get_or_create(sender_id=sender_id, receiver_id=receiver_id)
+    UnreadMessageCount.objects.filter(user_id=receiver_id).update(unread_count=total)
+    ConversationUnreadCount.objects.filter(
+        sender_id=sender_id, receiver_id=receiver_id
+    ).update(unread_count=total)
+
+def get_unread_count(user):
+    """Unread messages for the navigation badge and dashboard"""
+    counter = UnreadMessageCount.objects.filter(user=user).values_list('unread_count', flat=True).first()
+    return counter or 0
+
+@transaction.atomic
+def rebuild_unread_counts():
+    """Recompute every unread counter from the Message table"""
+    unread = Message.objects.filter(is_read=False).order_by()
+
+    UnreadMessageCount.objects.all().delete()
+    ConversationUnreadCount.objects.all().delete()
+
+    UnreadMessageCount.objects.bulk_create(
+        UnreadMessageCount(user_id=row['receiver'], unread_count=row['total'])
+        for row in unread.values('receiver').annotate(total=Count('id'))
+    )
+    pairs = ConversationUnreadCount.objects.bulk_create(
+        ConversationUnreadCount(sender_id=row['sender'], receiver_id=row['receiver'], unread_count=row['total'])
+        for row in unread.values('sender', 'receiver').annotate(total=Count('id'))
+    )
+    return len(pairs)
+
+@transaction.atomic
+def mark_messages_read(receiver, message_ids=None, partner_id=None):
+    """Mark a conversation or a set of messages read with a single UPDATE.
+
+    Returns the unread count per affected sender after the update.
+    """
+    unread = Message.objects.filter(receiver=receiver, is_read=False).order_by()
+    if message_ids is not None:
+        unread = unread.filter(id__in=message_ids)
+    if partner_id is not None:
+        unread = unread.filter(sender_id=partner_id)
+
+    # Lock the rows first so concurrent requests can't decrement twice
+    senders = Counter(unread.select_for_update().values_list('sender_id', flat=True))
+    unread.update(is_read=True)
+    for sender_id, count in senders.items():
+        adjust_unread_counts(sender_id, receiver.id, -count)
+
+    remaining = dict.fromkeys(senders, 0)
+    remaining.update(
+        ConversationUnreadCount.objects.filter(
+            receiver=receiver, sender_id__in=senders
+        ).values_list('sender_id', 'unread_count')
+    )
+    return remaining
+
+CLINICIAN_DASHBOARD_CACHE_KEY = 'clinician_dashboard:{clinician_id}'
+PENDING_ALERTS_CACHE_KEY = 'clinician_dashboard:pending_alerts'
+UPCOMING_APPOINTMENTS_LIMIT = 10
+PENDING_ALERTS_LIMIT = 5
+
+def get_clinician_appointments(clinician):
+    """Today's and upcoming appointments plus recent patients, cached per clinician"""
+    cache_key = CLINICIAN_DASHBOARD_CACHE_KEY.format(clinician_id=clinician.id)
+    data = cache.get(cache_key)
+    if data is not None:
+        return data
+
+    today_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+    now = timezone.now()
+
+    # One query for both lists, split in Python; stop reading once upcoming is full
+    appointments = Appointment.objects.filter(
+        clinician=clinician,
+        scheduled_date__gte=today_start,
+        status__in=['scheduled', 'confirmed'],
+    ).select_related('mother').order_by('scheduled_date')
+
+    todays_appointments, upcoming_appointments = [], []
+    for appointment in appointments.iterator(chunk_size=50):
+        if appointment.scheduled_date <= today_end:
+            todays_appointments.append(appointment)
+        elif appointment.scheduled_date >= now:
+            upcoming_appointments.append(appointment)
+            if len(upcoming_appointments) == UPCOMING_APPOINTMENTS_LIMIT:
+                break
+
+    recent_patients = list(
+        User.objects.filter(
+            role='mother',
+            mother_appointments__clinician=clinician,
+        ).annotate(
+            last_appointment=Max('mother_appointments__scheduled_date')
+        ).order_by('-last_appointment')[:5]
+    )
+
+    data = {
+        'todays_appointments': todays_appointments,
+        'upcoming_appointments': upcoming_appointments,
+        'recent_patients': recent_patients,
+    }
+    cache.set(cache_key, data, settings.CLINICIAN_DASHBOARD_CACHE_TIMEOUT)
+    return data
+
+def get_pending_alerts(clinician=None):
+    """Triage-ordered open emergency alerts, optionally only a clinician's patients.
+
+    The unscoped queue is shared by every clinician dashboard and cached.
+    """
+    alerts = EmergencyAlert.objects.triage().select_related('mother')
+    if clinician is not None:
+        return list(alerts.for_clinician(clinician)[:PENDING_ALERTS_LIMIT])
+
+    cached = cache.get(PENDING_ALERTS_CACHE_KEY)
+    if cached is None:
+        cached = list(alerts[:PENDING_ALERTS_LIMIT])
+        cache.set(PENDING_ALERTS_CACHE_KEY, cached, settings.CLINICIAN_DASHBOARD_CACHE_TIMEOUT)
+    return cached
+
+def claim_alert(alert_id, clinician):
+    claimed = EmergencyAlert.objects.claim(alert_id, clinician)
+    if claimed:
+        # A queryset update skips post_save, so refresh listeners here
+        invalidate_pending_alerts()
+        transaction.on_commit(lambda: publish_alert(
+            EmergencyAlert.objects.select_related('mother').get(pk=alert_id)
+        ))
+    return claimed
+
+def serialize_alert(alert):
+    return {
+        'id': str(alert.id),
+        'mother': alert.mother.get_full_name() or alert.mother.username,
+        'urgency_level': alert.urgency_level,
+        'urgency_display': alert.get_urgency_level_display(),
+        'symptoms': alert.symptoms,
+        'location': alert.location,
+        'is_responded': alert.is_responded,
+        'claimed_by': str(alert.claimed_by_id) if alert.claimed_by_id else None,
+        'created_at': alert.created_at.isoformat(),
+        'updated_at': alert.updated_at.isoformat(),
+    }
+
+def alert_cursor(alert):
+    return encode_cursor(alert.updated_at, alert.id)
+
+def latest_alert_cursor():
+    """Cursor positioned after every alert changed so far"""
+    latest = EmergencyAlert.objects.order_by('-updated_at', '-id').values('updated_at', 'id').first()
+    if latest is None:
+        return encode_cursor(timezone.now(), uuid.UUID(int=0))
+    return encode_cursor(latest['updated_at'], latest['id'])
+
+def get_alert_updates(cursor, limit=ALERT_UPDATES_LIMIT):
+    """Alerts changed after ``cursor``, oldest first; returns (alerts, next cursor, more).
+
+    An alert can become visible after later-stamped ones were already
+    returned, so alerts at or before the cursor that changed within
+    ALERT_UPDATES_OVERLAP are returned again. Callers treat every alert as
+    an upsert by id. Raises InvalidCursor for a malformed cursor.
+    """
+    alerts = EmergencyAlert.objects.select_related('mother')
+    page = keyset_page(alerts, 'updated_at', cursor, per_page=limit)
+    updated_at, alert_id, _ = decode_cursor(cursor)
+    replay = alerts.filter(updated_at__gte=timezone.now() - ALERT_UPDATES_OVERLAP).filter(
+        Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, id__lte=alert_id)
+    ).order_by('updated_at', 'id')
+    changed = page.object_list
+    next_cursor = alert_cursor(changed[-1]) if changed else cursor
+    return list(replay) + changed, next_cursor, page.has_next()
+
+def publish_alert(alert):
+    """Push a new or updated alert to every connected clinician"""
+    try:
+        # Serialized once here rather than once per connected stream
+        data = json.dumps(serialize_alert(alert))
+        get_broker().publish(ALERT_CHANNEL, {'cursor': alert_cursor(alert), 'data': data})
+    except Exception:
+        # The alert is already saved; dashboards and reconnecting streams still pick it up
+        logger.exception('Could not publish emergency alert %s', alert.id)
+
+def get_patient_risk_flags(clinician, limit=10):
+    """Active vitals risk flags for a clinician's patients, most urgent first"""
+    patients = Appointment.objects.filter(clinician=clinician).values('mother')
+    return list(
+        RiskFlag.objects.filter(is_active=True, mother__in=patients)
+        .select_related('mother')[:limit]
+    )
+
+def invalidate_clinician_dashboard(clinician_id):
+    cache.delete(CLINICIAN_DASHBOARD_CACHE_KEY.format(clinician_id=clinician_id))
+
+def invalidate_pending_alerts():
+    cache.delete(PENDING_ALERTS_CACHE_KEY)
+
+def rollover_trimesters(full=False, today=None):
+    """Bring the stored current_trimester up to date with a few set-based UPDATEs.
+
+    Incremental runs only look at profiles whose LMP crossed the second or
+    third trimester boundary since the previous run; ``full`` corrects every
+    profile. Each run is recorded as a TrimesterRollover summary.
+    """
+    started = time.monotonic()
+    today = today or timezone.localdate()
+    last_run = TrimesterRollover.objects.filter(run_date__lt=today).first()
+    incremental = not full and last_run is not None
+
+    moved = {}
+    boundaries = [('second', SECOND_TRIMESTER_WEEK), ('third', THIRD_TRIMESTER_WEEK)]
+    if not incremental:
+        boundaries.insert(0, ('first', 0))
+    with transaction.atomic():
+        for trimester, first_week in boundaries:
+            profiles = PregnancyProfile.objects.in_trimester(trimester, today)
+            if incremental:
+                # Only LMPs that reached this boundary after the last run date
+                since = last_run.run_date - timedelta(weeks=first_week)
+                profiles = profiles.filter(last_menstrual_period__gt=since)
+            moved[trimester] = profiles.exclude(current_trimester=trimester).update(
+                current_trimester=trimester, updated_at=timezone.now()
+            )
+
+        return TrimesterRollover.objects.create(
+            run_date=today,
+            is_full=not incremental,
+            moved_to_first=moved.get('first', 0),
+            moved_to_second=moved['second'],
+            moved_to_third=moved['third'],
+            elapsed_seconds=time.monotonic() - started,
+        )
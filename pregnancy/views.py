@@ -3,19 +3,48 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.utils import timezone
-<<<<<<< HEAD
+import csv
+import io
+import json
+import uuid
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import DatabaseError, connection, transaction
 from django.db.models import Q
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition, require_POST
 from .models import *
 from .forms import *
-from .utils import calculate_pregnancy_progress
+from .cache import CONTENT_LISTING_KEY, cache_public_page, cache_stats, content_version
+from .database import connection_stats
+from .exports import EXPORTS, FORMATS as EXPORT_FORMATS, iter_export
+from .pagination import InvalidCursor, keyset_page, parse_per_page
+from .recommendations import recommended_content, related_content
+from .search import search_content
+from .vitals import INGEST_MAX_ROWS, PERIOD_LENGTHS, ingest_vitals
+from .week_content import PREGNANCY_MILESTONES, WEEK_ETAGS, WEEK_JSON, is_valid_week
+from .utils import (
+    calculate_pregnancy_progress, get_conversation_page, get_unread_count, mark_messages_read,
+    get_clinician_appointments, get_pending_alerts, claim_alert, get_patient_risk_flags, serialize_alert,
+    ALERT_UPDATES_LIMIT, get_alert_updates, latest_alert_cursor,
+)
 
+ALERT_POLL_INTERVAL_MS = 5000
+FEATURED_CONTENT_LIMIT = 6
+WEEK_INFO_MAX_AGE = 60 * 60 * 24 * 365
+
+@cache_public_page
 def home(request):
     """Homepage view"""
-    featured_content = EducationalContent.objects.filter(
+    featured_content = EducationalContent.objects.cards().filter(
         is_featured=True, 
         is_active=True
-    )[:6]
+    )[:FEATURED_CONTENT_LIMIT]
     
     context = {
         'featured_content': featured_content,
@@ -23,13 +52,15 @@ def home(request):
     }
     return render(request, 'pregnancy/home.html', context)
 
+@cache_public_page
 def about(request):
     """About page view"""
-    return render(request, 'pregnancy/about.html')
+    return render(request, 'pages/about.html')
 
+@cache_public_page
 def services(request):
     """Services page view"""
-    return render(request, 'pregnancy/services.html')
+    return render(request, 'pages/services.html')
 
 def contact(request):
     """Contact page view"""
@@ -42,7 +73,7 @@ def contact(request):
     else:
         form = ContactForm()
     
-    return render(request, 'pregnancy/contact.html', {'form': form})
+    return render(request, 'pages/contact.html', {'form': form})
 
 def register(request):
     """User registration view"""
@@ -93,23 +124,22 @@ def mother_dashboard(request):
     recent_vitals = VitalsRecord.objects.filter(mother=request.user)[:5]
     
     # Upcoming appointments
-    upcoming_appointments = Appointment.objects.filter(
+    upcoming_appointments = Appointment.objects.select_related('mother', 'clinician').filter(
         mother=request.user,
         scheduled_date__gte=timezone.now(),
         status__in=['scheduled', 'confirmed']
     )[:5]
     
     # Unread messages
-    unread_messages = Message.objects.filter(
-        receiver=request.user,
-        is_read=False
-    ).count()
+    unread_messages = get_unread_count(request.user)
     
-    # Recent educational content
-    recent_content = EducationalContent.objects.filter(
-        is_active=True,
-        trimester_target__in=[pregnancy_profile.current_trimester if pregnancy_profile else 'first', 'all']
-    )[:3]
+    # Educational content picked for this week of pregnancy
+    recent_content = recommended_content(weeks_pregnant)
+    if not recent_content:
+        recent_content = EducationalContent.objects.cards().filter(
+            is_active=True,
+            trimester_target__in=[pregnancy_profile.get_current_trimester() if pregnancy_profile else 'first', 'all']
+        )[:3]
     
     context = {
         'pregnancy_profile': pregnancy_profile,
@@ -125,37 +155,16 @@ def mother_dashboard(request):
 
 def clinician_dashboard(request):
     """Dashboard for healthcare providers"""
-    # Today's appointments
-    today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = today_start + timedelta(days=1)
-    
-    todays_appointments = Appointment.objects.filter(
-        clinician=request.user,
-        scheduled_date__range=[today_start, today_end],
-        status__in=['scheduled', 'confirmed']
-    ).order_by('scheduled_date')
-    
-    # Upcoming appointments
-    upcoming_appointments = Appointment.objects.filter(
-        clinician=request.user,
-        scheduled_date__gte=timezone.now(),
-        status__in=['scheduled', 'confirmed']
-    ).exclude(scheduled_date__range=[today_start, today_end])[:10]
-    
-    # Recent patients
-    recent_patients = User.objects.filter(
-        role='mother',
-        mother_appointments__clinician=request.user
-    ).distinct()[:5]
-    
-    # Pending emergency alerts
-    pending_alerts = EmergencyAlert.objects.filter(is_responded=False)[:5]
+    appointment_data = get_clinician_appointments(request.user)
+    alert_scope = request.GET.get('alerts', 'all')
     
     context = {
-        'todays_appointments': todays_appointments,
-        'upcoming_appointments': upcoming_appointments,
-        'recent_patients': recent_patients,
-        'pending_alerts': pending_alerts,
+        'todays_appointments': appointment_data['todays_appointments'],
+        'upcoming_appointments': appointment_data['upcoming_appointments'],
+        'recent_patients': appointment_data['recent_patients'],
+        'pending_alerts': get_pending_alerts(request.user if alert_scope == 'mine' else None),
+        'risk_flags': get_patient_risk_flags(request.user),
+        'alert_scope': alert_scope,
     }
     
     return render(request, 'pregnancy/dashboard_clinician.html', context)
@@ -192,18 +201,10 @@ def track_progress(request):
     # Get week-specific information
     week_info = calculate_pregnancy_progress(weeks_pregnant)
     
-    # Pregnancy milestones
-    milestones = [
-        {'week': 12, 'title': 'First Trimester Complete', 'description': 'Risk of miscarriage decreases significantly'},
-        {'week': 20, 'title': 'Anatomy Scan', 'description': 'Detailed ultrasound to check baby development'},
-        {'week': 28, 'title': 'Third Trimester Begins', 'description': 'Start counting baby movements'},
-        {'week': 36, 'title': 'Baby is Full Term', 'description': 'Baby could arrive any time now!'},
-    ]
-    
     context = {
         'pregnancy_profile': pregnancy_profile,
         'week_info': week_info,
-        'milestones': milestones,
+        'milestones': PREGNANCY_MILESTONES,
         'weeks_pregnant': weeks_pregnant,
     }
     
@@ -240,7 +241,7 @@ def educational_content(request):
     trimester = request.GET.get('trimester', 'all')
     content_type = request.GET.get('type', 'all')
     
-    content = EducationalContent.objects.filter(is_active=True)
+    content = EducationalContent.objects.cards().filter(is_active=True)
     
     if trimester != 'all':
         content = content.filter(trimester_target__in=[trimester, 'all'])
@@ -249,10 +250,42 @@ def educational_content(request):
         content = content.filter(content_type=content_type)
     
     # Featured content
-    featured_content = content.filter(is_featured=True)
+    featured_content = content.filter(is_featured=True).order_by('-created_at', '-pk')[:FEATURED_CONTENT_LIMIT]
+    
+    query = request.GET.get('q', '').strip()
+    if query:
+        results, facets = search_content(
+            query,
+            trimester=None if trimester == 'all' else trimester,
+            content_type=None if content_type == 'all' else content_type,
+        )
+        context = {
+            'educational_content': results,
+            'search_query': query,
+            'search_facets': facets,
+            'featured_content': featured_content,
+            'selected_trimester': trimester,
+            'selected_type': content_type,
+        }
+        return render(request, 'pregnancy/educational_content.html', context)
+    
+    # The same listing is shown to every reader, so share it until content changes.
+    # Only the parameters that shape the page go into the key, so junk query strings can't fill the cache.
+    cursor = request.GET.get('cursor', '')
+    per_page = parse_per_page(request.GET.get('per_page'))
+    params = urlencode({'trimester': trimester, 'type': content_type, 'cursor': cursor, 'per_page': per_page})
+    cache_key = CONTENT_LISTING_KEY.format(version=content_version(), params=params)
+    page = cache.get(cache_key)
+    if page is None:
+        try:
+            page = keyset_page(content, 'created_at', cursor=cursor or None, per_page=per_page, descending=True)
+        except InvalidCursor:
+            return redirect('educational_content')
+        cache.set(cache_key, page, settings.CONTENT_LISTING_CACHE_TIMEOUT)
     
     context = {
-        'educational_content': content,
+        'educational_content': page.object_list,
+        'page_obj': page,
         'featured_content': featured_content,
         'selected_trimester': trimester,
         'selected_type': content_type,
@@ -265,15 +298,18 @@ def content_detail(request, slug):
     """Educational content detail view"""
     content = get_object_or_404(EducationalContent, slug=slug, is_active=True)
     
-    # Related content
-    related_content = EducationalContent.objects.filter(
-        is_active=True,
-        trimester_target=content.trimester_target
-    ).exclude(id=content.id)[:3]
+    # Related content, favouring the reader's current trimester
+    profile = PregnancyProfile.objects.filter(mother=request.user).first()
+    related = related_content(content, week=profile.get_weeks_pregnant() if profile else None)
+    if not related:
+        related = EducationalContent.objects.cards().filter(
+            is_active=True,
+            trimester_target=content.trimester_target
+        ).exclude(id=content.id)[:3]
     
     context = {
         'content': content,
-        'related_content': related_content,
+        'related_content': related,
     }
     
     return render(request, 'pregnancy/content_detail.html', context)
@@ -291,8 +327,17 @@ def appointments(request):
     if status_filter:
         appointments = appointments.filter(status=status_filter)
     
+    try:
+        page = keyset_page(
+            appointments.select_related('mother', 'clinician'), 'scheduled_date',
+            cursor=request.GET.get('cursor'), per_page=parse_per_page(request.GET.get('per_page')),
+        )
+    except InvalidCursor:
+        return redirect('appointments')
+    
     context = {
-        'appointments': appointments,
+        'appointments': page.object_list,
+        'page_obj': page,
     }
     
     return render(request, 'pregnancy/appointments.html', context)
@@ -311,34 +356,141 @@ def messaging(request):
     else:
         form = MessageForm()
     
-    # Get conversations
-    sent_messages = Message.objects.filter(sender=request.user)
-    received_messages = Message.objects.filter(receiver=request.user)
-    
-    # Group messages by conversation
-    conversations = {}
-    all_messages = list(sent_messages) + list(received_messages)
-    
-    for msg in all_messages:
-        other_user = msg.receiver if msg.sender == request.user else msg.sender
-        if other_user.id not in conversations:
-            conversations[other_user.id] = {
-                'user': other_user,
-                'last_message': msg,
-                'unread_count': Message.objects.filter(
-                    sender=other_user,
-                    receiver=request.user,
-                    is_read=False
-                ).count()
-            }
+    # Get conversations, one row per partner
+    conversations = get_conversation_page(request.user, request.GET.get('page'))
     
     context = {
         'form': form,
-        'conversations': sorted(conversations.values(), key=lambda x: x['last_message'].created_at, reverse=True),
+        'conversations': conversations.object_list,
+        'page_obj': conversations,
     }
     
     return render(request, 'pregnancy/messaging.html', context)
 
+@login_required
+def profile(request):
+    """Account and pregnancy profile view"""
+    pregnancy_profile = PregnancyProfile.objects.filter(mother=request.user).first()
+    if request.method == 'POST':
+        user_form = UserUpdateForm(request.POST, request.FILES, instance=request.user)
+        profile_form = PregnancyProfileForm(request.POST, instance=pregnancy_profile) if pregnancy_profile else None
+        if user_form.is_valid() and (profile_form is None or profile_form.is_valid()):
+            user_form.save()
+            if profile_form:
+                profile_form.save()
+            messages.success(request, 'Profile updated successfully!')
+            return redirect('profile')
+    else:
+        user_form = UserUpdateForm(instance=request.user)
+        profile_form = PregnancyProfileForm(instance=pregnancy_profile) if pregnancy_profile else None
+    
+    context = {
+        'user_form': user_form,
+        'profile_form': profile_form,
+        'pregnancy_profile': pregnancy_profile,
+    }
+    
+    return render(request, 'pregnancy/profile.html', context)
+
+@login_required
+@user_passes_test(lambda u: u.role in ('mother', 'clinician'))
+def create_appointment(request):
+    """Book an appointment; mothers book for themselves"""
+    if request.method == 'POST':
+        form = AppointmentForm(request.POST)
+        if request.user.role == 'clinician':
+            form.fields['clinician'].required = False
+        mother = request.user if request.user.role == 'mother' else User.objects.filter(
+            role='mother', id=request.POST.get('mother')
+        ).first()
+        if mother is None:
+            form.add_error(None, 'Choose a patient.')
+        if form.is_valid():
+            appointment = form.save(commit=False)
+            appointment.mother = mother
+            if request.user.role == 'clinician':
+                appointment.clinician = request.user
+            appointment.save()
+            messages.success(request, 'Appointment booked successfully!')
+            return redirect('appointments')
+    else:
+        form = AppointmentForm()
+    
+    return render(request, 'pregnancy/appointment_form.html', {'form': form})
+
+def _own_appointment(request, appointment_id):
+    lookup = {'mother': request.user} if request.user.role == 'mother' else {'clinician': request.user}
+    return get_object_or_404(Appointment.objects.select_related('mother', 'clinician'), id=appointment_id, **lookup)
+
+@login_required
+@user_passes_test(lambda u: u.role in ('mother', 'clinician'))
+def update_appointment(request, appointment_id):
+    """Reschedule or edit an appointment"""
+    appointment = _own_appointment(request, appointment_id)
+    if request.method == 'POST':
+        form = AppointmentForm(request.POST, instance=appointment)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Appointment updated successfully!')
+            return redirect('appointments')
+    else:
+        form = AppointmentForm(instance=appointment)
+    
+    return render(request, 'pregnancy/appointment_form.html', {'form': form, 'appointment': appointment})
+
+@login_required
+@user_passes_test(lambda u: u.role in ('mother', 'clinician'))
+@require_POST
+def cancel_appointment(request, appointment_id):
+    """Cancel an appointment"""
+    appointment = _own_appointment(request, appointment_id)
+    appointment.status = 'cancelled'
+    appointment.save(update_fields=['status', 'updated_at'])
+    messages.success(request, 'Appointment cancelled.')
+    return redirect('appointments')
+
+@login_required
+def conversation(request, user_id):
+    """Messages exchanged with one partner, newest first"""
+    partner = get_object_or_404(User, id=user_id)
+    thread = Message.objects.filter(
+        Q(sender=request.user, receiver=partner) | Q(sender=partner, receiver=request.user)
+    ).select_related('sender')
+    
+    try:
+        page = keyset_page(
+            thread, 'created_at', cursor=request.GET.get('cursor'),
+            per_page=parse_per_page(request.GET.get('per_page')), descending=True,
+        )
+    except InvalidCursor:
+        return redirect('conversation', user_id=partner.id)
+    mark_messages_read(request.user, partner_id=partner.id)
+    
+    context = {
+        'partner': partner,
+        'thread': page.object_list,
+        'page_obj': page,
+        'form': MessageForm(initial={'receiver': partner}, user=request.user),
+    }
+    
+    return render(request, 'pregnancy/conversation.html', context)
+
+@login_required
+def send_message(request):
+    """Send a message and return to the conversation"""
+    if request.method == 'POST':
+        form = MessageForm(request.POST, user=request.user)
+        if form.is_valid():
+            message = form.save(commit=False)
+            message.sender = request.user
+            message.save()
+            messages.success(request, 'Message sent successfully!')
+            return redirect('conversation', user_id=message.receiver_id)
+    else:
+        form = MessageForm(user=request.user)
+    
+    return render(request, 'pregnancy/messaging.html', {'form': form})
+
 @login_required
 @user_passes_test(lambda u: u.role == 'mother')
 def emergency_alert(request):
@@ -350,7 +502,7 @@ def emergency_alert(request):
             alert.mother = request.user
             alert.save()
             
-            # Here you would typically send notifications to clinicians
+            # Connected clinicians get the alert pushed over the alert stream (see signals)
             messages.warning(request, 'Emergency alert sent! Help is on the way.')
             return redirect('dashboard')
     else:
@@ -358,90 +510,353 @@ def emergency_alert(request):
     
     return render(request, 'pregnancy/emergency_alert.html', {'form': form})
 
-# API Views for AJAX functionality
 @login_required
+@never_cache
+def api_alert_updates(request):
+    """Emergency alerts created or changed after ``cursor``, for clients that cannot hold the alert stream open.
+    
+    Without a cursor the response only carries one positioned at the newest
+    change, since the dashboard already lists the open alerts. Clients keep
+    the returned cursor, poll again after ``poll_after_ms`` and treat each
+    alert as an upsert by id, since recent alerts are sent more than once.
+    """
+    if request.user.role != 'clinician':
+        return JsonResponse({'status': 'error', 'message': 'Only clinicians receive alert updates.'}, status=403)
+    
+    cursor = request.GET.get('cursor')
+    if not cursor:
+        return JsonResponse({
+            'status': 'success', 'alerts': [], 'cursor': latest_alert_cursor(), 'more': False,
+            'poll_after_ms': ALERT_POLL_INTERVAL_MS,
+        })
+    
+    try:
+        alerts, cursor, more = get_alert_updates(cursor, ALERT_UPDATES_LIMIT)
+    except InvalidCursor:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor.'}, status=400)
+    return JsonResponse({
+        'status': 'success',
+        'alerts': [serialize_alert(alert) for alert in alerts],
+        'cursor': cursor,
+        'more': more,
+        # Drain a backlog straight away rather than one page per interval
+        'poll_after_ms': 0 if more else ALERT_POLL_INTERVAL_MS,
+    })
+
+@login_required
+@user_passes_test(lambda u: u.role in ('clinician', 'admin'))
+def export_records(request, name):
+    """Stream vitals, appointments or alerts as CSV or NDJSON"""
+    if name not in EXPORTS:
+        return JsonResponse({'status': 'error', 'message': 'Unknown export.'}, status=404)
+    output_format = request.GET.get('format', 'csv')
+    if output_format not in EXPORT_FORMATS:
+        return JsonResponse({'status': 'error', 'message': 'Format must be csv or ndjson.'}, status=400)
+    trimester = request.GET.get('trimester') or None
+    if trimester not in (None, 'first', 'second', 'third'):
+        return JsonResponse({'status': 'error', 'message': 'Invalid trimester.'}, status=400)
+    
+    # Clinicians only ever export their own patients
+    clinician = request.user if request.user.role == 'clinician' else None
+    if clinician is None and request.GET.get('clinician'):
+        try:
+            clinician = uuid.UUID(request.GET['clinician'])
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid clinician id.'}, status=400)
+    
+    try:
+        date_from, date_to = _date_param(request, 'from'), _date_param(request, 'to')
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Dates must be valid and formatted YYYY-MM-DD.'}, status=400)
+    
+    lines = iter_export(
+        name, output_format,
+        date_from=date_from,
+        date_to=date_to,
+        clinician=clinician,
+        trimester=trimester,
+    )
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[output_format])
+    response['Content-Disposition'] = f'attachment; filename="{name}.{output_format}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+# API Views for AJAX functionality
+@condition(etag_func=lambda request, week: WEEK_ETAGS[week] if is_valid_week(week) else None)
 def api_week_info(request, week):
-    """API endpoint for week-specific information"""
-    week_info = calculate_pregnancy_progress(week)
-    return JsonResponse(week_info)
+    """API endpoint for week-specific information.
+    
+    The content is the same for everyone, so the view is public and never
+    touches the session; a shared cache can then hold one copy per week.
+    """
+    if not is_valid_week(week):
+        return JsonResponse({'status': 'error', 'message': 'Week out of range.'}, status=404)
+    
+    # Pre-serialized and never changes between deploys, so let browsers and CDNs keep it
+    response = HttpResponse(WEEK_JSON[week], content_type='application/json')
+    patch_cache_control(response, public=True, max_age=WEEK_INFO_MAX_AGE, immutable=True)
+    return response
 
 @login_required
 def api_mark_message_read(request, message_id):
     """API endpoint to mark message as read"""
-    message = get_object_or_404(Message, id=message_id, receiver=request.user)
-    message.is_read = True
-    message.save()
-    return JsonResponse({'status': 'success'}))
-=======
-from .models import *
-from .forms import *
+    with transaction.atomic():
+        message = get_object_or_404(
+            Message.objects.select_for_update(), id=message_id, receiver=request.user
+        )
+        message.is_read = True
+        message.save(update_fields=['is_read'])
+    return JsonResponse({'status': 'success'})
 
-def home(request):
-    """Homepage with dynamic content similar to The Bump"""
-    featured_content = EducationalContent.objects.filter(is_active=True)[:3]
-    context = {
-        'featured_content': featured_content,
-        'current_week': 12,  # Example - would be calculated dynamically
-    }
-    return render(request, 'pregnancy/home.html', context)
+def _date_param(request, name):
+    """Query parameter ``name`` as a date, or None if absent; ValueError if it is not a real date"""
+    value = request.GET.get(name, '')
+    if not value:
+        return None
+    # parse_date() returns None for a bad format and raises for e.g. February 30th
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
 
-@login_required
-def dashboard(request):
-    """Main dashboard for logged-in users"""
+def _requested_mother(request):
+    """The mother whose data an API call is about, or an error response"""
     if request.user.role == 'mother':
-        try:
-            pregnancy_record = PregnancyRecord.objects.get(mother=request.user)
-            vitals = VitalsLog.objects.filter(mother=request.user)[:5]
-            appointments = Appointment.objects.filter(mother=request.user, date_time__gte=timezone.now())[:5]
-            unread_messages = Message.objects.filter(receiver=request.user, is_read=False).count()
-        except PregnancyRecord.DoesNotExist:
-            pregnancy_record = None
-            vitals = []
-            appointments = []
-            unread_messages = 0
-        
-        context = {
-            'pregnancy_record': pregnancy_record,
-            'vitals': vitals,
-            'appointments': appointments,
-            'unread_messages': unread_messages,
-        }
-        return render(request, 'pregnancy/mother_dashboard.html', context)
-    
-    elif request.user.role == 'clinician':
-        # Clinician dashboard
-        today_appointments = Appointment.objects.filter(
-            clinician=request.user, 
-            date_time__date=timezone.now().date()
+        return request.user.id, None
+    try:
+        mother_id = uuid.UUID(request.GET.get('mother', ''))
+    except ValueError:
+        return None, JsonResponse({'status': 'error', 'message': 'Invalid mother id.'}, status=400)
+    if request.user.role == 'clinician' and not Appointment.objects.filter(
+        clinician=request.user, mother_id=mother_id
+    ).exists():
+        return None, JsonResponse({'status': 'error', 'message': 'Patient not found.'}, status=404)
+    return mother_id, None
+
+def _keyset_json(request, queryset, key, descending=False):
+    """JSON response with one keyset page of a values() queryset"""
+    try:
+        page = keyset_page(
+            queryset, key, cursor=request.GET.get('cursor'),
+            per_page=parse_per_page(request.GET.get('per_page')), descending=descending,
         )
-        patients = User.objects.filter(role='mother')
-        
-        context = {
-            'today_appointments': today_appointments,
-            'patients': patients,
+    except InvalidCursor:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor.'}, status=400)
+    return JsonResponse({
+        'status': 'success',
+        'results': page.object_list,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+@login_required
+def api_vitals_trends(request):
+    """API endpoint for per-day or per-week vitals trends"""
+    period = request.GET.get('period', 'week')
+    if period not in PERIOD_LENGTHS:
+        return JsonResponse({'status': 'error', 'message': 'Period must be day or week.'}, status=400)
+    
+    mother_id, error = _requested_mother(request)
+    if error:
+        return error
+    
+    try:
+        date_from, date_to = _date_param(request, 'from'), _date_param(request, 'to')
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Dates must be valid and formatted YYYY-MM-DD.'}, status=400)
+    
+    rollups = VitalsRollup.objects.filter(mother_id=mother_id, period=period)
+    if date_from:
+        rollups = rollups.filter(period_start__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(period_start__lte=date_to)
+    
+    points = [
+        {
+            'period_start': rollup['period_start'].isoformat(),
+            'record_count': rollup['record_count'],
+            'stats': rollup['stats'],
         }
-        return render(request, 'pregnancy/clinician_dashboard.html', context)
+        for rollup in rollups.values('period_start', 'record_count', 'stats')
+    ]
+    return JsonResponse({'status': 'success', 'period': period, 'points': points})
+
+@login_required
+def api_appointments(request):
+    """API endpoint for the user's appointments, one keyset page at a time"""
+    if request.user.role == 'mother':
+        appointments = Appointment.objects.filter(mother=request.user)
+    else:
+        appointments = Appointment.objects.filter(clinician=request.user)
+    status_filter = request.GET.get('status')
+    if status_filter:
+        appointments = appointments.filter(status=status_filter)
+    
+    appointments = appointments.values(
+        'id', 'scheduled_date', 'appointment_type', 'status', 'duration_minutes', 'location',
+        'reason', 'mother_id', 'clinician_id',
+    )
+    return _keyset_json(request, appointments, 'scheduled_date')
+
+@login_required
+def api_vitals_history(request):
+    """API endpoint for a mother's vitals records, newest first"""
+    mother_id, error = _requested_mother(request)
+    if error:
+        return error
+    
+    vitals = VitalsRecord.objects.filter(mother_id=mother_id).values(
+        'id', 'record_date', *VitalsRecord.METRICS, 'symptoms', 'notes',
+    )
+    return _keyset_json(request, vitals, 'record_date', descending=True)
+
+@login_required
+def api_content(request):
+    """API endpoint for the educational content listing, newest first"""
+    content = EducationalContent.objects.filter(is_active=True)
+    trimester = request.GET.get('trimester', 'all')
+    content_type = request.GET.get('type', 'all')
+    if trimester != 'all':
+        content = content.filter(trimester_target__in=[trimester, 'all'])
+    if content_type != 'all':
+        content = content.filter(content_type=content_type)
     
+    content = content.values(
+        'id', 'created_at', 'title', 'slug', 'summary', 'content_type', 'trimester_target',
+        'read_time_minutes', 'is_featured',
+    )
+    return _keyset_json(request, content, 'created_at', descending=True)
+
+@login_required
+def api_search_content(request):
+    """API endpoint for ranked educational content search with trimester facets"""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'status': 'error', 'message': 'Provide a search query.'}, status=400)
+    trimester = request.GET.get('trimester') or None
+    content_type = request.GET.get('type') or None
+    
+    results, facets = search_content(
+        query, trimester=trimester, content_type=content_type, limit=parse_per_page(request.GET.get('limit'))
+    )
+    return JsonResponse({
+        'status': 'success',
+        'results': [
+            {
+                'id': article.id,
+                'title': article.title,
+                'slug': article.slug,
+                'summary': article.summary,
+                'content_type': article.content_type,
+                'trimester_target': article.trimester_target,
+                'rank': getattr(article, 'rank', None),
+            }
+            for article in results
+        ],
+        'facets': facets,
+    })
+
+@login_required
+@require_POST
+def api_claim_alert(request, alert_id):
+    """API endpoint for a clinician to take ownership of an open emergency alert"""
+    if request.user.role != 'clinician':
+        return JsonResponse({'status': 'error', 'message': 'Only clinicians can claim alerts.'}, status=403)
+    if not claim_alert(alert_id, request.user):
+        if not EmergencyAlert.objects.filter(pk=alert_id).exists():
+            return JsonResponse({'status': 'error', 'message': 'Alert not found.'}, status=404)
+        return JsonResponse({'status': 'error', 'message': 'Alert is no longer open.'}, status=409)
+    return JsonResponse({'status': 'success'})
+
+@login_required
+@require_POST
+def api_mark_messages_read(request):
+    """API endpoint to mark a whole conversation or a list of messages as read"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid JSON body.'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'status': 'error', 'message': 'Expected a JSON object.'}, status=400)
+        partner_id = data.get('partner_id')
+        message_ids = data.get('message_ids')
+        if message_ids is not None and not isinstance(message_ids, list):
+            return JsonResponse({'status': 'error', 'message': 'message_ids must be a list.'}, status=400)
     else:
-        # Admin dashboard
-        return render(request, 'pregnancy/admin_dashboard.html')
+        partner_id = request.POST.get('partner_id')
+        message_ids = request.POST.getlist('message_ids') or None
+    
+    if not partner_id and not message_ids:
+        return JsonResponse({'status': 'error', 'message': 'Provide partner_id or message_ids.'}, status=400)
+    
+    try:
+        partner_id = uuid.UUID(str(partner_id)) if partner_id else None
+        message_ids = [uuid.UUID(str(message_id)) for message_id in message_ids] if message_ids else None
+    except (TypeError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid id.'}, status=400)
+    
+    conversations = mark_messages_read(request.user, message_ids=message_ids, partner_id=partner_id)
+    return JsonResponse({
+        'status': 'success',
+        'unread_count': get_unread_count(request.user),
+        'conversations': {str(sender_id): count for sender_id, count in conversations.items()},
+    })
 
 @login_required
-def track_progress(request):
-    """Pregnancy progress tracking"""
-    if request.user.role != 'mother':
-        return redirect('dashboard')
-    
-    pregnancy_record = get_object_or_404(PregnancyRecord, mother=request.user)
-    weeks_pregnant = (timezone.now().date() - pregnancy_record.pregnancy_start_date).days // 7
-    
-    # Weekly development information (simplified)
-    week_info = {
-        'week': weeks_pregnant,
-        'baby_size': 'Lime',  # This would come from a database
-        'baby_weight': '45g',
-        'developments': [
-            'Baby\'s reflexes are developing',
-            'Fingers and toes are fully separated',
-            'Baby is starting to make sucking motions
->>>>>>> 3412d5bb19548ae5633638dd73829ab08f680517
+@user_passes_test(lambda u: u.role == 'admin' or u.is_staff)
+def api_cache_stats(request):
+    """API endpoint with this worker's cache hit and miss counters"""
+    return JsonResponse({'status': 'success', 'caches': cache_stats()})
+
+@login_required
+@user_passes_test(lambda u: u.role == 'admin' or u.is_staff)
+@never_cache
+def api_database_stats(request):
+    """API endpoint with this worker's database connection reuse counters"""
+    return JsonResponse({'status': 'success', 'database': connection_stats()})
+
+@never_cache
+def health_check(request):
+    """Liveness probe for load balancers; reports nothing beyond whether the database answers"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        return JsonResponse({'status': 'error', 'message': 'Database unavailable.'}, status=503)
+    return JsonResponse({'status': 'success'})
+
+@login_required
+@require_POST
+def api_ingest_vitals(request):
+    """API endpoint for clinic devices and offline clients to upload vitals in bulk"""
+    if request.user.role not in ('mother', 'clinician', 'admin'):
+        return HttpResponseForbidden()
+    
+    if request.content_type == 'text/csv':
+        try:
+            rows = list(csv.DictReader(io.StringIO(request.body.decode('utf-8'))))
+        except (UnicodeDecodeError, csv.Error):
+            return JsonResponse({'status': 'error', 'message': 'Invalid CSV body.'}, status=400)
+    else:
+        try:
+            rows = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid JSON body.'}, status=400)
+        if isinstance(rows, dict):
+            rows = rows.get('records')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return JsonResponse({'status': 'error', 'message': 'Provide a list of records.'}, status=400)
+    
+    if not rows:
+        return JsonResponse({'status': 'error', 'message': 'No records submitted.'}, status=400)
+    if len(rows) > INGEST_MAX_ROWS:
+        return JsonResponse(
+            {'status': 'error', 'message': f'Submit at most {INGEST_MAX_ROWS} records per request.'}, status=413
+        )
+    
+    try:
+        result = ingest_vitals(rows, request.user)
+    except PermissionDenied as exc:
+        return JsonResponse({'status': 'error', 'message': str(exc)}, status=403)
+    return JsonResponse({'status': 'success', **result})
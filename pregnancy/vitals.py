@@ -0,0 +1,389 @@
+# pregnancy/vitals.py
+"""Per-day and per-week vitals aggregates for trend charts.
+
+VitalsRollup keeps one row per mother, period and period start, so a
+40-week chart is one indexed read of about 40 small rows instead of a scan
+of the raw records. A new VitalsRecord is folded into its buckets by
+add_to_vitals_rollups() without re-reading the bucket's records; edits and
+deletes can lower a min or max, so they recompute the buckets instead.
+
+ingest_vitals() takes batches from clinic devices and offline clients,
+validates every row, inserts them with bulk_create and then recomputes the
+affected buckets with recompute_vitals_rollups() and screens the affected
+mothers in one pass, so a large batch costs a fixed number of queries.
+"""
+import math
+import uuid
+import numpy as np
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import User, Appointment, VitalsRecord, VitalsRollup
+from .screening import screen_mothers
+
+PERIOD_LENGTHS = {
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+
+def stat_aggregates():
+    aggregates = {'record_count': Count('id')}
+    for metric in VitalsRecord.METRICS:
+        aggregates[f'{metric}__min'] = Min(metric)
+        aggregates[f'{metric}__max'] = Max(metric)
+        aggregates[f'{metric}__sum'] = Sum(metric)
+        aggregates[f'{metric}__count'] = Count(metric)
+    return aggregates
+
+def stats_from_row(row):
+    """Turn flat aggregate columns into the JSON shape stored on VitalsRollup"""
+    stats = {}
+    for metric in VitalsRecord.METRICS:
+        if not row[f'{metric}__count']:
+            continue
+        stats[metric] = metric_stats(
+            float(row[f'{metric}__min']), float(row[f'{metric}__max']),
+            float(row[f'{metric}__sum']), row[f'{metric}__count'],
+        )
+    return stats
+
+def metric_stats(minimum, maximum, total, count):
+    # The sum is kept so later records can update the mean exactly
+    return {'min': minimum, 'max': maximum, 'mean': round(total / count, 2), 'sum': round(total, 2), 'count': count}
+
+def add_record_to_stats(stats, record):
+    for metric in VitalsRecord.METRICS:
+        value = getattr(record, metric)
+        if value is None:
+            continue
+        value = float(value)
+        current = stats.get(metric)
+        if current is None:
+            stats[metric] = metric_stats(value, value, value, 1)
+            continue
+        # Rows written before the sum was stored only have the mean
+        total = current.get('sum', current['mean'] * current['count'])
+        stats[metric] = metric_stats(
+            min(current['min'], value), max(current['max'], value), total + value, current['count'] + 1,
+        )
+
+def period_start(period, day):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+def trend_aggregates(queryset, period):
+    """Per-period aggregates of every vital, grouped and computed in SQL"""
+    trunc = TruncWeek if period == 'week' else TruncDay
+    return (
+        queryset.order_by()
+        .annotate(period_start=trunc('record_date', output_field=DateField()))
+        .values('mother', 'period_start')
+        .annotate(**stat_aggregates())
+        .order_by('mother', 'period_start')
+    )
+
+def refresh_vitals_rollups(mother_id, record_date):
+    """Recompute the day and week buckets containing ``record_date``"""
+    day = timezone.localtime(record_date).date()
+    with transaction.atomic():
+        for period, length in PERIOD_LENGTHS.items():
+            start = period_start(period, day)
+            range_start = timezone.make_aware(datetime.combine(start, time.min))
+            row = VitalsRecord.objects.filter(
+                mother_id=mother_id,
+                record_date__gte=range_start,
+                record_date__lt=range_start + length,
+            ).aggregate(**stat_aggregates())
+
+            bucket = VitalsRollup.objects.filter(mother_id=mother_id, period=period, period_start=start)
+            if not row['record_count']:
+                bucket.delete()
+                continue
+            VitalsRollup.objects.update_or_create(
+                mother_id=mother_id, period=period, period_start=start,
+                defaults={'record_count': row['record_count'], 'stats': stats_from_row(row)},
+            )
+
+def recompute_vitals_rollups(days):
+    """Recompute the day and week buckets of every (mother_id, date) in ``days``.
+
+    Each period is aggregated with one grouped query over the affected
+    mothers and dates, and the buckets are written back in bulk.
+    """
+    keys = {
+        (mother_id, period, period_start(period, day))
+        for mother_id, day in days for period in PERIOD_LENGTHS
+    }
+    if not keys:
+        return
+    mother_ids = {mother_id for mother_id, _, _ in keys}
+    starts = {start for _, _, start in keys}
+    range_start = timezone.make_aware(datetime.combine(min(starts), time.min))
+    range_end = timezone.make_aware(datetime.combine(
+        max(start + PERIOD_LENGTHS[period] for _, period, start in keys), time.min,
+    ))
+    records = VitalsRecord.objects.filter(
+        mother_id__in=mother_ids, record_date__gte=range_start, record_date__lt=range_end,
+    )
+
+    with transaction.atomic():
+        existing = {
+            (bucket.mother_id, bucket.period, bucket.period_start): bucket
+            for bucket in VitalsRollup.objects.select_for_update().filter(
+                mother_id__in=mother_ids, period_start__in=starts,
+            )
+        }
+        rows = {}
+        for period in PERIOD_LENGTHS:
+            period_starts = {start for _, key_period, start in keys if key_period == period}
+            for row in trend_aggregates(records, period).filter(period_start__in=period_starts):
+                rows[(row['mother'], period, row['period_start'])] = row
+
+        changed, created, emptied, now = [], [], [], timezone.now()
+        for key in keys:
+            row, bucket = rows.get(key), existing.get(key)
+            if row is None:
+                if bucket is not None:
+                    emptied.append(bucket.id)
+                continue
+            if bucket is None:
+                mother_id, period, start = key
+                bucket = VitalsRollup(mother_id=mother_id, period=period, period_start=start)
+                created.append(bucket)
+            else:
+                bucket.updated_at = now
+                changed.append(bucket)
+            bucket.record_count = row['record_count']
+            bucket.stats = stats_from_row(row)
+        VitalsRollup.objects.filter(id__in=emptied).delete()
+        VitalsRollup.objects.bulk_update(changed, ['record_count', 'stats', 'updated_at'], batch_size=1000)
+        if not created:
+            return
+        try:
+            with transaction.atomic():
+                VitalsRollup.objects.bulk_create(created, batch_size=1000)
+        except IntegrityError:
+            # A concurrent writer created one of the buckets first; recount them one by one
+            for bucket in created:
+                refresh_vitals_rollups(
+                    bucket.mother_id, timezone.make_aware(datetime.combine(bucket.period_start, time.min)),
+                )
+
+def add_to_vitals_rollups(records):
+    """Fold newly created ``records`` into their day and week buckets.
+
+    The existing buckets are read and locked in one query and written back
+    with one bulk UPDATE and one INSERT, however many records there are.
+    """
+    keys = {}
+    for record in records:
+        day = timezone.localtime(record.record_date).date()
+        for period in PERIOD_LENGTHS:
+            keys.setdefault((record.mother_id, period, period_start(period, day)), []).append(record)
+    if not keys:
+        return
+
+    with transaction.atomic():
+        existing = {
+            (bucket.mother_id, bucket.period, bucket.period_start): bucket
+            for bucket in VitalsRollup.objects.select_for_update().filter(
+                mother_id__in={mother_id for mother_id, _, _ in keys},
+                period_start__in={start for _, _, start in keys},
+            )
+        }
+        changed, created, now = [], [], timezone.now()
+        for key, bucket_records in keys.items():
+            bucket = existing.get(key)
+            if bucket is None:
+                mother_id, period, start = key
+                bucket = VitalsRollup(mother_id=mother_id, period=period, period_start=start, stats={})
+                created.append(bucket)
+            else:
+                bucket.updated_at = now
+                changed.append(bucket)
+            for record in bucket_records:
+                add_record_to_stats(bucket.stats, record)
+            bucket.record_count += len(bucket_records)
+        VitalsRollup.objects.bulk_update(changed, ['record_count', 'stats', 'updated_at'])
+        if not created:
+            return
+        try:
+            with transaction.atomic():
+                VitalsRollup.objects.bulk_create(created)
+        except IntegrityError:
+            # A concurrent writer created one of the buckets first; recount them from the records
+            for bucket in created:
+                key = (bucket.mother_id, bucket.period, bucket.period_start)
+                refresh_vitals_rollups(bucket.mother_id, keys[key][0].record_date)
+
+@transaction.atomic
+def rebuild_vitals_rollups(batch_size=1000):
+    """Recreate every rollup row from the raw records"""
+    VitalsRollup.objects.all().delete()
+    created = 0
+    for period in PERIOD_LENGTHS:
+        batch = []
+        for row in trend_aggregates(VitalsRecord.objects.all(), period).iterator(chunk_size=batch_size):
+            batch.append(VitalsRollup(
+                mother_id=row['mother'], period=period, period_start=row['period_start'],
+                record_count=row['record_count'], stats=stats_from_row(row),
+            ))
+            if len(batch) == batch_size:
+                created += len(VitalsRollup.objects.bulk_create(batch))
+                batch = []
+        created += len(VitalsRollup.objects.bulk_create(batch))
+    return created
+
+INGEST_MAX_ROWS = 5000
+INGEST_BATCH_SIZE = 500
+INTEGER_METRICS = {'blood_pressure_systolic', 'blood_pressure_diastolic', 'fetal_heart_rate'}
+
+def _parse_number(value):
+    if value is None or value == '':
+        return math.nan
+    number = float(value)
+    # NaN stands for a missing reading internally, so a submitted 'nan' is not a number
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+def _parse_row(row):
+    """Type conversion for one submitted row; returns (values, errors)"""
+    values, errors = {}, {}
+    for field in ('client_id', 'mother'):
+        try:
+            values[field] = uuid.UUID(str(row.get(field, '')))
+        except ValueError:
+            errors[field] = 'Enter a valid UUID.'
+
+    record_date = row.get('record_date')
+    if record_date:
+        parsed = parse_datetime(str(record_date))
+        if parsed is None:
+            errors['record_date'] = 'Enter a valid date/time.'
+        elif timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        values['record_date'] = parsed
+    else:
+        values['record_date'] = timezone.now()
+
+    for metric in VitalsRecord.METRICS:
+        try:
+            values[metric] = _parse_number(row.get(metric))
+        except (TypeError, ValueError):
+            values[metric] = math.nan
+            errors[metric] = 'Enter a number.'
+
+    values['symptoms'] = str(row.get('symptoms') or '')
+    values['notes'] = str(row.get('notes') or '')
+    return values, errors
+
+def range_errors(columns):
+    """VitalsRecord.VALID_RANGES checked for every row at once; {row index: {field: message}}"""
+    errors = {}
+    with np.errstate(invalid='ignore'):
+        for metric, (minimum, maximum, message) in VitalsRecord.VALID_RANGES.items():
+            values = columns[metric]
+            invalid = ~np.isnan(values) & ((values < minimum) | (values > maximum))
+            if metric in INTEGER_METRICS:
+                fractional = ~np.isnan(values) & (np.mod(values, 1) != 0)
+                for index in np.flatnonzero(fractional & ~invalid):
+                    errors.setdefault(int(index), {})[metric] = 'Enter a whole number.'
+            for index in np.flatnonzero(invalid):
+                errors.setdefault(int(index), {})[metric] = message
+    return errors
+
+def _metric_value(metric, value):
+    if math.isnan(value):
+        return None
+    if metric in INTEGER_METRICS:
+        return int(value)
+    return Decimal(str(round(value, 2)))
+
+def ingest_vitals(rows, user):
+    """Validate and bulk insert vitals submitted by a device or offline client.
+
+    Returns a summary with per-row errors. Rows whose client_id was already
+    stored for that mother are reported as duplicates, so retries are safe.
+    Mothers may only submit their own vitals and clinicians those of mothers
+    they have an appointment with; any other mother raises PermissionDenied
+    and nothing is stored.
+    """
+    parsed = [_parse_row(row) for row in rows]
+    errors = {index: row_errors for index, (_, row_errors) in enumerate(parsed) if row_errors}
+
+    columns = {
+        metric: np.array([values[metric] for values, _ in parsed], dtype=float)
+        for metric in VitalsRecord.METRICS
+    }
+    for index, row_errors in range_errors(columns).items():
+        errors.setdefault(index, {}).update(row_errors)
+
+    # Who may be written to, and which rows were already stored, in two queries
+    mothers = User.objects.filter(role='mother', is_active=True)
+    if user.role == 'mother':
+        mothers = mothers.filter(id=user.id)
+    elif user.role == 'clinician':
+        mothers = mothers.filter(id__in=Appointment.objects.filter(clinician=user).values('mother'))
+    submitted = {values.get('mother') for values, _ in parsed} - {None}
+    allowed = set(mothers.filter(id__in=submitted).values_list('id', flat=True))
+    if user.role != 'admin' and submitted - allowed:
+        raise PermissionDenied('You may only submit vitals for your own patients.')
+    existing = set(VitalsRecord.objects.filter(
+        mother_id__in=allowed,
+        client_id__in=[values['client_id'] for values, _ in parsed if 'client_id' in values],
+    ).values_list('mother_id', 'client_id'))
+
+    records, duplicates, seen = [], 0, set()
+    for index, (values, _) in enumerate(parsed):
+        if index in errors:
+            continue
+        if values['mother'] not in allowed:
+            errors[index] = {'mother': 'Unknown mother.'}
+            continue
+        key = (values['mother'], values['client_id'])
+        if key in existing or key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        records.append(VitalsRecord(
+            mother_id=values['mother'],
+            client_id=values['client_id'],
+            record_date=values['record_date'],
+            symptoms=values['symptoms'],
+            notes=values['notes'],
+            **{metric: _metric_value(metric, values[metric]) for metric in VitalsRecord.METRICS},
+        ))
+
+    inserted = set()
+    with transaction.atomic():
+        for start in range(0, len(records), INGEST_BATCH_SIZE):
+            batch = records[start:start + INGEST_BATCH_SIZE]
+            VitalsRecord.objects.bulk_create(batch, ignore_conflicts=True)
+            # ignore_conflicts drops rows a concurrent retry stored first without
+            # saying which, so read back the ones that carry this batch's ids
+            inserted.update(VitalsRecord.objects.filter(
+                id__in=[record.id for record in batch],
+            ).values_list('mother_id', 'client_id'))
+    duplicates += len(records) - len(inserted)
+    records = [record for record in records if (record.mother_id, record.client_id) in inserted]
+
+    # bulk_create skips signals, so refresh derived data for the whole batch at once
+    recompute_vitals_rollups({(r.mother_id, timezone.localtime(r.record_date).date()) for r in records})
+    if records:
+        screen_mothers({r.mother_id for r in records})
+
+    return {
+        'created': len(records),
+        'duplicates': duplicates,
+        'errors': [
+            {'row': index, 'client_id': str(rows[index].get('client_id', '')), 'errors': row_errors}
+            for index, row_errors in sorted(errors.items())
+        ],
+    }
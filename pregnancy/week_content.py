@@ -0,0 +1,114 @@
+# pregnancy/week_content.py
+"""Week-by-week pregnancy content, built once at import into an immutable table.
+
+WEEK_CONTENT[week] is a read-only mapping for every supported gestational
+week. The data never changes between deploys, so each week also has a
+precomputed ETag for HTTP caching.
+"""
+import hashlib
+import json
+from types import MappingProxyType
+from .models import trimester_for_week
+
+FIRST_WEEK = 0
+LAST_WEEK = 42
+
+# week: (compared to, approximate weight)
+BABY_SIZES = {
+    4: ('Poppy seed', 'less than 1 g'),
+    5: ('Sesame seed', 'less than 1 g'),
+    6: ('Lentil', 'less than 1 g'),
+    7: ('Blueberry', 'less than 1 g'),
+    8: ('Raspberry', '1 g'),
+    9: ('Cherry', '2 g'),
+    10: ('Strawberry', '4 g'),
+    11: ('Lime', '7 g'),
+    12: ('Plum', '14 g'),
+    13: ('Lemon', '23 g'),
+    14: ('Peach', '43 g'),
+    15: ('Apple', '70 g'),
+    16: ('Avocado', '100 g'),
+    17: ('Pear', '140 g'),
+    18: ('Bell pepper', '190 g'),
+    19: ('Mango', '240 g'),
+    20: ('Banana', '300 g'),
+    21: ('Carrot', '360 g'),
+    22: ('Papaya', '430 g'),
+    23: ('Grapefruit', '500 g'),
+    24: ('Ear of corn', '600 g'),
+    25: ('Cauliflower', '660 g'),
+    26: ('Head of lettuce', '760 g'),
+    27: ('Cabbage', '875 g'),
+    28: ('Eggplant', '1 kg'),
+    29: ('Butternut squash', '1.2 kg'),
+    30: ('Large cucumber', '1.3 kg'),
+    31: ('Coconut', '1.5 kg'),
+    32: ('Squash', '1.7 kg'),
+    33: ('Pineapple', '1.9 kg'),
+    34: ('Cantaloupe', '2.1 kg'),
+    35: ('Honeydew melon', '2.4 kg'),
+    36: ('Romaine lettuce', '2.6 kg'),
+    37: ('Swiss chard', '2.9 kg'),
+    38: ('Leek', '3.1 kg'),
+    39: ('Small watermelon', '3.3 kg'),
+    40: ('Pumpkin', '3.4 kg'),
+    41: ('Watermelon', '3.6 kg'),
+    42: ('Watermelon', '3.7 kg'),
+}
+
+# (first week, last week, developments)
+DEVELOPMENTS = [
+    (0, 3, ['Ovulation and fertilisation take place', 'The fertilised egg travels to the uterus and implants']),
+    (4, 6, ['The neural tube, which becomes the brain and spine, is forming', 'The heart begins to beat']),
+    (7, 9, ['Arms and legs are budding', 'Facial features start to form']),
+    (10, 13, ['All major organs have formed', 'Fingers and toes are separating', 'Baby can make small movements']),
+    (14, 17, ['Baby can squint, frown and suck a thumb', 'The skeleton is hardening from cartilage to bone']),
+    (18, 21, ['You may start to feel baby move', 'Baby can hear sounds']),
+    (22, 25, ['Baby is developing a sleep and wake routine', 'The lungs are developing branches']),
+    (26, 29, ['Eyes can open and close', 'Baby is gaining fat under the skin']),
+    (30, 33, ['The brain is growing rapidly', 'Baby can tell light from dark']),
+    (34, 37, ['The lungs are nearly mature', 'Baby is settling head-down for birth']),
+    (38, 42, ['Baby is full term and ready to be born', 'Organs are fully developed']),
+]
+
+MILESTONES = [
+    {'week': 12, 'title': 'First Trimester Complete', 'description': 'Risk of miscarriage decreases significantly'},
+    {'week': 20, 'title': 'Anatomy Scan', 'description': 'Detailed ultrasound to check baby development'},
+    {'week': 28, 'title': 'Third Trimester Begins', 'description': 'Start counting baby movements'},
+    {'week': 36, 'title': 'Baby is Full Term', 'description': 'Baby could arrive any time now!'},
+]
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _build_week(week):
+    baby_size, baby_weight = BABY_SIZES.get(week, ('Not yet visible', 'less than 1 g'))
+    developments = next(items for first, last, items in DEVELOPMENTS if first <= week <= last)
+    return {
+        'week': week,
+        'trimester': trimester_for_week(week),
+        'baby_size': baby_size,
+        'baby_weight': baby_weight,
+        'developments': developments,
+        'milestones': [m for m in MILESTONES if m['week'] == week],
+        'upcoming_milestone': next((m for m in MILESTONES if m['week'] > week), None),
+    }
+
+def _etag(content):
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()[:32]
+
+_weeks = [_build_week(week) for week in range(FIRST_WEEK, LAST_WEEK + 1)]
+
+WEEK_CONTENT = tuple(_freeze(week) for week in _weeks)
+WEEK_ETAGS = tuple(_etag(week) for week in _weeks)
+WEEK_JSON = tuple(json.dumps(week) for week in _weeks)
+PREGNANCY_MILESTONES = _freeze(MILESTONES)
+
+del _weeks
+
+def is_valid_week(week):
+    return FIRST_WEEK <= week <= LAST_WEEK
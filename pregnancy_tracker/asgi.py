@@ -1,5 +1,5 @@
 """
-ASGI config for linda_mama project.
+ASGI config for pregnancy_tracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,16 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'linda_mama.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pregnancy_tracker.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up; the alert stream is served outside Django's
+# request cycle so an idle stream holds no thread or database connection
+from pregnancy.streams import ALERT_STREAM_PATH, alert_stream
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == ALERT_STREAM_PATH:
+        return await alert_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -1,20 +1,14 @@
-<<<<<<< HEAD
 """
 Django settings for linda_mama project.
 """
 
 import os
 from pathlib import Path
+import dj_database_url
 from django.contrib.messages import constants as messages
-=======
-# linda_mama/settings.py
-import os
-from pathlib import Path
->>>>>>> 3412d5bb19548ae5633638dd73829ab08f680517
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-<<<<<<< HEAD
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-your-secret-key-here-change-in-production'
 
@@ -22,13 +16,6 @@ SECRET_KEY = 'django-insecure-your-secret-key-here-change-in-production'
 DEBUG = True
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'yourdomain.com']
-=======
-SECRET_KEY = 'your-secret-key-here'
-
-DEBUG = True
-
-ALLOWED_HOSTS = []
->>>>>>> 3412d5bb19548ae5633638dd73829ab08f680517
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -37,7 +24,6 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-<<<<<<< HEAD
     'django.contrib.humanize',
     
     # Third party apps
@@ -46,11 +32,6 @@ INSTALLED_APPS = [
     
     # Local apps
     'pregnancy.apps.PregnancyConfig',
-=======
-    'pregnancy',
-    'crispy_forms',
-    'crispy_bootstrap5',
->>>>>>> 3412d5bb19548ae5633638dd73829ab08f680517
 ]
 
 MIDDLEWARE = [
@@ -61,9 +42,11 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Inactive unless REQUEST_TIMING_ENABLED
+    'pregnancy.middleware.RequestTimingMiddleware',
 ]
 
-ROOT_URLCONF = 'linda_mama.urls'
+ROOT_URLCONF = 'pregnancy_tracker.urls'
 
 TEMPLATES = [
     {
@@ -76,24 +59,36 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-<<<<<<< HEAD
                 'pregnancy.context_processors.global_settings',
-=======
->>>>>>> 3412d5bb19548ae5633638dd73829ab08f680517
             ],
         },
     },
 ]
 
-WSGI_APPLICATION = 'linda_mama.wsgi.application'
+WSGI_APPLICATION = 'pregnancy_tracker.wsgi.application'
+ASGI_APPLICATION = 'pregnancy_tracker.asgi.application'
 
+# DATABASE_URL (set by render.yaml) or the local SQLite file. Each worker keeps
+# its connection for DB_CONN_MAX_AGE seconds (0 closes it after every request)
+# and health-checks it before reuse; see pregnancy.database for reuse counters.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': dj_database_url.config(
+        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
 }
 
+# DATABASE_POOL=pgbouncer when DATABASE_URL points at PgBouncer in transaction
+# pooling mode. Server-side cursors (QuerySet.iterator) cannot outlive a pooled
+# transaction there, so they are disabled. psycopg2 then loads the whole result
+# into client memory on execute, and iterator() only chunks the conversion to
+# Python objects, so large reads must page with keyset queries, as the exports do.
+DATABASE_POOL = os.environ.get('DATABASE_POOL', '')
+if DATABASE_POOL == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -123,7 +118,6 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-<<<<<<< HEAD
 # Custom user model
 AUTH_USER_MODEL = 'pregnancy.User'
 
@@ -145,10 +139,52 @@ MESSAGE_TAGS = {
     messages.ERROR: 'danger',
 }
 
+# Cache backend: locmem, file, memcached or redis, chosen with CACHE_BACKEND.
+# Production defaults to redis, because cached pages and the content version
+# must be shared by every worker; locmem is per process and only suits DEBUG.
+# The pregnancy.cache backends are Django's own with hit/miss counters added.
+CACHE_BACKENDS = {
+    'locmem': ('pregnancy.cache.LocMemCache', 'linda-mama'),
+    'file': ('pregnancy.cache.FileBasedCache', str(BASE_DIR / '.cache')),
+    'memcached': ('pregnancy.cache.PyMemcacheCache', '127.0.0.1:11211'),
+    'redis': ('pregnancy.cache.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'redis')]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('CACHE_LOCATION', _cache_location),
+        'KEY_PREFIX': 'linda-mama',
+    }
+}
+
+# Cache timeouts (seconds)
+CLINICIAN_DASHBOARD_CACHE_TIMEOUT = 60
+PUBLIC_PAGE_CACHE_TIMEOUT = 5 * 60
+CONTENT_LISTING_CACHE_TIMEOUT = 10 * 60
+CONTENT_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Per-request timing and query instrumentation; see the timing_report command
+REQUEST_TIMING_ENABLED = os.environ.get('REQUEST_TIMING', '') == '1'
+REQUEST_TIMING_FILE = os.environ.get('REQUEST_TIMING_FILE', str(BASE_DIR / 'request_timings.jsonl'))
+# Size at which the timing file is rotated to REQUEST_TIMING_FILE.1, replacing the previous backup
+REQUEST_TIMING_MAX_BYTES = int(os.environ.get('REQUEST_TIMING_MAX_BYTES', 50 * 1024 * 1024))
+
 # Email configuration (for production)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'noreply@lindamama.org'
 
+# Fan-out for the emergency alert stream: empty for the in-process broker
+# (one process only), or a redis:// URL shared by every worker
+ALERT_BROKER_URL = os.environ.get('ALERT_BROKER_URL', '')
+
+# Outbound notification delivery, one backend per channel
+# (pregnancy.notifications.MemoryBackend is a fake sink for tests)
+NOTIFICATION_BACKENDS = {
+    'email': 'pregnancy.notifications.EmailBackend',
+    'sms': 'pregnancy.notifications.ConsoleSMSBackend',
+}
+
 # Security settings (for production)
 if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
@@ -157,10 +193,3 @@ if not DEBUG:
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     X_FRAME_OPTIONS = 'DENY'
-=======
-CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap5'
-CRISPY_TEMPLATE_PACK = 'bootstrap5'
-
-LOGIN_REDIRECT_URL = 'dashboard'
-LOGOUT_REDIRECT_URL = 'home'
->>>>>>> 3412d5bb19548ae5633638dd73829ab08f680517